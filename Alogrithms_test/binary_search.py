@@ -1,86 +1,144 @@
+from __future__ import annotations
+from math import log2
+from collections.abc import Callable, Sequence
+from typing import Any
 from constants import *
 """
-Simple binary search
+Iterative binary search on sorted sequences
+
+All searches work on positions within the sorted source instead of slices
+of it, so a search costs O(log n) comparisons and copies nothing. The area
+that is still searched is [start, end): the midpoint of it is compared
+with the target, and one half of the area is dropped every step.
+
+    lower_bound: the first position whose element is not smaller than the target
+    upper_bound: the first position whose element is larger than the target
 
-Find a string or an int in a sorted list of strings
-or integers (source). Determine the start and end
-of the searched area within a list, find the midpoint
-and compare the target string or int to the element
-in the midpoint. If a match was found, return the result.MACHT_FOUND.
-If the target element is smaller that the midpoint element,
-recursively call binary_search with a slice of the source
-list that starts at index 0 and ends at midpoint - 1. 
-If the target is greater than the midpoint element, 
-recursively call binary_search with a slice of the list that
-starts and the midpoint index and ends at the last index of 
-the current list. The algorithms runs until it the target
-element is found or the element was not found but the source
-cannot be sliced further.
+The elements between the two bounds are the ones equal to the target. A
+key function can be given to compare a value calculated from the elements
+instead of the elements themselves, e.g. key=len to search a list of words
+sorted by length for a length. The source must be sorted by the key.
 """
-def binary_search(source: list, target: str|int) -> int:
-    if type(target) != int and type(target) != str:
-        return Result.NOT_FOUND 
-    
-    start, end = 0, len(source)-1 # start and end is always at the beginning and the end
-                                  # of the list because the list is sliced (into shorter and
-                                  # shorter lists) with each recursive call
-    
-    if end < 0:
-        return Result.NOT_FOUND
+def lower_bound(source: Sequence, target: Any, key: Callable[[Any], Any]|None=None, start: int=0, end: int|None=None) -> int:
+    end=len(source) if end is None else end
+    while start < end:
+        mid=(start + end) // 2
+        value=source[mid] if key is None else key(source[mid])
+        if value < target:
+            start=mid + 1
+        else:
+            end=mid
+    return start
 
-    mid = start + end // 2
-    comparand=source[mid] 
+def upper_bound(source: Sequence, target: Any, key: Callable[[Any], Any]|None=None, start: int=0, end: int|None=None) -> int:
+    end=len(source) if end is None else end
+    while start < end:
+        mid=(start + end) // 2
+        value=source[mid] if key is None else key(source[mid])
+        if target < value:
+            end=mid
+        else:
+            start=mid + 1
+    return start
 
+"""
+Return the position of the first element equal to the target (compared by
+key if it is given), or Result.NOT_FOUND. Elements that cannot be compared
+with the target count as not found.
+"""
+def find(source: Sequence, target: Any, key: Callable[[Any], Any]|None=None, start: int=0, end: int|None=None) -> int:
+    end=len(source) if end is None else end
     try:
-        if target == comparand:
-            return Result.MATCH_FOUND
+        position=lower_bound(source, target, key, start, end)
+        if position < end and (source[position] if key is None else key(source[position])) == target:
+            return position
+    except TypeError:
+        pass
+    return Result.NOT_FOUND
 
-        if target < comparand:
-            return binary_search(source[0:mid], target)
+"""
+Simple binary search
 
-        if target > comparand:
-            return binary_search(source[mid+1:], target)
-    except:
+Find a string or an int in a sorted list of strings or integers (source).
+Returns Result.MATCH_FOUND if the target is in the list and
+Result.NOT_FOUND if it is not, or if the target or the elements of the
+list are not a string or an int that can be compared with each other.
+"""
+def binary_search(source: Sequence, target: str|int) -> int:
+    if type(target) != int and type(target) != str:
         return Result.NOT_FOUND
+    return Result.MATCH_FOUND if find(source, target) != Result.NOT_FOUND else Result.NOT_FOUND
 
 """
 Find the index of the word that is the first to match a given length in
-a sorted list of strings
+a list of strings sorted by length
 
-The algorithm works similarly to simple binary search up to the point
-where it finds the first element that matches the target lenght. Then
-it determindes whether that is the first occuurrence of that word length
-and if not, continues to recursively search for the first occurrence.
+Returns Result.NOT_FOUND if no word has the given length. The search can
+be limited to the positions from start to end (both inclusive).
 """
-
-
-def binary_search_by_string_length(source: list, target_length: int, start=0, end=None) -> int:
+def binary_search_by_string_length(source: Sequence[str], target_length: int, start=0, end=None) -> int:
     if not source or type(target_length) != int:
         return Result.NOT_FOUND
-    
-    if end is None:
-        end=len(source)-1
-        if target_length < len(source[0]) \
-        or target_length > len(source[end])\
-        or type(target_length) is not int:
-            return Result.NOT_FOUND
-
-    if start > end:
+    end=len(source) if end is None else end + 1
+    if start >= end or target_length < len(source[start]) or target_length > len(source[end-1]):
         return Result.NOT_FOUND
+    return find(source, target_length, key=len, start=start, end=end)
 
-    mid=(start + end) // 2
-    comparand_length=len(source[mid])
+"""
+Batch lookup: return the lower bound of every target in the same order as
+the targets
 
-    if comparand_length == target_length:
-        if mid==0 or len(source[mid-1]) < comparand_length:
-            return mid
-        else:
-            return binary_search_by_string_length(source, target_length, start, mid-1)
-        
-    if target_length < comparand_length:
-        return binary_search_by_string_length(source, target_length, 0, mid-1)
-    
-    if target_length > comparand_length:
-        return binary_search_by_string_length(source, target_length, mid+1, end)
-    
+The targets are sorted first and then looked up from the smallest to the
+largest, so every search starts where the previous one ended and gallops
+forward from there (see gallop_lower_bound). If there are
+enough targets that comparing every element once is cheaper than a binary
+search per target, the source and the targets are walked together in one
+merge pass instead.
+"""
+def batch_lower_bound(source: Sequence, targets: Sequence, key: Callable[[Any], Any]|None=None) -> list[int]:
+    bounds=[0] * len(targets)
+    order=sorted(range(len(targets)), key=targets.__getitem__)
+    if len(targets) * log2(len(source) + 1) > len(source) + len(targets): # merge pass
+        position=0
+        for target_position in order:
+            target=targets[target_position]
+            while position < len(source) and (source[position] if key is None else key(source[position])) < target:
+                position += 1
+            bounds[target_position]=position
+    else:
+        position=0
+        for target_position in order:
+            position=gallop_lower_bound(source, targets[target_position], key, start=position)
+            bounds[target_position]=position
+    return bounds
+
+"""
+Return the lower bound of a target that is known to be at or after start,
+looking at start + 1, start + 2, start + 4, ... until an element is not
+smaller than the target and then searching the last gap. This costs
+O(log d) comparisons for a bound d positions after start, and the elements
+compared are close to each other.
+"""
+def gallop_lower_bound(source: Sequence, target: Any, key: Callable[[Any], Any]|None=None, start: int=0) -> int:
+    step=1
+    low=start
+    while start + step <= len(source):
+        position=start + step - 1
+        value=source[position] if key is None else key(source[position])
+        if not value < target:
+            return lower_bound(source, target, key, low, position)
+        low=position + 1
+        step *= 2
+    return lower_bound(source, target, key, low, len(source))
 
+"""
+Batch lookup: return the position of every target in the source (compared
+by key if it is given), or Result.NOT_FOUND for the targets that are not
+in it, in the same order as the targets
+"""
+def batch_find(source: Sequence, targets: Sequence, key: Callable[[Any], Any]|None=None) -> list[int]:
+    positions=[]
+    for target, position in zip(targets, batch_lower_bound(source, targets, key)):
+        found=position < len(source) and (source[position] if key is None else key(source[position])) == target
+        positions.append(position if found else Result.NOT_FOUND)
+    return positions
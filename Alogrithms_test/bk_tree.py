@@ -0,0 +1,106 @@
+from __future__ import annotations
+from typing import Callable, Iterable
+from levenshtein_distance import levenshtein_distance
+
+"""
+BK-tree (Burkhard-Keller tree) of words for Levenshtein distance searches
+
+Every node holds a word, and its children are stored by their distance
+from that word: the child under key 3 (and everything below it) is at
+distance 3 from the node's word. Because the Levenshtein distance is a
+metric (triangle inequality), a word within max_distance of the search
+word can only be under a child whose key is within max_distance of the
+distance between the search word and the node's word. All other children
+are skipped, so a search computes the distance to a small part of the
+vocabulary instead of every word.
+
+    search "mumies", max distance 2
+                     "mummies" (1: match)
+                    /    |     \\
+                  1/    3|      \\7
+                   /     |       \\
+         "mummy" (2)  "dummies"  "urumchi"  <- key 7 is outside 1 +/- 2, skipped
+
+Only the distances within max_distance of a node's largest child key
+matter for a search, so the distance is calculated in its bounded form
+(see levenshtein_distance), which gives up early on words that are far
+apart. A custom distance function must take the same optional maximum
+distance argument.
+
+Words can be added at any time. BK-trees cannot easily remove a node (it
+is needed to route the searches below it), so a removed word stays in the
+tree as an inactive node that is no longer returned by searches.
+"""
+class BKTree():
+    def __init__(self, words: Iterable[str]=(), distance: Callable[[str, str, int|None], int]=levenshtein_distance):
+        self.__distance=distance
+        self.__root=None # a node is a list: [word, {distance: child node}, active]
+        self.__size=0
+        for word in words:
+            self.add(word)
+
+    def __len__(self) -> int:
+        return self.__size
+
+    """
+    Add a word to the tree. Returns False if the word was already in the tree.
+    """
+    def add(self, word: str) -> bool:
+        if self.__root is None:
+            self.__root=[word, {}, True]
+            self.__size += 1
+            return True
+        node=self.__root
+        while True:
+            distance=self.__distance(word, node[0])
+            if distance == 0:
+                if node[2]:
+                    return False
+                node[2]=True # the word was removed before
+                self.__size += 1
+                return True
+            child=node[1].get(distance)
+            if child is None:
+                node[1][distance]=[word, {}, True]
+                self.__size += 1
+                return True
+            node=child
+
+    """
+    Remove a word from the tree. Returns False if the word was not in the
+    tree.
+    """
+    def remove(self, word: str) -> bool:
+        node=self.__root
+        while node is not None:
+            distance=self.__distance(word, node[0])
+            if distance == 0:
+                if not node[2]:
+                    return False
+                node[2]=False
+                self.__size -= 1
+                return True
+            node=node[1].get(distance)
+        return False
+
+    """
+    Return all words within max_distance of a word, grouped by their
+    distance in ascending order, e.g. {0: ["reality"], 2: ["realty"]}
+
+    The words of each distance are ordered by length and then
+    alphabetically, like the search source of a catalog.
+    """
+    def search(self, word: str, max_distance: int) -> dict[int, list[str]]:
+        results={}
+        nodes=[self.__root] if self.__root is not None else []
+        while nodes:
+            node=nodes.pop()
+            distance=self.__distance(word, node[0], max_distance + max(node[1], default=0)) # above this, no child can match
+            if distance <= max_distance and node[2]:
+                results.setdefault(distance, list()).append(node[0])
+            for child_distance, child in node[1].items():
+                if distance - max_distance <= child_distance <= distance + max_distance:
+                    nodes.append(child)
+        for words in results.values():
+            words.sort(key=lambda result_word: (len(result_word), result_word))
+        return dict(sorted(results.items()))
@@ -1,59 +1,80 @@
 from __future__ import annotations
+import sys
+from array import array
 import pandas as pd
+from typing import Iterable, Iterator
 import new_search_util
 import presenter
+import book_snapshot
+import book_ingest
+from symspell import DeletionIndex
+from compact_index import CompactIndex
+from isbn_index import IsbnIndex
 from constants import *
 
 """
 Create a nested dictionary that uses the ISBN numbers
 as keys to each book
 
-Creates a pandas dataframe from a given csv file (path).
-Iterates over each row of the dataframe and for each
-row,creates an inner dictionary that is populated with
-all book information except the ISBN. The ISBN numbers are
-used as keys to the inner dictionaries.
+Creates a pandas dataframe from a given csv file (path) and
+passes it to create_books_from_dataframe. The ISBNs are read as text,
+like book_ingest.ingest_csv reads them, so the keys are the same
+whichever way a catalog is loaded.
+"""
+def create_books_from_csv(path: str) -> dict[str, dict[str, str]]:
+    contents = pd.read_csv(path, dtype=BookField.TEXT_COLUMNS)
+    return create_books_from_dataframe(contents)
 
-The underscore in the for loop is used to indicate that the 
-index value of the (index, Series) pair that iterrows() returns
-is intentionally ignored
+"""
+Create a nested dictionary that uses the ISBN numbers as keys
+to each book from a dataframe (a whole csv file or a chunk of it)
 
+The dataframe is processed column by column instead of row
+by row: the year column is converted to integers in one
+operation (values that are not valid years, e.g. because of a
+malformed row, become missing values), rows with missing values
+are dropped, and the remaining years are converted back to strings
+in bulk. Each column is then converted to a Python list once and the
+inner dictionaries are created by zipping the columns together, which
+avoids creating a pandas Series for every row as iterrows() would.
+The ISBN numbers are used as keys to the inner dictionaries.
 """
-def create_books_from_csv(path: str):
-    contents = pd.read_csv(path)
-    contents["Year"]=contents["Year"].astype("Int64")
+def create_books_from_dataframe(contents: pd.DataFrame) -> dict[str, dict[str, str]]:
+    contents["Year"]=pd.to_numeric(contents["Year"], errors="coerce").astype("Int64")
     contents.dropna(inplace=True)
-    books = {}
-    for _, row in contents.iterrows():
-        isbn = row['ISBN']
-        book_details = {
-            "Title": row["Title"],
-            "Author": row["Author"],
-            "Publisher": row["Publisher"],
-            "Year": str(row["Year"])
-        }
-        books[isbn] = book_details
+    contents["Year"]=contents["Year"].astype(str)
+    columns=[contents[field].tolist() for field in BookField.DETAILS]
+    books = {isbn: dict(zip(BookField.DETAILS, details)) 
+             for isbn, details in zip(contents[BookField.ISBN].tolist(), zip(*columns))}
 
     return books
 
-books=create_books_from_csv(BookData.THOUSAND)
-
-
 
 """
 Extract book titles from csv to Python list
 
-Access a csv file withen given path and extract all data from
-the Title column to a pandas dataframe, then convert dataframe
-to Python list
+Access a csv file withen given path and read only the Title
+column to a pandas dataframe, then convert dataframe to Python
+list
 """
 def get_book_titles_from_csv(csv_path: str) -> list:
-    dataframe=pd.read_csv(csv_path)
-    dataframe=dataframe[["Title"]]
+    dataframe=pd.read_csv(csv_path, usecols=["Title"])
     titles=dataframe["Title"].tolist()
 
     return titles
 
+"""
+Extract book titles from csv in chunks
+
+Reads the Title column of a csv file chunk_size rows at a time
+and yields the titles one by one, so the whole file is never
+held in memory at once
+"""
+def iter_book_titles_from_csv(csv_path: str, chunk_size: int=Ingest.CHUNK_SIZE) -> Iterator[str]:
+    with pd.read_csv(csv_path, usecols=["Title"], chunksize=chunk_size) as reader:
+        for chunk in reader:
+            yield from chunk["Title"].tolist()
+
 
 """
 Add words and year from book info to index mapped to ISBNs
@@ -65,10 +86,11 @@ and if not, adds it as a new key along with an empty set as a value.
 This happens by calling the setdefault method on the index, which either
 returns the existing set of ISBNs or adds the new key - value pair as 
 described above. The year information of the book is added with the 
-same method.
+same method, but as a whole: only the title, author and publisher are
+split into words.
 """
 def add_book(search_index: dict[str, set[str]], isbn: str, book: dict[str, str], keyword: str) -> None:
-    words=new_search_util.prepare_string(book[keyword]) if keyword == "Title" or "Author" or "Publisher" else None
+    words=new_search_util.prepare_string(book[keyword]) if keyword in BookField.WORD_FIELDS else None
     if words is not None:
         for word in words:
          search_index.setdefault(word, set()).add(isbn)
@@ -76,14 +98,230 @@ def add_book(search_index: dict[str, set[str]], isbn: str, book: dict[str, str],
         search_index.setdefault(book[keyword], set()).add(isbn) # add the year info
 
 
-# Create a data structure for the book info fields
-title_author_publisher_index={}
-year_index={}
-isbn_list=list(books.keys())
+"""
+Add the words and years of many books to the title/author/publisher index
+and the year index
+
+The indexes hold the same words and ISBNs as after add_book for every
+field of every book; the words of a field are added for all the books at
+once (see add_field_words).
+"""
+def add_books(title_author_publisher_index: dict[str, set[str]], year_index: dict[str, set[str]], books: dict[str, dict[str, str]]) -> None:
+    for field in BookField.WORD_FIELDS:
+        add_field_words(title_author_publisher_index, books, field)
+    add_years(year_index, books)
+
+"""
+Add the years of many books to the year index
+"""
+def add_years(year_index: dict[str, set[str]], books: dict[str, dict[str, str]]) -> None:
+    for isbn, book in books.items():
+        year_index.setdefault(book[BookField.YEAR], set()).add(isbn)
+
+"""
+Add the words of one field (title, author or publisher) of many books to an
+index
+
+Many books share the text of a field, e.g. the same author or publisher,
+so the books are grouped by the text first. The distinct texts are prepared
+in one batch (see new_search_util.prepare_strings) instead of one string
+per book, and the ISBNs of all the books with the same text are added to
+the set of each of its words at once. New words are interned, like in
+add_postings.
+"""
+def add_field_words(search_index: dict[str, set[str]], books: dict[str, dict[str, str]], field: str) -> None:
+    isbns_by_text={}
+    for isbn, book in books.items():
+        isbns=isbns_by_text.get(book[field])
+        if isbns is None:
+            isbns_by_text[book[field]]=[isbn]
+        else:
+            isbns.append(isbn)
+    get_isbns=search_index.get
+    for words, isbns in zip(new_search_util.prepare_strings(list(isbns_by_text)), isbns_by_text.values()):
+        for word in words:
+            word_isbns=get_isbns(word)
+            if word_isbns is None:
+                word_isbns=search_index[sys.intern(word)]=set()
+            word_isbns.update(isbns)
+
+"""
+Return all words of the title, author and publisher of a book, the
+words that add_book puts in the title/author/publisher index
+"""
+def book_words(book: dict[str, str]) -> set[str]:
+    words=set()
+    for keyword in BookField.WORD_FIELDS:
+        words.update(new_search_util.prepare_string(book[keyword]))
+    return words
 
-# Populate indices 
-for isbn, book in books.items():
-    add_book( title_author_publisher_index, isbn, book, "Title")
-    add_book(title_author_publisher_index, isbn, book, "Author")
-    add_book(title_author_publisher_index, isbn, book, "Publisher")
-    add_book(year_index, isbn, book, "Year")
+"""
+Return the words of one field (title, author or publisher) of a book
+"""
+def book_field_words(book: dict[str, str], field: str) -> set[str]:
+    return set(new_search_util.prepare_string(book[field]))
+
+"""
+Add an ISBN to the set of ISBNs of each given word in an index
+
+Returns the words that were not in the index before, so that structures
+built from the words of the index (e.g. the length-sorted list of words)
+can be updated with only these words. The new words are interned, so a
+word of several indexes (e.g. the title/author/publisher index and a field
+index) and the structures built from them is one string object.
+"""
+def add_postings(search_index: dict[str, set[str]], isbn: str, words: Iterable[str]) -> list[str]:
+    new_words=[]
+    for word in words:
+        isbns=search_index.get(word)
+        if isbns is None:
+            word=sys.intern(word)
+            isbns=search_index[word]=set()
+            new_words.append(word)
+        isbns.add(isbn)
+    return new_words
+
+"""
+Remove an ISBN from the set of ISBNs of each given word in an index
+
+A word whose set of ISBNs becomes empty is removed from the index. These
+words are returned, so that structures built from the words of the index
+can be updated with only these words.
+"""
+def remove_postings(search_index: dict[str, set[str]], isbn: str, words: set[str]) -> list[str]:
+    removed_words=[]
+    for word in words:
+        isbns=search_index.get(word)
+        if isbns is None:
+            continue
+        isbns.discard(isbn)
+        if not isbns:
+            del search_index[word]
+            removed_words.append(word)
+    return removed_words
+
+"""
+Create the title/author/publisher index and the year index for a
+dictionary of books
+
+If compact is set, the title/author/publisher index is a CompactIndex
+made directly from the books (see create_compact_index).
+"""
+def create_indexes(books: dict[str, dict[str, str]], compact: bool=False) -> tuple[dict[str, set[str]]|CompactIndex, dict[str, set[str]]]:
+    year_index={}
+    if compact:
+        add_years(year_index, books)
+        return create_compact_index(books), year_index
+    title_author_publisher_index={}
+    add_books(title_author_publisher_index, year_index, books)
+    return title_author_publisher_index, year_index
+
+"""
+Create the compact title/author/publisher index of a dictionary of books
+
+The index holds the same words and ISBNs as the one create_indexes builds,
+but no set of ISBN strings is created on the way: the distinct texts of
+the title, author and publisher fields are prepared in one batch, then
+the books are visited in ISBN (docid) order and the docid of each book is
+appended to an integer array per word, so the docids of every word come
+out sorted and without repetition.
+"""
+def create_compact_index(books: dict[str, dict[str, str]]) -> CompactIndex:
+    isbns=sorted(books)
+    texts=list(dict.fromkeys(book[field] for book in books.values() for field in BookField.WORD_FIELDS))
+    words_by_text=dict(zip(texts, new_search_util.prepare_strings(texts)))
+    del texts
+    docids_by_word={}
+    get_docids=docids_by_word.get
+    for docid, isbn in enumerate(isbns):
+        book=books[isbn]
+        words=set(words_by_text[book[BookField.TITLE]])
+        words.update(words_by_text[book[BookField.AUTHOR]], words_by_text[book[BookField.PUBLISHER]])
+        for word in words:
+            docids=get_docids(word)
+            if docids is None:
+                docids=docids_by_word[sys.intern(word)]=array("I")
+            docids.append(docid)
+    del words_by_text
+    return CompactIndex(docids_by_word, isbns)
+
+"""
+Create the index of a single field (title, author or publisher) for a
+dictionary of books
+
+The title/author/publisher index mixes the words of the three fields.
+A field index only holds the words of one field, so a search that is
+restricted to e.g. the author only looks at author names.
+"""
+def create_field_index(books: dict[str, dict[str, str]], field: str) -> dict[str, set[str]]:
+    field_index={}
+    add_field_words(field_index, books, field)
+    return field_index
+
+"""
+Create the deletion index of the words of a word index (e.g. the
+title/author/publisher index) for fuzzy word lookups
+
+The words are added in their length-sorted order. Raises MemoryError if
+the deletions of the words do not fit in max_entries.
+"""
+def create_deletion_index(search_index: dict[str, set[str]], prefix_length: int|None=SymSpell.PREFIX_LENGTH, max_entries: int|None=SymSpell.MAX_ENTRIES) -> DeletionIndex:
+    return DeletionIndex(sorted(search_index.keys(), key=lambda word: (len(word), word)), Search.LEVENSHTEIN_MAX_DISTANCE, prefix_length, max_entries)
+
+"""
+Return the books and indexes (title/author/publisher, year and ISBN index)
+of a catalog (csv file)
+
+If the catalog has a snapshot that is up to date with the csv file, the
+books and indexes are loaded from the snapshot. Otherwise the csv file
+is parsed, the indexes are built and a new snapshot is written so that
+the next start can skip this work. If the snapshot cannot be written
+(e.g. the directory is read-only), the catalog is still returned.
+If a chunk size is given, the csv file is streamed in chunks of that
+many rows (see book_ingest) instead of being read at once. If compact is
+set, the title/author/publisher index is a CompactIndex, built from the
+books without a dictionary of sets and stored as it is in the snapshot;
+a snapshot holding the other kind of index is converted. The ISBN index
+takes seconds to build for a million books, so it is built with the other
+indexes and kept in the snapshot, not built by the first ISBN search.
+"""
+def load_books_and_indexes(path: str, use_snapshot: bool=True, chunk_size: int|None=None, compact: bool=False) -> tuple[dict[str, dict[str, str]], dict[str, set[str]]|CompactIndex, dict[str, set[str]], IsbnIndex]:
+    if use_snapshot:
+        snapshot=book_snapshot.load_snapshot(path)
+        if snapshot is not None:
+            books, title_author_publisher_index, year_index, isbn_index=snapshot
+            if compact and not isinstance(title_author_publisher_index, CompactIndex):
+                title_author_publisher_index=CompactIndex(title_author_publisher_index)
+            elif not compact and isinstance(title_author_publisher_index, CompactIndex):
+                title_author_publisher_index=title_author_publisher_index.to_dict()
+            return books, title_author_publisher_index, year_index, isbn_index
+    if chunk_size is None:
+        books=create_books_from_csv(path)
+        title_author_publisher_index, year_index=create_indexes(books, compact)
+    else:
+        books, title_author_publisher_index, year_index, _=book_ingest.ingest_csv(path, chunk_size, compact=compact)
+    isbn_index=IsbnIndex(books.keys())
+    if use_snapshot:
+        try:
+            book_snapshot.write_snapshot(path, books, title_author_publisher_index, year_index, isbn_index)
+        except OSError:
+            pass
+    return books, title_author_publisher_index, year_index, isbn_index
+
+
+"""
+Give access to the books and indexes of the default catalog as module
+attributes (book_data.books, book_data.title_author_publisher_index etc.)
+
+The catalog is no longer loaded when this module is imported. The first
+access to one of these attributes loads the default catalog through the
+catalog registry, where the other catalogs can be selected as well.
+"""
+def __getattr__(name: str):
+    if name in ("books", "title_author_publisher_index", "year_index", "isbn_list"):
+        import catalog
+        default_catalog=catalog.registry.get(BookData.DEFAULT)
+        if name == "isbn_list":
+            return list(default_catalog.books.keys())
+        return getattr(default_catalog, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
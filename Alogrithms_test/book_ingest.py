@@ -0,0 +1,158 @@
+from __future__ import annotations
+import argparse
+import os
+import sys
+import time
+import pandas as pd
+import book_data
+from compact_index import CompactIndex
+from constants import *
+
+"""
+Streaming ingestion of book catalogs
+
+Instead of reading a whole csv file into one dataframe, the file is read
+in chunks of a bounded number of rows. Each chunk is turned into book
+dictionaries, the words of the books are prepared in one batch per field
+(through book_data.add_books) and added to the indexes right away, then
+the chunk is dropped. Only the books and the indexes grow while the file
+is read.
+
+A memory ceiling can be given in megabytes. Before each chunk is read,
+the size of the next chunk is limited to what fits below the ceiling
+(based on the memory a row took in the previous chunk). If the process
+already uses more memory than the ceiling allows, the ingestion stops
+with a MemoryError rather than pushing the machine into swap.
+
+The resident set size (RSS) of the process is measured with psutil if it
+is installed, otherwise from /proc on Linux or with the resource module.
+On systems where none of these are available, the memory ceiling cannot
+be enforced and the memory figures are reported as unknown.
+"""
+
+"""
+Statistics of one ingestion run, used to size machines for large catalogs
+"""
+class IngestStats():
+    def __init__(self):
+        self.rows=0
+        self.books=0
+        self.chunks=0
+        self.seconds=0.0
+        self.peak_rss_mb=None
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds > 0 else 0.0
+
+    def __str__(self) -> str:
+        peak_rss="unknown" if self.peak_rss_mb is None else f"{self.peak_rss_mb:.1f} MB"
+        return (f"{self.rows} rows ({self.books} books) in {self.chunks} chunks, {self.seconds:.2f}s, "
+                f"{self.rows_per_second:.0f} rows/sec, peak RSS {peak_rss}")
+
+"""
+Return the current resident set size of the process in megabytes, or None
+if it cannot be measured on this system
+"""
+def current_rss_mb() -> float|None:
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / (1 << 20)
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/statm") as statm:
+            resident_pages=int(statm.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1 << 20)
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    max_rss=resource.getrusage(resource.RUSAGE_SELF).ru_maxrss # peak, not current, but the best available
+    return max_rss / (1 << 20) if sys.platform == "darwin" else max_rss / (1 << 10)
+
+"""
+Return the number of rows to read next so that the rows fit below the
+memory ceiling
+
+Half of the memory left below the ceiling is given to the next chunk,
+the other half is kept for the books and index entries the chunk adds.
+Raises MemoryError if the ceiling has already been reached.
+"""
+def next_chunk_size(chunk_size: int, memory_limit_mb: float|None, rss_mb: float|None, bytes_per_row: float) -> int:
+    if memory_limit_mb is None or rss_mb is None:
+        return chunk_size
+    headroom_mb=memory_limit_mb - rss_mb
+    if headroom_mb <= 0:
+        raise MemoryError(f"Ingestion stopped: {rss_mb:.1f} MB in use, the memory limit is {memory_limit_mb:.1f} MB")
+    if bytes_per_row <= 0:
+        return chunk_size
+    rows_that_fit=int(headroom_mb * (1 << 20) / 2 / bytes_per_row)
+    return max(Ingest.MIN_CHUNK_SIZE, min(chunk_size, rows_that_fit))
+
+"""
+Read a catalog csv file in chunks and build the books and indexes from it
+
+Returns the books, the title/author/publisher index, the year index and
+the statistics of the run. The books and indexes are the same as the ones
+book_data.load_books_and_indexes creates from the whole file. If compact
+is set, the words are not indexed chunk by chunk; the compact index is
+made from the books once the whole file has been read (see
+book_data.create_compact_index).
+"""
+def ingest_csv(path: str, chunk_size: int=Ingest.CHUNK_SIZE, memory_limit_mb: float|None=None, compact: bool=False) -> tuple[dict[str, dict[str, str]], dict[str, set[str]]|CompactIndex, dict[str, set[str]], IngestStats]:
+    books={}
+    title_author_publisher_index={}
+    year_index={}
+    stats=IngestStats()
+    start=time.perf_counter()
+    rss_mb=current_rss_mb()
+    stats.peak_rss_mb=rss_mb
+    bytes_per_row=0.0
+
+    with pd.read_csv(path, dtype=BookField.TEXT_COLUMNS, chunksize=chunk_size) as reader: # the same types in every chunk
+        while True:
+            rows=next_chunk_size(chunk_size, memory_limit_mb, rss_mb, bytes_per_row)
+            try:
+                chunk=reader.get_chunk(rows)
+            except StopIteration:
+                break
+            stats.rows += len(chunk)
+            stats.chunks += 1
+            bytes_per_row=chunk.memory_usage(deep=True).sum() / len(chunk) if len(chunk) else bytes_per_row
+
+            chunk_books=book_data.create_books_from_dataframe(chunk)
+            for isbn, book in chunk_books.items():
+                old_book=books.get(isbn)
+                if old_book is not None: # a later row with the same ISBN replaces the earlier one
+                    if not compact:
+                        book_data.remove_postings(title_author_publisher_index, isbn, book_data.book_words(old_book))
+                    book_data.remove_postings(year_index, isbn, {old_book["Year"]})
+                books[isbn]=book
+            if compact:
+                book_data.add_years(year_index, chunk_books)
+            else:
+                book_data.add_books(title_author_publisher_index, year_index, chunk_books)
+            del chunk, chunk_books
+
+            rss_mb=current_rss_mb()
+            if rss_mb is not None:
+                stats.peak_rss_mb=max(stats.peak_rss_mb, rss_mb)
+
+    if compact:
+        title_author_publisher_index=book_data.create_compact_index(books)
+    stats.books=len(books)
+    stats.seconds=time.perf_counter() - start
+    return books, title_author_publisher_index, year_index, stats
+
+
+if __name__=="__main__":
+    parser=argparse.ArgumentParser(description="Stream a book catalog csv file into the search indexes and report throughput and memory use")
+    parser.add_argument("path", help="catalog csv file")
+    parser.add_argument("--chunk-size", type=int, default=Ingest.CHUNK_SIZE, help="maximum number of rows read at a time")
+    parser.add_argument("--memory-limit", type=float, default=None, help="memory ceiling of the process in MB")
+    arguments=parser.parse_args()
+    *_, stats=ingest_csv(arguments.path, arguments.chunk_size, arguments.memory_limit)
+    print(stats)
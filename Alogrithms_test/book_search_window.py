@@ -1,16 +1,26 @@
 from tkinter import *
 from tkinter import ttk
-import new_search_util
-import book_data
+import catalog
+from catalog import Catalog
+from search_engine import SearchEngine
 from presenter import Presenter
 from constants import *
 from tkinter import messagebox
+from time import perf_counter
+from concurrent.futures import ThreadPoolExecutor
+from cancellation import CancellationToken
 
 class BookSearchWindow(Toplevel):
-    def __init__(self):
+    def __init__(self, catalog_name: str=BookData.DEFAULT):
         super().__init__()
-        self.presenter=Presenter(dict(), book_data.books)
+        self.engine=SearchEngine(catalog.registry.get(catalog_name)) # runs the searches on the selected catalog
+        self.catalog_version=None # name and version of the catalog the presenter's results belong to
+        self.presenter=Presenter(dict(), dict())
         self.search_info_key=None   
+        self.search_executor=ThreadPoolExecutor(max_workers=1) # runs the searches of this window one at a time, off the main loop
+        self.search_future=None # the latest search
+        self.search_token=None # cancels the latest search when a newer one is started
+        self.search_generation=0 # number of the latest search, older searches are not shown
 
         ###########################################################################
         #                             BOOK SEARCH FRAME                           #
@@ -28,7 +38,9 @@ class BookSearchWindow(Toplevel):
         self.search_instructions = (
                                 "Search for title, author or publisher: enter the full information or an identifying part avoiding single letters and common words (and, or, the, etc.)\n"
                                 "\n"
-                                "Search by year: enter all four digits, e.g. 2002. Ranges (2002-2005, <2001 etc.) are not allowed.\n"
+                                "Search only the title, author or publisher: start with title:, author: or publisher:, e.g. author: Amy Tan\n"
+                                "\n"
+                                "Search by year: enter all four digits, e.g. 2002, or a range of years, e.g. 1995-2002, before 1980, after 1990, <2001, >=1999\n"
                                 "\n"
                                 "Search by ISBN: enter between 5-13 characters, if it is less or more than that, search is not performed\n"
                                 "\n"
@@ -46,6 +58,10 @@ class BookSearchWindow(Toplevel):
         self.search_bar.pack(side=LEFT, padx=(20,10), pady=5)
         self.search_button = ttk.Button(self.search_bar_frame, text="Search", command=self.search_button_pressed) # SEARCH BUTTON
         self.search_button.pack(side=LEFT, padx=(10, 20), pady=20)
+        self.progress_bar = ttk.Progressbar(self.search_bar_frame, orient="horizontal", length=200, mode="indeterminate")
+        self.progress_bar.pack(side=LEFT, padx=10, pady=20)
+        self.progress_bar_label = ttk.Label(self.search_bar_frame, text="", width=20) # elapsed time of the search
+        self.progress_bar_label.pack(side=LEFT, padx=10, pady=20)
 
         # RADIO FRAME WITH TWO RADIO BUTTONS 
         self.radio_frame=ttk.Frame(self.book_search_frame) 
@@ -62,6 +78,17 @@ class BookSearchWindow(Toplevel):
         self.radio_in.pack(side=LEFT, padx=5, pady=10)
         self.radio_levenshtein.pack(side=LEFT, padx=5, pady=10)
 
+        # DATASET FRAME WITH DATASET SELECTION
+        self.dataset_frame=ttk.Frame(self.book_search_frame)
+        self.dataset_frame.pack(side=TOP, fill=X)
+        self.dataset_label = ttk.Label(self.dataset_frame, text="Search in dataset: ")
+        self.dataset_label.pack(side=LEFT, padx=20, pady=10)
+
+        self.dataset_name = StringVar(value=self.engine.catalog.name) # variable that holds the selected catalog
+        self.dataset_combobox = ttk.Combobox(self.dataset_frame, textvariable=self.dataset_name, values=catalog.registry.available_names(), state="readonly")
+        self.dataset_combobox.bind("<<ComboboxSelected>>", self.dataset_selected)
+        self.dataset_combobox.pack(side=LEFT, padx=5, pady=10)
+
         ###########################################################################
         #                            RESULTS FRAME                                #
         ###########################################################################
@@ -95,71 +122,115 @@ class BookSearchWindow(Toplevel):
         self.canvas.itemconfig("inner_frame", width=event.width)
     
     """
-    Retrieve string from search bar, remove unwanted characters and
-    white space, split it into separate words and return it in a list
-    """
-    def get_search_terms(self) -> list[str]:
-        raw_string=self.search_bar.get()
-        cleaned_strings=new_search_util.prepare_string(raw_string)
-        return cleaned_strings
-    
+    Switch to the catalog selected in the dataset combobox. The catalog is
+    loaded with the next search if it has not been loaded yet.
     """
-    Perform search and present results
+    def dataset_selected(self, e: Event) -> None:
+        self.engine=SearchEngine(catalog.registry.get(self.dataset_name.get()))
 
-    Get the prepared search terms. Call the function that determines which
-    search to perform. Call the function that perfomrs the search based on
-    search type and returns the results. Call the presenter's function to 
-    make the results appear on the screen. Update GUI.
+    """
+    Start a search and present its results when it is done
+
+    The search engine splits the text in the search bar into the search
+    type, search terms and field (see SearchEngine.parse). The search itself
+    runs on the search thread of the window (see SearchEngine.find), so the
+    window keeps responding during slow searches.
+    A search started while an older one is still running supersedes it: the
+    older search is cancelled and its results are never shown. The progress
+    bar runs and the elapsed time is shown until the results are on the
+    screen (see check_search).
     """
     def search_button_pressed(self) -> None:
-        terms=self.get_search_terms() 
-        search_type=new_search_util.select_search_type(terms)
-        self.get_results(search_type, terms)
+        search_type, terms, field=self.engine.parse(self.search_bar.get())
+        if search_type == SearchType.UNDETERMINED:
+            messagebox.showerror("Input Error", "Please enter a valid search term", parent=self)
+            return
+        self.cancel_search()
+        self.search_token=CancellationToken()
+        self.search_future=self.search_executor.submit(self.engine.find, search_type, terms, field, self.word_search_method.get(), self.search_token)
+        self.progress_bar.start(10)
+        self.check_search(self.search_generation, perf_counter())
+
+    """
+    Cancel the latest search if it is still running (or waiting to run), so
+    that its results are not shown
+    """
+    def cancel_search(self) -> None:
+        if self.search_token is not None:
+            self.search_token.cancel()
+        if self.search_future is not None:
+            self.search_future.cancel()
+        self.search_generation += 1
+
+    """
+    Show the elapsed time while a search runs and its results once it is
+    done
+
+    The self.after function creates a loop that checks the search every 100
+    milliseconds on the main loop, the only thread that changes the window.
+    The loop of a search that was superseded by a newer one stops, the newer
+    search has its own loop.
+    """
+    def check_search(self, generation: int, start_time: float) -> None:
+        if generation != self.search_generation:
+            return
+        if not self.search_future.done():
+            self.progress_bar_label.config(text=f"Searching... {perf_counter() - start_time:.1f}s")
+            self.after(100, self.check_search, generation, start_time)
+            return
+        self.progress_bar.stop()
+        self.progress_bar_label.config(text=f"Searched in {perf_counter() - start_time:.2f}s")
+        found=self.search_future.result() # raises the error of a failed search here, on the main loop
+        if found is not None:
+            self.show_results(*found)
+
+    """
+    Make the presenter hold the results of a finished search and put them
+    on the screen
+
+    The presenter only holds the current search. If another catalog was
+    searched or the catalog was changed, the presenter takes the books of
+    that catalog.
+    """
+    def show_results(self, catalog: Catalog, catalog_version: tuple[str, int], search_info_key: tuple, search_info: dict) -> None:
+        if catalog_version != self.catalog_version:
+            self.presenter.books=catalog.books
+            self.catalog_version=catalog_version
+        self.search_info_key=search_info_key
+        self.presenter.search_info={search_info_key: search_info}
 
         for child in self.inner_frame.winfo_children():
-            if isinstance(child, Text):
+            if isinstance(child, (Text, ttk.Button)):
                 child.destroy()
 
         self.presenter.results_to_screen(self.inner_frame, self.search_info_key)
+        self.add_more_results_button()
+        self.update()
+
+    """
+    Add a button below the results to show the next page of results, if the
+    search has more results than are shown
+    """
+    def add_more_results_button(self) -> None:
+        if self.presenter.has_next_page(self.search_info_key):
+            more_results_button=ttk.Button(self.inner_frame, text="More results", command=self.more_results_button_pressed)
+            more_results_button.pack(pady=(10, 20))
+
+    """
+    Show the next page of results below the ones already shown
+    """
+    def more_results_button_pressed(self) -> None:
+        for child in self.inner_frame.winfo_children():
+            if isinstance(child, ttk.Button):
+                child.destroy()
+        self.presenter.next_page_to_screen(self.inner_frame, self.search_info_key)
+        self.add_more_results_button()
         self.update()
     
     """
-    Perform search based on search type or if search type undetermined, present
-    an error message to the user
-
-    Examine serch type, initialise presenter and call appropriate function to perform
-    search that matches the search type. Search results are held by presenter object
-    and added within the specific search function called. 
-    """
-
-    def get_results(self, search_type: SearchType, terms: list[str]) -> None:
-        if search_type != SearchType.UNDETERMINED:
-            match search_type:
-                case SearchType.YEAR:
-                    self.search_info_key=(tuple(terms), SearchType.YEAR)
-                    self.presenter.search_info.setdefault(self.search_info_key, dict())
-                    if self.presenter.search_info.get(self.search_info_key).get(SearchInfo.RESULTS) is None:
-                        new_search_util.year_search(book_data.year_index, terms[0], self.presenter, self.search_info_key)
-                case SearchType.ISBN:
-                    self.search_info_key=(tuple(terms), SearchType.ISBN)
-                    self.presenter.search_info.setdefault(self.search_info_key, dict())
-                    if self.presenter.search_info.get(self.search_info_key).get(SearchInfo.RESULTS) is None:
-                        new_search_util.isbn_search(self.presenter, self.search_info_key, terms[0])
-                case SearchType.WORD:
-                    method=self.word_search_method.get()
-                    search_source=list(book_data.title_author_publisher_index.keys())
-                    search_source.sort(key=len) 
-                    match method:
-                        case SearchType.LEVENSHTEIN:
-                            self.search_info_key=(tuple(terms), SearchType.LEVENSHTEIN)
-                            self.presenter.search_info.setdefault(self.search_info_key, dict())           
-                            if self.presenter.search_info.get(self.search_info_key).get(SearchInfo.RESULTS) is None:
-                                new_search_util.search_all_with_levenshtein_distance(book_data.title_author_publisher_index, search_source, self.presenter, self.search_info_key)
-                        case SearchType.IN:
-                            self.search_info_key=(tuple(terms), SearchType.IN)
-                            self.presenter.search_info.setdefault(self.search_info_key, dict())
-                            if self.presenter.search_info.get(self.search_info_key).get(SearchInfo.RESULTS) is None:
-                                new_search_util.search_all_with_in_operator(book_data.title_author_publisher_index, search_source, self.presenter, self.search_info_key)
-        else:
-            messagebox.showerror("Input Error", "Please enter a valid search term", parent=self)
-        
+    Cancel the search and stop the search thread when the window is closed
+    """
+    def destroy(self) -> None:
+        self.cancel_search()
+        self.search_executor.shutdown(wait=False, cancel_futures=True)
+        super().destroy()
@@ -0,0 +1,145 @@
+from __future__ import annotations
+import gc
+import hashlib
+import mmap
+import os
+import pickle
+import struct
+import tempfile
+from compact_index import CompactIndex
+from isbn_index import IsbnIndex
+
+"""
+Binary snapshot of the book store and its search indexes
+
+A snapshot file consists of a fixed size header followed by the pickled
+payload. The header holds a magic string, the format version and the
+fingerprint of the csv file the snapshot was created from (its size,
+modification time and SHA-256 hash). The payload holds the books
+dictionary, the title/author/publisher index (a dictionary of sets, or a
+CompactIndex for compact catalogs), the year index and the ISBN index.
+
+    | magic (8 bytes) | version | source size | source mtime | source hash | payload length | payload |
+
+The snapshot is written next to the csv file (e.g. 1000books.csv.snapshot)
+the first time a catalog is loaded and read back with mmap on the next
+start, so the csv file does not need to be parsed and the indexes do not
+need to be rebuilt. A snapshot is only used if its version matches
+SNAPSHOT_VERSION and the csv file has not changed since the snapshot was
+written, otherwise it is treated as missing.
+"""
+
+SNAPSHOT_MAGIC=b"BOOKSNAP"
+SNAPSHOT_VERSION=5 # 2: years are indexed as a whole, not split into words; 3: all-digit ISBNs are kept as text; 4: compact indexes are stored as they are; 5: the ISBN index is stored
+SNAPSHOT_SUFFIX=".snapshot"
+HEADER_FORMAT="<8sHQq32sQ" # magic, version, source size, source mtime (ns), source hash, payload length
+HEADER_SIZE=struct.calcsize(HEADER_FORMAT)
+SOURCE_MTIME_OFFSET=struct.calcsize("<8sHQ") # the source mtime follows the magic, version and source size
+
+"""
+Return the path of the snapshot belonging to a csv file
+"""
+def snapshot_path(source_path: str) -> str:
+    return source_path + SNAPSHOT_SUFFIX
+
+"""
+Calculate the SHA-256 hash of a file, reading it in blocks
+"""
+def file_hash(path: str) -> bytes:
+    digest=hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            digest.update(block)
+    return digest.digest()
+
+"""
+Write the books and indexes created from a csv file to a snapshot file
+
+The snapshot is first written to a temporary file with a unique name
+which then replaces the previous snapshot, so a reader never sees a half
+written file and two processes writing the same snapshot do not write to
+the same temporary file. Returns the path of the snapshot.
+"""
+def write_snapshot(source_path: str, books: dict[str, dict[str, str]], title_author_publisher_index: dict[str, set[str]]|CompactIndex, year_index: dict[str, set[str]], isbn_index: IsbnIndex) -> str:
+    stat=os.stat(source_path)
+    payload=pickle.dumps((books, title_author_publisher_index, year_index, isbn_index), protocol=pickle.HIGHEST_PROTOCOL)
+    header=struct.pack(HEADER_FORMAT, SNAPSHOT_MAGIC, SNAPSHOT_VERSION, stat.st_size, stat.st_mtime_ns, file_hash(source_path), len(payload))
+    path=snapshot_path(source_path)
+    descriptor, temp_path=tempfile.mkstemp(suffix=".tmp", prefix=os.path.basename(path) + ".", dir=os.path.dirname(path) or ".")
+    try:
+        with os.fdopen(descriptor, "wb") as file:
+            file.write(header)
+            file.write(payload)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+    return path
+
+"""
+Write a new modification time of the csv file into the header of its
+snapshot, leaving the rest of the snapshot unchanged
+"""
+def update_source_mtime(source_path: str, source_mtime: int) -> None:
+    with open(snapshot_path(source_path), "r+b") as file:
+        file.seek(SOURCE_MTIME_OFFSET)
+        file.write(struct.pack("<q", source_mtime))
+
+"""
+Determine whether the snapshot header still describes the csv file
+
+If the size and modification time of the csv file are unchanged the
+snapshot is fresh. If only the modification time changed (e.g. the file
+was copied or touched), the hash of the file decides, and if the hash
+still matches, the new modification time is written into the header so
+the next start does not hash the file again.
+"""
+def is_fresh(source_path: str, source_size: int, source_mtime: int, source_hash: bytes) -> bool:
+    try:
+        stat=os.stat(source_path)
+    except OSError:
+        return False
+    if stat.st_size != source_size:
+        return False
+    if stat.st_mtime_ns == source_mtime:
+        return True
+    if file_hash(source_path) != source_hash:
+        return False
+    try:
+        update_source_mtime(source_path, stat.st_mtime_ns)
+    except OSError: # e.g. a read-only directory, the hash is checked again next time
+        pass
+    return True
+
+"""
+Load the books and indexes from the snapshot of a csv file
+
+The snapshot file is memory-mapped and the payload is unpickled directly
+from the mapped memory. The garbage collector is paused while unpickling:
+the payload creates hundreds of thousands of containers, which would
+otherwise trigger repeated collections that cost more than the
+unpickling itself. Returns a (books, title_author_publisher_index,
+year_index, isbn_index) tuple, or None if there is no snapshot, it was
+written with a different format version, it is damaged or it is stale.
+"""
+def load_snapshot(source_path: str) -> tuple[dict[str, dict[str, str]], dict[str, set[str]]|CompactIndex, dict[str, set[str]], IsbnIndex] | None:
+    path=snapshot_path(source_path)
+    try:
+        with open(path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            if len(mapped) < HEADER_SIZE:
+                return None
+            magic, version, source_size, source_mtime, source_hash, payload_length=struct.unpack_from(HEADER_FORMAT, mapped)
+            if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION or len(mapped) != HEADER_SIZE + payload_length:
+                return None
+            if not is_fresh(source_path, source_size, source_mtime, source_hash):
+                return None
+            gc_enabled=gc.isenabled()
+            gc.disable()
+            try:
+                with memoryview(mapped) as view:
+                    return pickle.loads(view[HEADER_SIZE:])
+            finally:
+                if gc_enabled:
+                    gc.enable()
+    except (OSError, ValueError, pickle.UnpicklingError):
+        return None
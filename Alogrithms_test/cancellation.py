@@ -0,0 +1,30 @@
+from __future__ import annotations
+import threading
+
+"""
+Flag that tells a task running in the background that its result is no
+longer wanted
+
+The window that started the task keeps the token and cancels it when a
+newer task supersedes the task (e.g. a new search is started before the
+previous one finished). The task checks the token between its steps and
+stops early once it is cancelled; a step that has started is not
+interrupted.
+"""
+class CancellationToken():
+    def __init__(self):
+        self.__cancelled=threading.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        return self.__cancelled.is_set()
+
+    def cancel(self) -> None:
+        self.__cancelled.set()
+
+"""
+Return whether a task that was given the token (or None if it cannot be
+cancelled) should stop
+"""
+def is_cancelled(token: CancellationToken|None) -> bool:
+    return token is not None and token.cancelled
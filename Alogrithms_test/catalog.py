@@ -0,0 +1,637 @@
+from __future__ import annotations
+import contextlib
+import os
+import threading
+from typing import Callable, Iterable
+from bisect import bisect_left, insort
+import book_data
+import query_cache
+from bk_tree import BKTree
+from compact_index import CompactIndex
+from symspell import DeletionIndex
+from suffix_array import SuffixArray
+from trigram_index import TrigramIndex
+from vocabulary import Vocabulary
+from parallel_search import ParallelLevenshtein
+from year_range import SortedYearIndex
+from isbn_index import IsbnIndex
+from constants import *
+
+LookupIndex=BKTree|DeletionIndex|TrigramIndex|SuffixArray # word lookup structures built from a word index
+
+"""
+A class to hold one book catalog (dataset) and the indexes built from it
+"""
+class Catalog():
+    """
+    A catalog is created for a csv file but the file is only read when the
+    books or one of the indexes are first accessed, so registering a catalog
+    costs nothing until it is used. Loading goes through
+    book_data.load_books_and_indexes, so a fresh snapshot is used when
+    there is one. Large catalogs can be given a chunk size, in which case
+    their csv file is streamed in chunks of that many rows, and can be
+    made compact, in which case their title/author/publisher index is kept
+    as a CompactIndex (integer docids in arrays) instead of a dictionary of
+    sets. The compact index is built directly from the books and stored in
+    the snapshot, so the dictionary of sets is never created while loading.
+    A compact index is read-only: the first edit of the catalog turns it
+    back into a dictionary.
+
+    The version of a catalog starts at 0 and increases every time the
+    catalog is (re)loaded, unloaded or edited. Anything derived from the
+    catalog (e.g. search results held by a presenter) can compare the
+    version it was created with against the current version to find out
+    whether it is stale. The searches of older versions are dropped from
+    the query cache when the version increases.
+
+    Reloading (hot-swapping) builds the new books and indexes first and
+    replaces the old ones in a single step, so a search running at the
+    same time either sees the old or the new catalog, never a mix of both.
+
+    Single books can be inserted, updated and deleted without rebuilding
+    the catalog. Only the words and year that differ between the old and
+    the new version of the book are touched in the indexes, and only the
+    words that appear in or disappear from the index are inserted into or
+    removed from the length-sorted list of words (search_source). The
+    sorted list of ISBNs is kept up to date the same way. Edits only change
+    the catalog in memory; the csv file and its snapshot are not modified.
+
+    Edits are copy-on-write: the books, the indexes and the lists of words
+    are copied, the copies are changed (with new sets of ISBNs for the
+    changed words) and replace the old ones. A search running in the
+    background keeps the objects it started with, and they never change
+    under it. The lookup indexes (see below) are too large to copy for
+    every edit; edits change them in place while holding the lookup lock,
+    which the matchers returned by the catalog hold while they search.
+
+    Besides the combined title/author/publisher index, the catalog has one
+    index per field (field_index) for searches that are restricted to the
+    title, the author or the publisher. A field index and its length-sorted
+    list of words are built the first time a search uses that field and
+    are kept up to date by edits like the combined index.
+
+    Levenshtein distance searches can use a BK-tree, a deletion index
+    (SymSpell) or a trigram index of the words of the combined index or of
+    a field index instead of comparing the search term with every word of a
+    similar length, and "in" searches use a suffix array or the trigram
+    index to find the words that contain the search term. These lookup
+    indexes are built the
+    first time a search uses them and edits add the new words to them and
+    remove the words that disappear from the index.
+
+    The length-sorted words of an index are also kept as a vocabulary of
+    length buckets, so a search can take the words of a range of lengths
+    without a binary search over the words or a copy of them.
+    """
+    def __init__(self, name: str, path: str, chunk_size: int|None=None, compact: bool=False):
+        self.__name=name
+        self.__path=path
+        self.__chunk_size=chunk_size
+        self.__compact=compact
+        self.__books=None
+        self.__title_author_publisher_index=None
+        self.__year_index=None
+        self.__search_source=None
+        self.__isbns=None
+        self.__sorted_year_index=None
+        self.__isbn_index=None
+        self.__field_indexes={} # field -> index of the words of that field
+        self.__field_search_sources={} # field -> length-sorted words of the field index
+        self.__lookup_indexes={} # (engine, field or None for the combined index) -> lookup index of the words
+        self.__failed_lookup_indexes={} # (engine, field) -> version of the catalog the lookup index did not fit in memory for
+        self.__vocabularies={} # field or None for the combined index -> length buckets of the search source
+        self.__parallel_searches={} # field or None for the combined index -> worker processes holding its vocabulary
+        self.__version=0
+        self.__lock=threading.RLock()
+        self.__lookup_lock=threading.Lock() # held while a lookup index is searched or edited
+
+    @property
+    def name(self) -> str:
+        return self.__name
+
+    @property
+    def path(self) -> str:
+        return self.__path
+
+    @property
+    def version(self) -> int:
+        return self.__version
+
+    @property
+    def is_loaded(self) -> bool:
+        return self.__books is not None
+
+    @property
+    def books(self) -> dict[str, dict[str, str]]:
+        self.ensure_loaded()
+        return self.__books
+
+    @property
+    def title_author_publisher_index(self) -> dict[str, set[str]]|CompactIndex:
+        self.ensure_loaded()
+        return self.__title_author_publisher_index
+
+    @property
+    def year_index(self) -> dict[str, set[str]]:
+        self.ensure_loaded()
+        return self.__year_index
+
+    """
+    The words of the title/author/publisher index sorted by length (and
+    alphabetically within the same length), built on first use
+    """
+    @property
+    def search_source(self) -> list[str]:
+        if self.__search_source is None:
+            with self.__lock:
+                if self.__search_source is None:
+                    self.__search_source=sorted(self.title_author_publisher_index.keys(), key=word_sort_key)
+        return self.__search_source
+
+    """
+    The ISBNs of the catalog in ascending order, built on first use
+    """
+    @property
+    def isbns(self) -> list[str]:
+        if self.__isbns is None:
+            with self.__lock:
+                if self.__isbns is None:
+                    self.__isbns=sorted(self.books.keys())
+        return self.__isbns
+
+    """
+    The ISBN index (exact ISBN-10/13 and partial ISBN lookups) of the
+    catalog, loaded with the books
+    """
+    @property
+    def isbn_index(self) -> IsbnIndex:
+        self.ensure_loaded()
+        return self.__isbn_index
+
+    """
+    Return the index of the words of one field (BookField.TITLE, AUTHOR or
+    PUBLISHER), built on first use
+    """
+    def field_index(self, field: str) -> dict[str, set[str]]:
+        if field not in BookField.WORD_FIELDS:
+            raise ValueError(f"{field} is not a field that is split into words")
+        field_index=self.__field_indexes.get(field)
+        if field_index is None:
+            with self.__lock:
+                field_index=self.__field_indexes.get(field)
+                if field_index is None:
+                    field_index=self.__field_indexes[field]=book_data.create_field_index(self.books, field)
+        return field_index
+
+    """
+    Return the words of one field index sorted by length (and alphabetically
+    within the same length), built on first use
+    """
+    def field_search_source(self, field: str) -> list[str]:
+        field_search_source=self.__field_search_sources.get(field)
+        if field_search_source is None:
+            field_index=self.field_index(field)
+            with self.__lock:
+                field_search_source=self.__field_search_sources.get(field)
+                if field_search_source is None:
+                    field_search_source=self.__field_search_sources[field]=sorted(field_index.keys(), key=word_sort_key)
+        return field_search_source
+
+    """
+    Return the word index to search: the index of the given field, or the
+    combined title/author/publisher index if no field is given
+    """
+    def word_index(self, field: str|None=None) -> dict[str, set[str]]|CompactIndex:
+        return self.title_author_publisher_index if field is None else self.field_index(field)
+
+    """
+    Return the length-sorted words of the word index to search: those of
+    the given field, or those of the combined index if no field is given
+    """
+    def word_search_source(self, field: str|None=None) -> list[str]:
+        return self.search_source if field is None else self.field_search_source(field)
+
+    """
+    Return the length buckets (see vocabulary.Vocabulary) of the words of
+    the word index to search, made once per version of the catalog
+    """
+    def vocabulary(self, field: str|None=None) -> Vocabulary:
+        vocabulary=self.__vocabularies.get(field)
+        if vocabulary is None:
+            search_source=self.word_search_source(field)
+            with self.__lock:
+                vocabulary=self.__vocabularies.get(field)
+                if vocabulary is None:
+                    vocabulary=self.__vocabularies[field]=Vocabulary(search_source)
+        return vocabulary
+
+    """
+    Return the parallel Levenshtein search (see
+    parallel_search.ParallelLevenshtein) of the vocabulary of the given
+    field, or of the combined index, started on first use and again after
+    the words change. Returns None if the vocabulary is too small for the
+    worker processes to pay off or the computer has only one core.
+    """
+    def parallel_levenshtein(self, field: str|None=None) -> ParallelLevenshtein|None:
+        vocabulary=self.vocabulary(field)
+        if len(vocabulary) < Parallel.MIN_VOCABULARY_SIZE or (os.cpu_count() or 1) < 2:
+            return None
+        with self.__lock:
+            parallel_search=self.__parallel_searches.get(field)
+            if parallel_search is None or parallel_search.vocabulary is not vocabulary:
+                if parallel_search is not None:
+                    parallel_search.close()
+                parallel_search=self.__parallel_searches[field]=ParallelLevenshtein(vocabulary)
+        return parallel_search
+
+    """
+    Return the BK-tree of the words of the given field index, or of the
+    combined index if no field is given, built on first use
+    """
+    def bk_tree(self, field: str|None=None) -> BKTree:
+        return self.__lookup_index(LevenshteinEngine.BK_TREE, field, lambda: BKTree(self.word_search_source(field)))
+
+    """
+    Return the deletion index of the words of the given field index, or of
+    the combined index if no field is given, built on first use. Raises
+    MemoryError if the index would hold more than SymSpell.MAX_ENTRIES
+    deletions.
+    """
+    def deletion_index(self, field: str|None=None) -> DeletionIndex:
+        return self.__lookup_index(LevenshteinEngine.SYMSPELL, field, lambda: book_data.create_deletion_index(self.word_index(field)))
+
+    """
+    Return the trigram index of the words of the given field index, or of
+    the combined index if no field is given, built on first use
+    """
+    def trigram_index(self, field: str|None=None) -> TrigramIndex:
+        return self.__lookup_index(LevenshteinEngine.TRIGRAM, field, lambda: TrigramIndex(self.word_index(field).keys()))
+
+    """
+    Return the suffix array of the words of the given field index, or of
+    the combined index if no field is given, built on first use
+    """
+    def suffix_array(self, field: str|None=None) -> SuffixArray:
+        return self.__lookup_index(SubstringEngine.SUFFIX_ARRAY, field, lambda: SuffixArray(self.word_index(field).keys()))
+
+    """
+    Return the substring matcher of the given engine for "in" searches in
+    the given field (or the combined index), see
+    new_search_util.search_single_match. Returns None for the scan, which
+    looks through the word search source instead.
+    """
+    def substring_matcher(self, field: str|None=None, engine: str=SubstringEngine.DEFAULT) -> Callable[[str], list[str]]|None:
+        match engine:
+            case SubstringEngine.SUFFIX_ARRAY:
+                return self.__locked(self.suffix_array(field).substring_matches)
+            case SubstringEngine.TRIGRAM:
+                return self.__locked(self.trigram_index(field).substring_matches)
+            case _:
+                return None
+
+    """
+    Return a function that calls the search method of a lookup index while
+    holding the lookup lock, so that an edit does not change the index
+    during the search
+    """
+    def __locked(self, search: Callable) -> Callable:
+        def locked_search(*args):
+            with self.__lookup_lock:
+                return search(*args)
+        return locked_search
+
+    """
+    Return a lookup index, built on first use. A build that raised
+    MemoryError is not tried again for the same version of the catalog:
+    the MemoryError is raised again straight away.
+    """
+    def __lookup_index(self, engine: str, field: str|None, build: Callable[[], LookupIndex]) -> LookupIndex:
+        lookup_index=self.__lookup_indexes.get((engine, field))
+        if lookup_index is None:
+            with self.__lock:
+                lookup_index=self.__lookup_indexes.get((engine, field))
+                if lookup_index is None:
+                    if self.__failed_lookup_indexes.get((engine, field)) == self.__version:
+                        raise MemoryError(f"The {engine} index of {self.__name} does not fit in its memory limit")
+                    try:
+                        lookup_index=self.__lookup_indexes[(engine, field)]=build()
+                    except MemoryError:
+                        self.__failed_lookup_indexes[(engine, field)]=self.__version
+                        raise
+        return lookup_index
+
+    """
+    Return the word matcher of the given Levenshtein engine for searches in
+    the given field (or the combined index), see
+    new_search_util.search_with_word_matcher. Returns None for the linear
+    engine, which scans the word search source instead, and when the
+    deletion index does not fit in its memory limit.
+    """
+    def levenshtein_matcher(self, field: str|None=None, engine: str=LevenshteinEngine.DEFAULT) -> Callable[[str, int], dict[int, list[str]]]|None:
+        match engine:
+            case LevenshteinEngine.BK_TREE:
+                return self.__locked(self.bk_tree(field).search)
+            case LevenshteinEngine.SYMSPELL:
+                try:
+                    return self.__locked(self.deletion_index(field).search)
+                except MemoryError:
+                    return None
+            case LevenshteinEngine.TRIGRAM:
+                return self.__locked(self.trigram_index(field).search)
+            case _:
+                return None
+
+    """
+    The year index with numeric, sorted years for range searches, built on
+    first use and again after the years of the catalog change
+    """
+    @property
+    def sorted_year_index(self) -> SortedYearIndex:
+        if self.__sorted_year_index is None:
+            with self.__lock:
+                if self.__sorted_year_index is None:
+                    self.__sorted_year_index=SortedYearIndex(self.year_index)
+        return self.__sorted_year_index
+
+    """
+    Load the catalog if it has not been loaded yet
+    """
+    def ensure_loaded(self) -> None:
+        if self.__books is None:
+            with self.__lock:
+                if self.__books is None:
+                    self.load()
+
+    """
+    Load the books and indexes from the catalog's csv file (or its snapshot)
+    and replace the current ones
+
+    If a path is given, the catalog is switched to that csv file.
+    """
+    def load(self, path: str|None=None) -> None:
+        with self.__lock:
+            path=path if path is not None else self.__path
+            books, title_author_publisher_index, year_index, isbn_index=book_data.load_books_and_indexes(path, chunk_size=self.__chunk_size, compact=self.__compact)
+            self.__books, self.__title_author_publisher_index, self.__year_index, self.__isbn_index, self.__path=books, title_author_publisher_index, year_index, isbn_index, path
+            self.__search_source=None
+            self.__isbns=None
+            self.__sorted_year_index=None
+            self.__field_indexes={}
+            self.__field_search_sources={}
+            self.__lookup_indexes={}
+            self.__failed_lookup_indexes={}
+            self.__reset_vocabularies()
+            self.__bump_version()
+
+    """
+    Release the books and indexes of the catalog. They are loaded again
+    the next time they are accessed.
+    """
+    def unload(self) -> None:
+        with self.__lock:
+            self.__books=None
+            self.__title_author_publisher_index=None
+            self.__year_index=None
+            self.__search_source=None
+            self.__isbns=None
+            self.__sorted_year_index=None
+            self.__isbn_index=None
+            self.__field_indexes={}
+            self.__field_search_sources={}
+            self.__lookup_indexes={}
+            self.__failed_lookup_indexes={}
+            self.__reset_vocabularies()
+            self.__bump_version()
+
+    """
+    Add a new book to the catalog. Raises ValueError if a book with the
+    same ISBN is already in the catalog.
+    """
+    def insert_book(self, isbn: str, book: dict[str, str]) -> None:
+        with self.__lock:
+            if isbn in self.books:
+                raise ValueError(f"A book with ISBN {isbn} is already in the catalog")
+            self.__apply_change(isbn, None, {field: book[field] for field in BookField.DETAILS})
+
+    """
+    Change the details of a book in the catalog. Only the given fields are
+    changed, e.g. update_book(isbn, {"Year": "2004"}). Raises KeyError if
+    there is no book with the ISBN.
+    """
+    def update_book(self, isbn: str, changes: dict[str, str]) -> None:
+        with self.__lock:
+            old_book=self.books[isbn]
+            new_book={field: changes.get(field, old_book[field]) for field in BookField.DETAILS}
+            self.__apply_change(isbn, old_book, new_book)
+
+    """
+    Remove a book from the catalog. Raises KeyError if there is no book
+    with the ISBN.
+    """
+    def delete_book(self, isbn: str) -> None:
+        with self.__lock:
+            self.__apply_change(isbn, self.books[isbn], None)
+
+    """
+    Update the books, the indexes, the search source and the ISBN list for
+    one book going from old_book to new_book (None means the book does not
+    exist before or after the change)
+
+    The books, indexes and lists are replaced by changed copies (see
+    update_word_index), so the ones a running search holds do not change.
+    """
+    def __apply_change(self, isbn: str, old_book: dict[str, str]|None, new_book: dict[str, str]|None) -> None:
+        title_author_publisher_index=self.__title_author_publisher_index
+        if isinstance(title_author_publisher_index, CompactIndex):
+            title_author_publisher_index=title_author_publisher_index.to_dict()
+        old_words=book_data.book_words(old_book) if old_book is not None else set()
+        new_words=book_data.book_words(new_book) if new_book is not None else set()
+        self.__title_author_publisher_index, self.__search_source=update_word_index(title_author_publisher_index, self.__search_source, isbn, old_words, new_words, self.__field_lookup_indexes(None), self.__lookup_lock)
+        for field, field_index in list(self.__field_indexes.items()):
+            old_words=book_data.book_field_words(old_book, field) if old_book is not None else set()
+            new_words=book_data.book_field_words(new_book, field) if new_book is not None else set()
+            field_index, field_search_source=update_word_index(field_index, self.__field_search_sources.get(field), isbn, old_words, new_words, self.__field_lookup_indexes(field), self.__lookup_lock)
+            self.__field_indexes[field]=field_index
+            if field_search_source is not None:
+                self.__field_search_sources[field]=field_search_source
+
+        old_year={old_book["Year"]} if old_book is not None else set()
+        new_year={new_book["Year"]} if new_book is not None else set()
+        self.__year_index=copy_with_postings(self.__year_index, isbn, old_year, new_year)[0]
+        if old_year != new_year:
+            self.__sorted_year_index=None
+
+        books=dict(self.__books)
+        isbns=list(self.__isbns) if self.__isbns is not None and (old_book is None or new_book is None) else self.__isbns
+        if new_book is None:
+            del books[isbn]
+            if isbns is not None:
+                del isbns[bisect_left(isbns, isbn)]
+            self.__isbn_index.remove(isbn)
+        else:
+            if old_book is None and isbns is not None:
+                insort(isbns, isbn)
+            if old_book is None:
+                self.__isbn_index.add(isbn)
+            books[isbn]=new_book
+        self.__books, self.__isbns=books, isbns
+        self.__reset_vocabularies() # the offsets of the length buckets may have moved
+        self.__failed_lookup_indexes={} # the words changed, so the lookup indexes may fit now
+        self.__bump_version()
+
+    """
+    Increase the version of the catalog and drop the cached searches of
+    the older versions, which are never returned again
+    """
+    def __bump_version(self) -> None:
+        self.__version += 1
+        query_cache.cache.invalidate(self.__name, self.__version)
+
+    """
+    Drop the vocabularies and stop the worker processes of the parallel
+    searches, which hold the words of the old version
+    """
+    def __reset_vocabularies(self) -> None:
+        for parallel_search in self.__parallel_searches.values():
+            parallel_search.close()
+        self.__parallel_searches={}
+        self.__vocabularies={}
+
+    """
+    Return the lookup indexes that have been built for a field (None for the
+    combined index)
+    """
+    def __field_lookup_indexes(self, field: str|None) -> list[LookupIndex]:
+        return [lookup_index for (_, index_field), lookup_index in self.__lookup_indexes.items() if index_field == field]
+
+
+"""
+Sort key of the search source: words are ordered by length first, which
+the length based binary searches rely on, and alphabetically second, so
+that the position of a word can be found with bisect
+"""
+def word_sort_key(word: str) -> tuple[int, str]:
+    return len(word), word
+
+
+"""
+Return a copy of an index with an ISBN removed from the words it no longer
+has and added to the words it has gained, and the words that disappeared
+from and appeared in the index
+
+The index and its sets of ISBNs are not changed: the copy has new sets for
+the changed words and shares the sets of the other words. The index itself
+is returned if no word changed.
+"""
+def copy_with_postings(search_index: dict[str, set[str]], isbn: str, old_words: set[str], new_words: set[str]) -> tuple[dict[str, set[str]], list[str], list[str]]:
+    removed_words=old_words - new_words
+    added_words=new_words - old_words
+    if not removed_words and not added_words:
+        return search_index, [], []
+    search_index=dict(search_index)
+    for word in removed_words | added_words:
+        isbns=search_index.get(word)
+        if isbns is not None:
+            search_index[word]=set(isbns)
+    return search_index, book_data.remove_postings(search_index, isbn, removed_words), book_data.add_postings(search_index, isbn, added_words)
+
+"""
+Apply the change of one book's words to a word index, its length-sorted
+list of words and its lookup indexes (if they have been built)
+
+The ISBN is removed from the words the book no longer has and added to
+the words it has gained. Words that disappear from or appear in the index
+are removed from or inserted into the list of words at their sorted
+position, and removed from or added to the lookup indexes while the
+lookup lock is held.
+The index and the list of words are not changed; the changed copies are
+returned (see copy_with_postings), the list of words only if the words of
+the index changed and None if there is no list.
+"""
+def update_word_index(search_index: dict[str, set[str]], search_source: list[str]|None, isbn: str, old_words: set[str], new_words: set[str], lookup_indexes: Iterable[LookupIndex]=(), lookup_lock: threading.Lock|None=None) -> tuple[dict[str, set[str]], list[str]|None]:
+    search_index, removed_words, added_words=copy_with_postings(search_index, isbn, old_words, new_words)
+    if not removed_words and not added_words:
+        return search_index, search_source
+    if search_source is not None:
+        search_source=list(search_source)
+        for word in removed_words:
+            del search_source[bisect_left(search_source, word_sort_key(word), key=word_sort_key)]
+        for word in added_words:
+            insort(search_source, word, key=word_sort_key)
+    with lookup_lock if lookup_lock is not None else contextlib.nullcontext():
+        for lookup_index in lookup_indexes:
+            for word in removed_words:
+                lookup_index.remove(word)
+            for word in added_words:
+                lookup_index.add(word)
+    return search_index, search_source
+
+"""
+A class to keep track of the catalogs that can be searched
+"""
+class CatalogRegistry():
+    """
+    Catalogs are registered by name together with the path of their csv
+    file. Any number of catalogs can be loaded (resident) at the same time;
+    each one is loaded the first time it is used. A catalog can be swapped
+    for a different csv file while the program is running, and every window
+    that holds the catalog sees the new data with its next search.
+    """
+    def __init__(self):
+        self.__catalogs: dict[str, Catalog]={}
+        self.__lock=threading.Lock()
+
+    """
+    Add a catalog to the registry or return the catalog already registered
+    under that name
+    """
+    def register(self, name: str, path: str, chunk_size: int|None=None, compact: bool=False) -> Catalog:
+        with self.__lock:
+            return self.__catalogs.setdefault(name, Catalog(name, path, chunk_size, compact))
+
+    """
+    Return the catalog registered under the given name. Raises KeyError if
+    there is no such catalog.
+    """
+    def get(self, name: str) -> Catalog:
+        return self.__catalogs[name]
+
+    """
+    Return the names of all registered catalogs
+    """
+    def names(self) -> list[str]:
+        return list(self.__catalogs.keys())
+
+    """
+    Return the names of the registered catalogs whose csv file exists
+    """
+    def available_names(self) -> list[str]:
+        return [name for name, catalog in self.__catalogs.items() if os.path.exists(catalog.path)]
+
+    """
+    Return the names of the catalogs that are currently loaded
+    """
+    def loaded_names(self) -> list[str]:
+        return [name for name, catalog in self.__catalogs.items() if catalog.is_loaded]
+
+    """
+    Replace the data of a registered catalog with the contents of another
+    csv file without restarting the program
+    """
+    def swap(self, name: str, path: str) -> Catalog:
+        catalog=self.get(name)
+        catalog.load(path)
+        return catalog
+
+    """
+    Release the data of a catalog, e.g. to free the memory used by one of
+    the larger datasets
+    """
+    def unload(self, name: str) -> None:
+        self.get(name).unload()
+
+
+registry=CatalogRegistry()
+for dataset in (BookData.TEN, BookData.HUNDRED, BookData.THOUSAND, BookData.TEN_K):
+    registry.register(dataset, dataset)
+registry.register(BookData.HUNDRED_K, BookData.HUNDRED_K, chunk_size=Ingest.CHUNK_SIZE, compact=True)
@@ -0,0 +1,243 @@
+from __future__ import annotations
+import sys
+import threading
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+from collections.abc import Mapping, Iterator, Iterable, Sequence
+from heapq import merge
+from constants import Compact
+
+"""
+Compact, read-only form of a word -> ISBNs index
+
+Every ISBN gets a dense integer document id (docid), in ascending ISBN
+order, so comparing docids gives the same result as comparing ISBNs.
+The ISBN strings are kept once in the sorted docid -> ISBN table instead
+of in every set they belong to; the docid of an ISBN is found with a
+binary search in the same table.
+
+The postings of all words (the sorted docids of the books the word
+appears in) are stored one after another in a single array of unsigned
+integers. The words are kept in a sorted list and the start of each
+word's postings is stored in a parallel offsets array, so a word's
+postings are found with a binary search and returned as a slice of the
+shared array, without copying.
+
+    words:    ["amy",  "group",  "tan"]
+    offsets:  [0,      1,        3,     4]
+    postings: [5,      5, 6,     5]
+
+The index can be used wherever the dictionary index is used for reading:
+looking up a word returns the set of its ISBNs. The sets of the most
+recently looked up words (Compact.CACHED_SETS of them) are kept, so the
+words a search looks up again and again do not build a new set every
+time; like the sets of the dictionary index, they must not be changed.
+Searches that can work with docids directly use postings() and the sorted
+merge functions intersect/intersect_all and union/union_all, which walk
+the sorted postings instead of building sets.
+
+The index is created from a word -> ISBNs mapping, or, when the sorted
+ISBN table is given as well, from a word -> docids mapping whose docids
+are already in ascending order (see book_data.create_compact_index, which
+builds the index from the books without a dictionary of sets).
+"""
+class CompactIndex(Mapping):
+    def __init__(self, search_index: Mapping[str, Iterable[str]]|Mapping[str, Sequence[int]], isbns: list[str]|None=None):
+        if isbns is None:
+            self.__isbns=sorted({isbn for isbns in search_index.values() for isbn in isbns})
+            docids={isbn: docid for docid, isbn in enumerate(self.__isbns)} # only needed while building
+            word_docids=lambda word: sorted(docids[isbn] for isbn in search_index[word])
+        else:
+            self.__isbns=isbns
+            word_docids=search_index.__getitem__
+        self.__words=sorted(search_index.keys())
+        self.__offsets=array("I", [0])
+        self.__postings=array("I")
+        for word in self.__words:
+            self.__postings.extend(word_docids(word))
+            self.__offsets.append(len(self.__postings))
+        self.__cached_sets=OrderedDict() # word -> set of ISBNs, least recently used first
+        self.__cache_lock=threading.Lock()
+
+    """
+    Return the position of a word in the sorted word list, or -1 if the
+    word is not in the index
+    """
+    def __word_position(self, word: str) -> int:
+        position=bisect_left(self.__words, word)
+        if position < len(self.__words) and self.__words[position] == word:
+            return position
+        return -1
+
+    """
+    Return the sorted docids of the books a word appears in, as a read-only
+    view into the shared postings array (empty if the word is unknown)
+    """
+    def postings(self, word: str) -> memoryview:
+        position=self.__word_position(word)
+        if position == -1:
+            return memoryview(array("I")).toreadonly()
+        return memoryview(self.__postings)[self.__offsets[position]:self.__offsets[position + 1]].toreadonly()
+
+    def isbn(self, docid: int) -> str:
+        return self.__isbns[docid]
+
+    """
+    Return the docid of an ISBN. The docids follow the order of the ISBNs,
+    so the docid is the position of the ISBN in the sorted ISBN table.
+    Raises KeyError if the ISBN is not in the index.
+    """
+    def docid(self, isbn: str) -> int:
+        docid=bisect_left(self.__isbns, isbn)
+        if docid == len(self.__isbns) or self.__isbns[docid] != isbn:
+            raise KeyError(isbn)
+        return docid
+
+    """
+    Convert a sequence of docids to the list of their ISBNs
+    """
+    def isbns(self, docids) -> list[str]:
+        return [self.__isbns[docid] for docid in docids]
+
+    def __getitem__(self, word: str) -> set[str]:
+        with self.__cache_lock:
+            isbns=self.__cached_sets.get(word)
+            if isbns is not None:
+                self.__cached_sets.move_to_end(word)
+                return isbns
+        position=self.__word_position(word)
+        if position == -1:
+            raise KeyError(word)
+        isbns={self.__isbns[docid] for docid in self.__postings[self.__offsets[position]:self.__offsets[position + 1]]}
+        with self.__cache_lock:
+            self.__cached_sets[word]=isbns
+            if len(self.__cached_sets) > Compact.CACHED_SETS:
+                self.__cached_sets.popitem(last=False)
+        return isbns
+
+    def __contains__(self, word: object) -> bool:
+        return isinstance(word, str) and self.__word_position(word) != -1
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.__words)
+
+    def __len__(self) -> int:
+        return len(self.__words)
+
+    """
+    Convert the index back to a dictionary of words and sets of ISBNs
+    """
+    def to_dict(self) -> dict[str, set[str]]:
+        isbns=self.__isbns
+        postings=self.__postings
+        offsets=self.__offsets
+        return {word: {isbns[docid] for docid in postings[offsets[position]:offsets[position + 1]]} for position, word in enumerate(self.__words)}
+
+    """
+    The cached sets and the lock are not pickled (e.g. into a snapshot),
+    the unpickled index starts with an empty cache
+    """
+    def __getstate__(self) -> dict:
+        state=self.__dict__.copy()
+        del state["_CompactIndex__cached_sets"], state["_CompactIndex__cache_lock"]
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self.__cached_sets=OrderedDict()
+        self.__cache_lock=threading.Lock()
+
+    """
+    Return the approximate number of bytes used by the index, including the
+    words and ISBN strings
+    """
+    def memory_size(self) -> int:
+        size=sys.getsizeof(self.__postings) + sys.getsizeof(self.__offsets)
+        size += sys.getsizeof(self.__words) + sum(sys.getsizeof(word) for word in self.__words)
+        size += sys.getsizeof(self.__isbns) + sum(sys.getsizeof(isbn) for isbn in self.__isbns)
+        return size
+
+
+"""
+Return the approximate number of bytes used by a dictionary index of
+words and sets of ISBNs, counting every word and ISBN string once
+"""
+def dict_index_memory_size(search_index: dict[str, set[str]]) -> int:
+    size=sys.getsizeof(search_index)
+    isbns=set()
+    for word, word_isbns in search_index.items():
+        size += sys.getsizeof(word) + sys.getsizeof(word_isbns)
+        isbns.update(word_isbns)
+    size += sum(sys.getsizeof(isbn) for isbn in isbns)
+    return size
+
+"""
+Return the docids that are in both of two sorted sequences of docids
+
+The two sequences are walked side by side, always moving forward in the
+one with the smaller current docid, so the cost is linear in their length.
+"""
+def intersect(a_postings, b_postings) -> list[int]:
+    result=[]
+    i, j=0, 0
+    while i < len(a_postings) and j < len(b_postings):
+        a_docid, b_docid=a_postings[i], b_postings[j]
+        if a_docid == b_docid:
+            result.append(a_docid)
+            i += 1
+            j += 1
+        elif a_docid < b_docid:
+            i += 1
+        else:
+            j += 1
+    return result
+
+"""
+Return the docids that are in all of the given sorted sequences
+
+The shortest sequences are intersected first to keep the intermediate
+results small.
+"""
+def intersect_all(postings_list: list) -> list[int]:
+    if not postings_list:
+        return []
+    ordered=sorted(postings_list, key=len)
+    result=list(ordered[0])
+    for postings in ordered[1:]:
+        if not result:
+            break
+        result=intersect(result, postings)
+    return result
+
+"""
+Return the docids that are in either of two sorted sequences of docids,
+in ascending order and without repetition
+"""
+def union(a_postings, b_postings) -> list[int]:
+    return union_all([a_postings, b_postings])
+
+"""
+Return the docids that are in any of the given sorted sequences, in
+ascending order and without repetition
+
+The sequences are merged with a heap, so the cost is linear in their
+total length (times the logarithm of their number).
+"""
+def union_all(postings_list: list) -> list[int]:
+    result=[]
+    for docid in merge(*postings_list):
+        if not result or result[-1] != docid:
+            result.append(docid)
+    return result
+
+
+if __name__=="__main__":
+    import book_data
+    from constants import BookData
+    for path in (BookData.THOUSAND, BookData.TEN_K):
+        _, title_author_publisher_index, _, _=book_data.load_books_and_indexes(path)
+        dict_size=dict_index_memory_size(title_author_publisher_index)
+        compact_size=CompactIndex(title_author_publisher_index).memory_size()
+        print(f"{path}: {len(title_author_publisher_index)} words, dictionary index {dict_size / 1024:.0f} KB, "
+              f"compact index {compact_size / 1024:.0f} KB ({dict_size / compact_size:.1f}x smaller)")
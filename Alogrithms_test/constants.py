@@ -6,6 +6,21 @@ class BookData:
     THOUSAND="1000books.csv"
     HUNDRED="100books.csv"
     TEN="10books.csv"
+    DEFAULT=THOUSAND
+
+class BookField:
+    ISBN="ISBN"
+    TITLE="Title"
+    AUTHOR="Author"
+    PUBLISHER="Publisher"
+    YEAR="Year"
+    DETAILS=[TITLE, AUTHOR, PUBLISHER, YEAR] # order of the book info fields within a book dictionary
+    WORD_FIELDS=[TITLE, AUTHOR, PUBLISHER] # fields that are split into words and indexed word by word
+    TEXT_COLUMNS={ISBN: str, TITLE: str, AUTHOR: str, PUBLISHER: str} # csv column types, so an all-digit ISBN column keeps its leading zeros
+
+class Ingest:
+    CHUNK_SIZE=10000 # rows read from a csv file at a time when a catalog is streamed
+    MIN_CHUNK_SIZE=100
 
 class Result:
     NOT_FOUND=-1
@@ -16,10 +31,44 @@ class Search:
     LEVENSHTEIN_MAX_DISTANCE=2
     MAX_WORD_LENGTH=20
     MAX_RESULT_COUNT=100
+    PAGE_SIZE=20 # results ranked and shown at a time
+
+class LevenshteinEngine:
+    LINEAR="linear" # compare the search term with every word of a similar length
+    BK_TREE="bk_tree" # search a BK-tree of the words of the index
+    SYMSPELL="symspell" # look up the deletions of the search term in a deletion index
+    TRIGRAM="trigram" # compare the search term with the words that share enough trigrams with it
+    DEFAULT=SYMSPELL
+
+class SubstringEngine:
+    SCAN="scan" # look for the search term in every word that is at least as long
+    TRIGRAM="trigram" # check the words that contain all the trigrams of the search term
+    SUFFIX_ARRAY="suffix_array" # binary search in a suffix array of the words
+    DEFAULT=SUFFIX_ARRAY
+
+class SymSpell:
+    PREFIX_LENGTH=7 # deletions are made from the first characters of a word only
+    MAX_ENTRIES=2000000 # deletions a deletion index holds at most
+
+class ResultCache:
+    MAX_ENTRIES=256 # searches kept by the query cache at most
+    MAX_BYTES=64 * 1024 * 1024 # approximate memory the cached searches use at most
+
+class StopWords:
+    LANGUAGES=["english", "spanish", "german", "french"] # languages of the nltk stopwords corpus removed from search terms
+    CACHE="stopwords.txt" # the stop words of the languages, one per line, read instead of the nltk corpus
+
+class Compact:
+    CACHED_SETS=256 # ISBN sets of the most recently looked up words kept by a compact index
+
+class Parallel:
+    MIN_SHARD_SIZE=5000 # words a worker process compares with a term at least
+    MIN_VOCABULARY_SIZE=50000 # words a vocabulary needs for a linear search to use worker processes
 
 class SearchType:
     ISBN="isbn"
     YEAR="year"
+    YEAR_RANGE="year_range"
     WORD="word"
     IN="in"
     LEVENSHTEIN="levenshtein"
@@ -29,6 +78,8 @@ class SearchInfo:
     RESULTS="results"
     MATCHED_STRINGS="matched_strings"
     MATCHED_BOOK_INFO="matched_book_info"
+    FACETS="facets"
+    PAGES="pages"
 
 class GraphPhotoPath(Enum):
     GRAPH_SIMPLE="graph_simple.png"
@@ -0,0 +1,171 @@
+from __future__ import annotations
+import re
+from array import array
+from typing import Iterable
+
+"""
+Return an ISBN as it is compared: without hyphens, spaces and an "ISBN"
+prefix, with an upper case check character X, e.g. "isbn 0-393-04521-8" ->
+"0393045218"
+"""
+def normalize_isbn(text: str) -> str:
+    if text.isdigit(): # most ISBNs of the datasets
+        return text
+    text=re.sub(r"[^0-9A-Za-z]", "", text).upper()
+    if text.startswith("ISBN"):
+        text=text[4:]
+    return text
+
+"""
+Return the check digit of the first 12 digits of an ISBN-13
+"""
+def isbn13_check_digit(digits: str) -> str:
+    total=sum(map(int, digits[0:12:2])) + 3 * sum(map(int, digits[1:12:2]))
+    return str((10 - total % 10) % 10)
+
+"""
+Return the check character (0-9 or X) of the first 9 digits of an ISBN-10
+"""
+def isbn10_check_character(digits: str) -> str:
+    total=sum((10 - position) * int(digit) for position, digit in enumerate(digits[:9]))
+    check=(11 - total % 11) % 11
+    return "X" if check == 10 else str(check)
+
+"""
+Return the ways an ISBN can be written in a catalog
+
+The datasets store ISBN-10s as numbers, so their leading zeros are lost
+("2005018" is "0002005018"). An ISBN-10 and the ISBN-13 of the same book
+share the nine digits in the middle, so a book can be found by either:
+
+    "0393045218", "393045218", "9780393045215" -> "0393045218", "393045218",
+    "9780393045215"
+
+If the check character of the entered ISBN is wrong, the ISBN-10 forms are
+made with every check character (0-9 and X), so the book is found even
+though one of its characters was mistyped. A correct ISBN only gives its
+own ISBN-10, so a different ISBN that only differs in the check character
+is not found.
+"""
+def isbn_spellings(isbn: str) -> set[str]:
+    isbn=normalize_isbn(isbn)
+    spellings={isbn} if isbn else set()
+    core=None
+    if len(isbn) == 13 and isbn.isdigit() and isbn.startswith("978"):
+        core=isbn[3:12]
+        valid=isbn[12] == isbn13_check_digit(isbn)
+    elif 0 < len(isbn) <= 10 and isbn.zfill(10)[:9].isdigit():
+        core=isbn.zfill(10)[:9]
+        valid=isbn.zfill(10)[9] == isbn10_check_character(core)
+    if core is not None:
+        for check_character in (isbn10_check_character(core) if valid else "0123456789X"):
+            spellings.add(core + check_character)
+            spellings.add((core + check_character).lstrip("0"))
+        spellings.add("978" + core + isbn13_check_digit("978" + core))
+    return spellings
+
+"""
+Index of the ISBNs of a catalog for exact and partial ISBN searches
+
+Exact searches look up every way the search term can be written (see
+isbn_spellings) in a dictionary of the ISBNs, so an ISBN is found whether
+it is entered as an ISBN-10 or an ISBN-13, with or without hyphens and
+leading zeros, with about twenty dictionary lookups.
+
+Partial searches (a part of an ISBN, e.g. "19515") use the digit n-grams of
+the ISBNs. Every ISBN gets a number (docid), and for every string of
+GRAM_LENGTH consecutive characters the index keeps the docids of the ISBNs
+it appears in, in an array of integers:
+
+    "195153448" -> "1951", "9515", "5153", "1534", "5344", "3448"
+
+An ISBN that contains the search term contains all the n-grams of the term,
+so only the ISBNs in the intersection of their docid arrays (the shortest
+first) are checked. Terms shorter than GRAM_LENGTH are looked for in all
+ISBNs.
+
+Removing an ISBN only frees its docid; the n-gram arrays keep the docid
+and it is skipped by the searches.
+"""
+class IsbnIndex():
+    GRAM_LENGTH=4
+
+    def __init__(self, isbns: Iterable[str]=()):
+        self.__isbns=[] # docid -> ISBN, None for removed ISBNs
+        self.__docids={} # ISBN -> docid
+        self.__grams={} # n-gram -> docids of the ISBNs it appears in
+        for isbn in isbns:
+            self.add(isbn)
+
+    def __len__(self) -> int:
+        return len(self.__docids)
+
+    def __contains__(self, isbn: object) -> bool:
+        return isbn in self.__docids
+
+    """
+    Return the n-grams of an ISBN
+    """
+    def grams(self, isbn: str) -> set[str]:
+        return {isbn[i:i+self.GRAM_LENGTH] for i in range(len(isbn) - self.GRAM_LENGTH + 1)}
+
+    """
+    Add an ISBN to the index. Returns False if the ISBN was already in the
+    index.
+    """
+    def add(self, isbn: str) -> bool:
+        if isbn in self.__docids:
+            return False
+        docid=self.__docids[isbn]=len(self.__isbns)
+        self.__isbns.append(isbn)
+        grams=self.__grams
+        for gram in self.grams(normalize_isbn(isbn)):
+            docids=grams.get(gram)
+            if docids is None:
+                docids=grams[gram]=array("I")
+            docids.append(docid)
+        return True
+
+    """
+    Remove an ISBN from the index. Returns False if the ISBN was not in the
+    index.
+    """
+    def remove(self, isbn: str) -> bool:
+        docid=self.__docids.pop(isbn, None)
+        if docid is None:
+            return False
+        self.__isbns[docid]=None
+        return True
+
+    """
+    Return the ISBNs of the index that are the same ISBN as the search term,
+    in ascending order
+    """
+    def exact_matches(self, term: str) -> list[str]:
+        spellings=isbn_spellings(term)
+        spellings.add(term)
+        return sorted(spelling for spelling in spellings if spelling in self.__docids)
+
+    """
+    Return the ISBNs of the index that contain the search term, in
+    ascending order
+    """
+    def partial_matches(self, term: str) -> list[str]:
+        term=normalize_isbn(term)
+        if not term:
+            return []
+        term_grams=self.grams(term)
+        if not term_grams:
+            candidates=(isbn for isbn in self.__isbns if isbn is not None)
+        elif len(term_grams) == 1 and len(term) == self.GRAM_LENGTH: # the term is an n-gram, every ISBN of its docids contains it
+            isbns=self.__isbns
+            return sorted(isbn for isbn in map(isbns.__getitem__, self.__grams.get(term, ())) if isbn is not None)
+        else:
+            docid_arrays=sorted((self.__grams.get(gram, array("I")) for gram in term_grams), key=len)
+            docids=set(docid_arrays[0])
+            for other_docids in docid_arrays[1:]:
+                if not docids:
+                    break
+                docids.intersection_update(other_docids)
+            candidates=(self.__isbns[docid] for docid in docids)
+        return sorted(isbn for isbn in candidates if isbn is not None and term in normalize_isbn(isbn))
@@ -3,40 +3,105 @@ from constants import *
 """
 Calculate the Levenshtein distance of two words
 
-Create a matrix that is 2 rows and 2 columns greater than
-the words' lengths to allow for the matrix initialisation.
-The matrix is then populated based on the formula 
+The distance is calculated with the formula
 (https://medium.com/@ethannam/understanding-the-
 levenshtein-distance-equation-for-beginners-c4285a5604f0)
-The distance of the two words will be the element at the 
-largest [row][column] index of the matrix.
+on a matrix with a row for every character of the first word and a
+column for every character of the second word. Every row only depends on
+the row above it, so only two rows are kept: the previous one and the one
+being filled. The distance of the two words is the last element of the
+last row.
+
+If a maximum distance is given, only whether the words are within that
+distance matters, see bounded_levenshtein_distance. Distances above the
+maximum are then returned as max_distance + 1.
 """
 
-def levenshtein_distance(a_word: str, b_word: str) -> int:
+def levenshtein_distance(a_word: str, b_word: str, max_distance: int|None=None) -> int:
     if type(a_word) != str or type(b_word) != str:
         return Result.NOT_FOUND
-    
-    row, col = len(a_word)+2, len(b_word) + 2
-    matrix=[[0 for _ in range(col)] for _ in range(row) ]
-  
-    for y in range(1, row):        
-         matrix[y][1] = y-1
-         if y >= 2:
-             matrix[y][0]=a_word[y-2]
-
-    for x in range(1,col):
-         matrix[1][x] = x -1
-         if x >= 2:
-            matrix[0][x]=b_word[x-2]
-
-    for i in range (2, row):
-        for j in range(2, col):
-                matrix[i][j] = min(
-                                    matrix[i-1][j] + 1,
-                                    matrix[i][j-1] +1,
-                                    matrix[i-1][j-1] + 1 if matrix[0][j] != matrix[i][0] else matrix[i-1][j-1]
-                                  )
-                
-    return matrix[row-1][col-1]
+    if max_distance is not None:
+        return bounded_levenshtein_distance(a_word, b_word, max_distance)
+
+    previous_row=list(range(len(b_word) + 1))
+    for i, a_char in enumerate(a_word, 1):
+        current_row=[i]
+        for j, b_char in enumerate(b_word, 1):
+            current_row.append(min(
+                                    previous_row[j] + 1,
+                                    current_row[j-1] + 1,
+                                    previous_row[j-1] + 1 if a_char != b_char else previous_row[j-1]
+                                  ))
+        previous_row=current_row
+    return previous_row[-1]
+
+"""
+Calculate the Levenshtein distance of two words up to a maximum distance
+
+Returns the distance if it is at most max_distance, otherwise
+max_distance + 1. Four things make this much cheaper than the full
+calculation when the maximum distance is small:
+
+- Words whose lengths differ by more than the maximum distance are
+  rejected without any calculation.
+- If the shorter word is split into max_distance + 1 pieces, every edit
+  can change at most one of them, so if the words are within the maximum
+  distance, at least one piece appears unchanged in the longer word. Most
+  words that are far apart are rejected by looking for the pieces alone.
+- The characters the words start and end with in common are skipped (they
+  do not change the distance), and row i of the matrix only needs the
+  cells within max_distance of the diagonal (a band of 2 * max_distance + 1
+  cells), because any cell further away already holds a distance above the
+  maximum.
+- The distance can never go down from one row to the next, so the
+  calculation stops as soon as every cell of a row is above the maximum.
+"""
+def bounded_levenshtein_distance(a_word: str, b_word: str, max_distance: int) -> int:
+    beyond=max_distance + 1
+    if len(a_word) > len(b_word):
+        a_word, b_word=b_word, a_word # the distance is symmetric, keep the shorter word first
+    a_length, b_length=len(a_word), len(b_word)
+    if b_length - a_length > max_distance:
+        return beyond
+    if a_length >= beyond:
+        for piece in range(beyond):
+            if a_word[a_length * piece // beyond:a_length * (piece + 1) // beyond] in b_word:
+                break
+        else:
+            return beyond
 
+    start=0
+    while start < a_length and a_word[start] == b_word[start]:
+        start += 1
+    while a_length > start and a_word[a_length-1] == b_word[b_length-1]:
+        a_length -= 1
+        b_length -= 1
+    a_word, b_word=a_word[start:a_length], b_word[start:b_length]
+    a_length, b_length=len(a_word), len(b_word)
+    if a_length == 0:
+        return b_length if b_length <= max_distance else beyond
 
+    previous_row=[j if j <= max_distance else beyond for j in range(b_length + 1)]
+    for i in range(1, a_length + 1):
+        a_char=a_word[i-1]
+        current_row=[beyond] * (b_length + 1)
+        low=i - max_distance if i > max_distance else 1
+        high=i + max_distance if i + max_distance < b_length else b_length
+        left=current_row[low-1]=i if i <= max_distance else beyond
+        diagonal=previous_row[low-1]
+        row_minimum=left
+        for j in range(low, high + 1): # comparisons instead of min() in the inner loop
+            above=previous_row[j]
+            cell=diagonal if a_char == b_word[j-1] else diagonal + 1
+            if above < cell:
+                cell=above + 1
+            if left < cell:
+                cell=left + 1
+            current_row[j]=left=cell
+            diagonal=above
+            if cell < row_minimum:
+                row_minimum=cell
+        if row_minimum > max_distance:
+            return beyond
+        previous_row=current_row
+    return previous_row[b_length] if previous_row[b_length] <= max_distance else beyond
@@ -0,0 +1,129 @@
+import random
+import string
+from time import perf_counter
+from typing import Callable
+from catalog import Catalog
+from levenshtein_distance import levenshtein_distance
+from myers import MyersPattern
+from new_search_util import search_by_levenshtein_distance, search_with_word_matcher, slice_list_for_levenshtein_search
+from presenter import Presenter
+from constants import *
+
+"""
+Calculate the Levenshtein distance of two words the way it was done before
+the two row and bounded forms: with the whole matrix, holding the
+characters of the words in its first row and column
+
+Kept here only as the baseline for the comparison of the distance
+calculations.
+"""
+def levenshtein_distance_matrix(a_word: str, b_word: str) -> int:
+    row, col = len(a_word)+2, len(b_word) + 2
+    matrix=[[0 for _ in range(col)] for _ in range(row) ]
+    for y in range(1, row):
+         matrix[y][1] = y-1
+         if y >= 2:
+             matrix[y][0]=a_word[y-2]
+    for x in range(1,col):
+         matrix[1][x] = x -1
+         if x >= 2:
+            matrix[0][x]=b_word[x-2]
+    for i in range (2, row):
+        for j in range(2, col):
+                matrix[i][j] = min(
+                                    matrix[i-1][j] + 1,
+                                    matrix[i][j-1] +1,
+                                    matrix[i-1][j-1] + 1 if matrix[0][j] != matrix[i][0] else matrix[i-1][j-1]
+                                  )
+    return matrix[row-1][col-1]
+
+"""
+Return the average time of one distance calculation in microseconds, over
+all the comparisons a linear scan makes for the given terms
+"""
+def time_distance(distance: Callable[[str, str], int], search_source: list[str], terms: list[str]) -> float:
+    pairs=[(source_word, term) for term in terms for source_word in slice_list_for_levenshtein_search(search_source, len(term))]
+    start=perf_counter()
+    for source_word, term in pairs:
+        distance(source_word, term)
+    return (perf_counter() - start) * 1000000 / len(pairs)
+
+"""
+Return the average time of one distance calculation in microseconds when
+the distances of each term to the words a linear scan compares it with are
+calculated in one batch with the bit-parallel algorithm
+"""
+def time_batch_distance(search_source: list[str], terms: list[str], use_numpy: bool=True) -> float:
+    slices=[(term, slice_list_for_levenshtein_search(search_source, len(term))) for term in terms]
+    start=perf_counter()
+    for term, source_slice in slices:
+        MyersPattern(term).distances(source_slice, Search.LEVENSHTEIN_MAX_DISTANCE, use_numpy)
+    return (perf_counter() - start) * 1000000 / sum(len(source_slice) for _, source_slice in slices)
+
+"""
+Create search terms with typing mistakes from the words of a catalog
+
+Every term is a word of the catalog with one random character inserted,
+deleted or replaced. A seeded random generator is used so that every run
+searches for the same terms.
+"""
+def create_misspelled_terms(words: list[str], count: int, seed: int=0) -> list[str]:
+    generator=random.Random(seed)
+    candidates=[word for word in words if len(word) > Search.LEVENSHTEIN_MAX_DISTANCE]
+    terms=[]
+    for word in generator.sample(candidates, min(count, len(candidates))):
+        position=generator.randrange(len(word))
+        letter=generator.choice(string.ascii_lowercase)
+        match generator.choice(("insert", "delete", "replace")):
+            case "insert":
+                terms.append(word[:position] + letter + word[position:])
+            case "delete":
+                terms.append(word[:position] + word[position + 1:])
+            case "replace":
+                terms.append(word[:position] + letter + word[position + 1:])
+    return terms
+
+"""
+Run a Levenshtein search for every term on its own and return the
+average time per term in milliseconds together with the results
+"""
+def time_searches(search: Callable, terms: list[str]) -> tuple[float, list[dict[int, list[str]]]]:
+    results=[]
+    start=perf_counter()
+    for term in terms:
+        search_info_key=((term,), SearchType.LEVENSHTEIN)
+        presenter=Presenter({search_info_key: dict()}, dict(), use_gui=False)
+        results.append(search(presenter, search_info_key))
+    return (perf_counter() - start) * 1000 / len(terms), results
+
+
+if __name__=="__main__":
+    for path in (BookData.THOUSAND, BookData.TEN_K):
+        catalog=Catalog(path, path)
+        search_source=catalog.search_source
+        terms=create_misspelled_terms(search_source, 50)
+
+        matrix_time=time_distance(levenshtein_distance_matrix, search_source, terms)
+        two_row_time=time_distance(levenshtein_distance, search_source, terms)
+        bounded_time=time_distance(lambda a_word, b_word: levenshtein_distance(a_word, b_word, Search.LEVENSHTEIN_MAX_DISTANCE), search_source, terms)
+        print(f"{path}: {len(search_source)} words, {len(terms)} misspelled terms")
+        myers_time=time_batch_distance(search_source, terms, use_numpy=False)
+        myers_numpy_time=time_batch_distance(search_source, terms)
+        print(f"    distance per comparison: full matrix {matrix_time:.2f} us, two rows {two_row_time:.2f} us, "
+              f"bounded to {Search.LEVENSHTEIN_MAX_DISTANCE} {bounded_time:.2f} us ({matrix_time / bounded_time:.1f}x faster), "
+              f"bit-parallel batch {myers_time:.2f} us, with NumPy {myers_numpy_time:.2f} us ({matrix_time / myers_numpy_time:.1f}x faster)")
+
+        linear_time, linear_results=time_searches(lambda presenter, key: search_by_levenshtein_distance(search_source, presenter, key), terms)
+        print(f"    linear scan {linear_time:.2f} ms/term")
+        for engine, build in (("BK-tree", catalog.bk_tree), ("SymSpell", catalog.deletion_index), ("Trigram", catalog.trigram_index)):
+            start=perf_counter()
+            matcher=build().search
+            build_time=perf_counter() - start
+            engine_time, engine_results=time_searches(lambda presenter, key: search_with_word_matcher(matcher, presenter, key), terms)
+            # the matches can differ for a few terms: the linear scan stops after the maximum number of results in
+            # length order while the engines take the results in order of distance, and the length slice of the linear
+            # scan leaves out the shortest words of the source even when they are within the maximum distance
+            same_words=sum({dist: sorted(words) for dist, words in linear.items()} == {dist: sorted(words) for dist, words in engine.items()}
+                           for linear, engine in zip(linear_results, engine_results))
+            print(f"    {engine} {engine_time:.2f} ms/term (speedup {linear_time / engine_time:.1f}x), built in {build_time:.2f}s, "
+                  f"same matches as the linear scan for {same_words}/{len(terms)} terms")
@@ -0,0 +1,105 @@
+import os
+import tempfile
+import pandas as pd
+from timeit import repeat
+from typing import Callable
+from book_data import create_books_from_csv, create_indexes, add_book
+from constants import *
+
+"""
+Create a nested dictionary of books the way it was done before the
+columnar loader: one dictionary per row with DataFrame.iterrows()
+
+Kept here only as the baseline for the load time comparison.
+"""
+def create_books_from_csv_iterrows(path: str) -> dict[str, dict[str, str]]:
+    contents = pd.read_csv(path)
+    contents["Year"]=pd.to_numeric(contents["Year"], errors="coerce").astype("Int64")
+    contents.dropna(inplace=True)
+    books = {}
+    for _, row in contents.iterrows():
+        isbn = row['ISBN']
+        book_details = {
+            "Title": row["Title"],
+            "Author": row["Author"],
+            "Publisher": row["Publisher"],
+            "Year": str(row["Year"])
+        }
+        books[isbn] = book_details
+
+    return books
+
+"""
+Create the title/author/publisher index and the year index the way it was
+done before the batched tokenizer: add_book for every field of every book,
+which prepares the words one string at a time
+
+Kept here only as the baseline for the index build time comparison.
+"""
+def create_indexes_per_book(books: dict[str, dict[str, str]]) -> tuple[dict[str, set[str]], dict[str, set[str]]]:
+    title_author_publisher_index={}
+    year_index={}
+    for isbn, book in books.items():
+        add_book(title_author_publisher_index, isbn, book, "Title")
+        add_book(title_author_publisher_index, isbn, book, "Author")
+        add_book(title_author_publisher_index, isbn, book, "Publisher")
+        add_book(year_index, isbn, book, "Year")
+    return title_author_publisher_index, year_index
+
+"""
+Create a csv file with a given number of rows by repeating the rows
+of an existing catalog
+
+The ISBN of each repeated row is suffixed with the number of the
+repetition so that the ISBNs stay unique. Used when the larger
+catalog (e.g. BookData.HUNDRED_K) is not available locally.
+"""
+def create_scaled_csv(source_path: str, row_count: int) -> str:
+    source=pd.read_csv(source_path)
+    copies=[]
+    repetition=0
+    while sum(len(copy) for copy in copies) < row_count:
+        copy=source.copy()
+        copy["ISBN"]=copy["ISBN"].astype(str) + ("-" + str(repetition) if repetition else "")
+        copies.append(copy)
+        repetition += 1
+    scaled=pd.concat(copies).head(row_count)
+    handle, path=tempfile.mkstemp(suffix=".csv")
+    os.close(handle)
+    scaled.to_csv(path, index=False)
+    return path
+
+"""
+Measure the load time of a loader function with a given csv file
+
+The loader is run once per timing and the timing is repeated 3 times,
+the best time is returned.
+"""
+def time_loader(loader: Callable, path: str) -> float:
+    times=repeat(lambda: loader(path), repeat=3, number=1)
+    return min(times)
+
+
+if __name__=="__main__":
+    datasets={"10k": BookData.TEN_K}
+    temp_paths=[]
+    if os.path.exists(BookData.HUNDRED_K):
+        datasets["100k"]=BookData.HUNDRED_K
+    else:
+        datasets["100k"]=create_scaled_csv(BookData.TEN_K, 100000)
+        temp_paths.append(datasets["100k"])
+
+    try:
+        for name, path in datasets.items():
+            old_time=time_loader(create_books_from_csv_iterrows, path)
+            new_time=time_loader(create_books_from_csv, path)
+            print(f"{name}: iterrows loader {old_time:.3f}s, columnar loader {new_time:.3f}s ({old_time / new_time:.1f}x faster)")
+            books=create_books_from_csv(path)
+            old_time=min(repeat(lambda: create_indexes_per_book(books), repeat=3, number=1))
+            new_time=min(repeat(lambda: create_indexes(books), repeat=3, number=1))
+            same_indexes=create_indexes(books) == create_indexes_per_book(books)
+            print(f"{name}: index build book by book {old_time:.3f}s, batched tokenizer {new_time:.3f}s ({old_time / new_time:.1f}x faster), "
+                  f"same indexes: {same_indexes}, {len(books) / new_time:.0f} books/s")
+    finally:
+        for path in temp_paths:
+            os.remove(path)
@@ -1,9 +1,14 @@
 from tkinter import *
-from graph_window import GraphWindow
-from sort_window import SortWindow
-from book_search_window import BookSearchWindow
 from constants import SortingAlgorithm
 
+"""
+The window the application starts with
+
+The modules of the other windows are imported when a window is opened for
+the first time, not when the application starts: they import pandas,
+matplotlib and the search modules, which take longer to load than it takes
+to show this window.
+"""
 class MainWindow(Tk):
 
     def __init__(self):
@@ -27,13 +32,25 @@ class MainWindow(Tk):
         self.search_label.pack()
 
         self.graph_button=Button(self, text="Graphs", padx=20, pady=5, 
-                               command=lambda: GraphWindow())
+                               command=self.open_graph_window)
         self.graph_button.grid(row=0, column=1, padx=(0, 40), pady=(40, 20), sticky=EW)
 
         self.sort_button=Button(self, text="Sort", padx=20, pady=5, 
-                               command=lambda: SortWindow([alg.value for alg in SortingAlgorithm]))
+                               command=self.open_sort_window)
         self.sort_button.grid(row=1, column=1, padx=(0, 40), pady=20, sticky=EW)
 
         self.search_button=Button(self, text="Search", padx=20, pady=5, 
-                               command=lambda: BookSearchWindow())
-        self.search_button.grid(row=2, column=1, padx=(0, 40), pady=(20, 40), sticky=EW)
\ No newline at end of file
+                               command=self.open_book_search_window)
+        self.search_button.grid(row=2, column=1, padx=(0, 40), pady=(20, 40), sticky=EW)
+
+    def open_graph_window(self) -> None:
+        from graph_window import GraphWindow
+        GraphWindow()
+
+    def open_sort_window(self) -> None:
+        from sort_window import SortWindow
+        SortWindow([alg.value for alg in SortingAlgorithm])
+
+    def open_book_search_window(self) -> None:
+        from book_search_window import BookSearchWindow
+        BookSearchWindow()
@@ -0,0 +1,137 @@
+from __future__ import annotations
+from typing import Iterable
+from collections.abc import Sequence
+try:
+    import numpy as np
+except ImportError: # the batches are then calculated one word at a time
+    np = None
+
+"""
+Bit-parallel Levenshtein distance of one pattern against many words
+(Myers' bit-vector algorithm, in Hyyrö's form for the whole words)
+
+The matrix of the distance calculation has a row for every character of
+the pattern. Instead of the values of a column, the algorithm keeps the
+differences between vertically adjacent cells, which can only be -1, 0 or
++1, as two bit vectors with one bit per row: Pv (the difference is +1) and
+Mv (the difference is -1). A whole column is then calculated with a
+handful of bitwise operations and one addition, and the distance is
+tracked through the last row.
+
+The operations need to know where a character of the word matches the
+pattern. These match masks (Peq, one bit per position of the pattern) are
+calculated once per pattern and used for every word:
+
+    pattern "tan": Peq["t"]=0b001, Peq["a"]=0b010, Peq["n"]=0b100
+
+With NumPy, words of the same length are calculated together: the bit
+vectors of all the words are held in arrays of 64 bit integers, so every
+operation works on the whole group at once. This needs a pattern of at
+most 64 characters; longer patterns use Python integers, which have no
+size limit.
+"""
+class MyersPattern():
+    NUMPY_MIN_BATCH=16 # smaller groups of words of the same length are calculated one word at a time
+
+    def __init__(self, pattern: str):
+        self.__pattern=pattern
+        self.__length=len(pattern)
+        self.__last_row=1 << (self.__length - 1) if pattern else 0
+        self.__all_rows=(1 << self.__length) - 1
+        self.__match_masks={}
+        for position, char in enumerate(pattern):
+            self.__match_masks[char]=self.__match_masks.get(char, 0) | (1 << position)
+
+    @property
+    def pattern(self) -> str:
+        return self.__pattern
+
+    @property
+    def match_masks(self) -> dict[str, int]:
+        return self.__match_masks
+
+    """
+    Return the Levenshtein distance of the pattern and a word
+    """
+    def distance(self, word: str) -> int:
+        if not self.__length:
+            return len(word)
+        match_masks, last_row, all_rows=self.__match_masks, self.__last_row, self.__all_rows
+        positive, negative=all_rows, 0 # Pv and Mv: the first column is 1, 2, 3, ... going down
+        score=self.__length
+        for char in word:
+            match=match_masks.get(char, 0)
+            vertical=match | negative
+            horizontal=(((match & positive) + positive) ^ positive) | match
+            horizontal_positive=negative | (~(horizontal | positive) & all_rows)
+            horizontal_negative=positive & horizontal
+            if horizontal_positive & last_row:
+                score += 1
+            elif horizontal_negative & last_row:
+                score -= 1
+            horizontal_positive=((horizontal_positive << 1) | 1) & all_rows # the first row goes up by 1 in every column
+            horizontal_negative=(horizontal_negative << 1) & all_rows
+            positive=horizontal_negative | (~(vertical | horizontal_positive) & all_rows)
+            negative=horizontal_positive & vertical
+        return score
+
+    """
+    Return the Levenshtein distances of the pattern and a list of words, in
+    the order of the words
+
+    If a maximum distance is given, distances above it are returned as
+    max_distance + 1, like the bounded levenshtein_distance.
+    """
+    def distances(self, words: Iterable[str], max_distance: int|None=None, use_numpy: bool=True) -> list[int]:
+        if not isinstance(words, Sequence): # views of a word list are used as they are
+            words=list(words)
+        if use_numpy and np is not None and 0 < self.__length <= 64 and len(words) >= self.NUMPY_MIN_BATCH:
+            distances=self.__numpy_distances(words)
+        else:
+            distances=[self.distance(word) for word in words]
+        if max_distance is not None:
+            distances=[distance if distance <= max_distance else max_distance + 1 for distance in distances]
+        return distances
+
+    """
+    Calculate the distances with NumPy, one group of words of the same
+    length at a time
+    """
+    def __numpy_distances(self, words: list[str]) -> list[int]:
+        distances=[0] * len(words)
+        groups_by_length={} # length -> (positions, words)
+        for position, word in enumerate(words):
+            positions, group=groups_by_length.setdefault(len(word), ([], []))
+            positions.append(position)
+            group.append(word)
+        for length, (positions, group) in groups_by_length.items():
+            if length == 0 or len(group) < self.NUMPY_MIN_BATCH:
+                for position, word in zip(positions, group):
+                    distances[position]=self.distance(word)
+                continue
+            for position, distance in zip(positions, self.__numpy_group_distances(group, length).tolist()):
+                distances[position]=distance
+        return distances
+
+    def __numpy_group_distances(self, group: list[str], length: int):
+        chars=np.frombuffer("".join(group).encode("utf-32-le"), dtype=np.uint32).reshape(len(group), length)
+        matches=np.zeros(chars.shape, dtype=np.uint64)
+        for char, mask in self.__match_masks.items():
+            matches[chars == ord(char)] |= np.uint64(mask)
+        last_row, one=np.uint64(self.__last_row), np.uint64(1)
+        positive=np.full(len(group), self.__all_rows, dtype=np.uint64)
+        negative=np.zeros(len(group), dtype=np.uint64)
+        scores=np.full(len(group), self.__length, dtype=np.int64)
+        for column in range(length): # bits above the pattern length never reach the last row, so no masking is needed
+            match=matches[:, column]
+            vertical=match | negative
+            horizontal=(((match & positive) + positive) ^ positive) | match
+            horizontal_positive=negative | ~(horizontal | positive)
+            horizontal_negative=positive & horizontal
+            scores += (horizontal_positive & last_row) != 0
+            scores -= (horizontal_negative & last_row) != 0
+            horizontal_positive=(horizontal_positive << one) | one
+            horizontal_negative=horizontal_negative << one
+            positive=horizontal_negative | ~(vertical | horizontal_positive)
+            negative=horizontal_positive & vertical
+        return scores
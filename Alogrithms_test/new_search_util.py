@@ -1,11 +1,16 @@
 from __future__ import annotations
+import os
 import re
-from itertools import combinations
-import nltk
-from nltk.corpus import stopwords
 from levenshtein_distance import *
+from myers import MyersPattern
 import binary_search
 from presenter import Presenter
+from result_pages import ResultPages
+from vocabulary import Vocabulary
+from parallel_search import ParallelLevenshtein
+from isbn_index import IsbnIndex
+from cancellation import CancellationToken, is_cancelled
+from year_range import SortedYearIndex
 from constants import *
 from typing import Callable
 
@@ -14,14 +19,44 @@ from typing import Callable
 #                                          SEARCH TERMS                                        #
 ################################################################################################
 
-nltk.download("stopwords")
-stop_words=set(stopwords.words("english"))
-stop_words_es=set(stopwords.words("spanish"))
-stop_words_de=set(stopwords.words("german"))
-stop_words_fr=set(stopwords.words("french"))
-stop_words.update(stop_words_es)
-stop_words.update(stop_words_de)
-stop_words.update(stop_words_fr)
+stop_words=None # loaded by get_stop_words on first use
+
+"""
+Return the English, Spanish, German and French stop words, loaded on first
+use
+
+The stop words are read from the stop word cache, a text file with one word
+per line, so neither importing this module nor searching needs nltk or
+network access. If the cache file is missing, the words are taken from the
+nltk stopwords corpus, which is downloaded only if it is not installed yet,
+and the cache file is written for the next start.
+"""
+def get_stop_words() -> set[str]:
+    global stop_words
+    if stop_words is None:
+        if os.path.exists(StopWords.CACHE):
+            with open(StopWords.CACHE, encoding="utf-8") as cache:
+                stop_words=set(cache.read().splitlines())
+        else:
+            stop_words=load_nltk_stop_words()
+            try:
+                with open(StopWords.CACHE, "w", encoding="utf-8") as cache:
+                    cache.write("\n".join(sorted(stop_words)) + "\n")
+            except OSError:
+                pass # searching works without the cache, the corpus is read again on the next start
+    return stop_words
+
+def load_nltk_stop_words() -> set[str]:
+    import nltk # imported here: importing nltk takes longer than the rest of the search modules
+    from nltk.corpus import stopwords
+    try:
+        stopwords.words(StopWords.LANGUAGES[0])
+    except LookupError:
+        nltk.download("stopwords")
+    words=set()
+    for language in StopWords.LANGUAGES:
+        words.update(stopwords.words(language))
+    return words
 
 """
 ISBN regex from https://www.oreilly.com/library/view/regular-expressions-cookbook/9780596802837/ch04s13.html
@@ -33,9 +68,9 @@ isbn_pattern=re.compile(isbn_regex)
 Keep only alphanumberic characters in a string. Replace unwanted
 (special) characters with empty string. Leave whitespace.
 """
+alphanum_pattern=re.compile(r"[^A-Za-z0-9 ]+")
 def remove_special_characters(string_to_clean)-> str:
-    alphanum_pattern = r'[^A-Za-z0-9 ]+'
-    cleaned_string = re.sub(alphanum_pattern, "", string_to_clean)
+    cleaned_string = alphanum_pattern.sub("", string_to_clean)
     
     return cleaned_string
 
@@ -49,103 +84,50 @@ def prepare_string(text: str) -> list[str]:
     text=text.strip()
     text=remove_special_characters(text)
     words=text.lower().split()
+    stop_words=get_stop_words()
     filtered_words=[word[:Search.MAX_WORD_LENGTH] for word in words if word not in stop_words and len(word) > 1]
     return filtered_words
 
 """
-Create a simple list from a list of sets
+Return the words of many texts (e.g. all the titles of a catalog), the
+same list for every text as prepare_string returns
+
+The texts are joined with newlines, so the special characters of all of
+them are removed and all of them are lowercased in one pass over one
+string; only splitting the words and removing the stop words is done text
+by text. Stripping is not needed, split drops the whitespace at both ends.
+If a text contains a newline itself, the texts cannot be told apart after
+the join, and every text is prepared on its own instead.
+"""
+line_separated_pattern=re.compile(r"[^A-Za-z0-9 \n]+")
+def prepare_strings(texts: list[str]) -> list[list[str]]:
+    cleaned_texts=line_separated_pattern.sub("", "\n".join(texts)).lower().split("\n")
+    if len(cleaned_texts) != len(texts):
+        return [prepare_string(text) for text in texts]
+    stop_words=get_stop_words()
+    return [[word[:Search.MAX_WORD_LENGTH] for word in cleaned_text.split() if word not in stop_words and len(word) > 1] for cleaned_text in cleaned_texts]
+
+"""
+Split a field scope (title:, author: or publisher:) from the start of a
+search text
 
-Create an new list, iterate over the list of sets
-and create a list of each set, then extend the new 
-list with the list created from the set, resulting
-in the original list of sets to be "flattened" into
-a simple list.
+Returns the field (a BookField constant) and the rest of the text, e.g.
+"author: Amy Tan" -> ("Author", "Amy Tan"). If the text does not start
+with a field scope, the field is None and the text is returned unchanged.
 """
+field_scope_pattern=re.compile(r"^\s*(title|author|publisher)\s*:(.*)$", re.IGNORECASE | re.DOTALL)
+
+def parse_field_scope(text: str) -> tuple[str|None, str]:
+    match=field_scope_pattern.match(text) if type(text) == str else None
+    if match is None:
+        return None, text
+    return match.group(1).capitalize(), match.group(2)
 
 ################################################################################################
 #                                     RESULT PROCESSING AND                                    #
 #                                       RANKING FUNCTIONS                                      #
 ################################################################################################
 
-def unpack_list_of_sets(list_to_unpack: list[set]) -> list:
-    elements=[]
-    if not list_to_unpack:
-        return elements
-    for set_in_list in list_to_unpack:
-        list_to_add=[x for x in set_in_list]
-        elements.extend(list_to_add)
-    return elements
-
-"""
-Find all elements in a group of sets that are in any of the
-intersections of the group, except the intersection of all groups
-
-Create all possible combinations of a group of sets with a given
-grouping size (2,3,4 etc.). In each group of sets, find all the
-elements that are in the intersections of these sets and deduct
-the elements that are in the mutual intersection of all sets 
-(non_unique_elements) - this is to avoid repeating these elements 
-several times. 
-Example: in a list of four sets where the sets are A, B, C, D, group 
-the sets in pairs and find the elements in their intersection. The pairs 
-will be AB, AC, AD, BC, BD, and CD. When finding the elements in the 
-intersection of these set pairs, the elements that are in the intersection 
-of ABCD would be repeated 6 times, which is why they are removed. The same 
-logic is used for groups of 3, 4 etc. sets.  
-"""
-def elements_in_intersections(list_of_sets: list[set], grouping_size: int, non_unique_elements: set) -> list[set]:
-    elements=[]
-    if not list_of_sets or grouping_size < 2:
-        return elements
-    set_groups=combinations(list_of_sets, grouping_size)
-    for set_group in set_groups:
-        elements.append(set.intersection(*set_group)-non_unique_elements)
-        elements=[x for x in elements if x] # remove empty sets
-    return elements
-
-"""
-Find all elements in all possible intersections of a list of sets
-
-Create a list that contains all elements in a list of sets that are repeated
-in more than one set, in other words that are in the intersection of two or
-more sets. Sets are examined in groups, where the size of the groups starts
-from the number of sets - 1 to 2 (so for a list of 5 sets, from 4 to 2). The
-intersection of all groups in the list is treated separately to avoid repetition
-of the elements in that intersection. The elements are added in descending
-order depending on how many intersections they appeared in, so the ones
-that are in the intersection of all sets are added first, then the ones that
-appear in the intersection  of len(list_of_sets)-1 number of sets etc. with the
-ones appearing in the intersection of two sets being added last. 
-"""
-def find_all_elements_in_intersections(list_of_sets: list[set]) -> list[set]:
-    all_intersection_elements=[]
-    if not list_of_sets:
-        return all_intersection_elements
-    intersection_of_all_sets=set.intersection(*list_of_sets)
-    all_intersection_elements.append(intersection_of_all_sets)
-    grouping_size=len(list_of_sets)-1
-    while grouping_size >= 2:
-        all_intersection_elements.extend(elements_in_intersections(list_of_sets, grouping_size, intersection_of_all_sets))
-        grouping_size -= 1
-    all_intersection_elements=[x for x in all_intersection_elements if x]
-    return all_intersection_elements
-
-"""
-Find all elements that are not in an intersection 
-
-Takes the union of all sets in a list and removes the elements that are in the
-intersection of any number of the sets.
-"""
-
-def find_all_set_differences(list_of_sets: list[set], all_elements_in_intersections: list) -> set[str]:
-    diffs = []
-    if not list_of_sets:
-        return diffs
-    differences=set.union(*list_of_sets)
-    differences.difference_update(all_elements_in_intersections)
-    diffs=list(differences)
-    return diffs
-
 """
 Create a list that contains the result ISBNs in descending order of relevance
 
@@ -163,53 +145,30 @@ the intersection of at least two, but not all sets, and finally
 those that only appear in one set. In case all sets are disjoint,
 all search results will be considered of equal relevance. 
 
+Instead of intersecting every combination of the sets (which takes
+exponential time in the number of sets), the sets the ISBN appears
+in are counted in one pass over all sets, and the ISBNs are put in a
+bucket per count. The buckets are then emptied from the highest count
+(the intersection of all sets) to 1 (the ISBNs that only appear in one
+set), so the ranking takes time linear in the total size of the sets.
+Every ISBN appears once in the ranked list, and ISBNs with the same count
+keep the order they were first seen in.
 """
 def rank_results(results: list[set]) -> list[str|int]:
     ranked_results=[]
     if not results:
         return ranked_results
-    all_elements_in_intersections=unpack_list_of_sets(find_all_elements_in_intersections(results))
-    ranked_results.extend(all_elements_in_intersections)
-    ranked_results.extend(find_all_set_differences(results, all_elements_in_intersections))
+    counts={}
+    for result_set in results:
+        for element in result_set:
+            counts[element]=counts.get(element, 0) + 1
+    buckets=[[] for _ in range(len(results) + 1)] # buckets[count] holds the elements that are in count sets
+    for element, count in counts.items():
+        buckets[count].append(element)
+    for bucket in reversed(buckets):
+        ranked_results.extend(bucket)
     return ranked_results
 
-"""
-Return ISBNs of matching books in ascending order of edit distance and occurrence
-
-Gets the ISBN numbers corresponding to the matched words in the result dictionary. 
-The ISBNs are retrieved from the search_index in the form of a list of sets. The 
-list of sets are then passed to a function that ranks the ISBN numbers according 
-to how many times they appear, using the relationship (intersection and difference) 
-between the sets. The ranked list of ISBNS are the added to the final list where
-the most relevant results will be at the front of the list. The most relevant results
-will be the ISBNs that corresponded to words with the lowest edit distance to the 
-search term and possibly appeared more than once in the results list. For example, 
-if the search term was 'Harry Potter', the most relevant result (ISBN) would be the 
-one that includes both words with 0 edit distance, followed by results that match 
-either 'Harry' or 'Potter' with 0 edit distance but not both, or match one with 0 
-edit distance and the other with 1 or 2 edit distance and so on, until the results 
-only contain a match for one of the words with an edit distance of 2. 
-"""
-
-def order_results(results: dict[int, str], search_index: dict[str, set[str]]) -> list[str]:
-    ordered_results=[]
-    if not results or not search_index:
-        return ordered_results
-    edit_distances=list(results.keys())
-    if 0 in edit_distances:
-        dist0=[search_index[res] for res in results[0]]
-        ranked0=rank_results(dist0)
-        ordered_results.extend(ranked0)
-    if 1 in edit_distances:
-        dist1=[search_index[res] for res in results[1]]
-        ordered_results.extend(unpack_list_of_sets(dist1))
-    if 2 in edit_distances:
-        dist2=[search_index[res] for res in results[2]]
-        ordered_results.extend(unpack_list_of_sets(dist2))
-    
-    return ordered_results
-
-
 ################################################################################################
 #                                          WORD SEARCH                                         #
 #                                         'IN' OPERATOR                                        #
@@ -229,19 +188,30 @@ and author info as keys and sets of ISBNS as values. The source list is the list
 the keys of the search index, sorted by string length. The source list is sliced based on the
 length of the search term - words shorter than the search term are omitted as they would not
 result in a match. 
-"""
-def search_single_match(search_index: dict[str, set[str]], search_source:list[str], term_to_find: str, presenter: Presenter, search_info_key: tuple[tuple[str], SearchType]) -> list[set]:
+If a substring matcher is given (e.g. the substring_matches method of a trigram index of the
+index words), it is used to find the matching words instead of scanning the source list. It
+returns the words that contain the term in the order of the source list.
+If the source is a Vocabulary (the length buckets of a catalog), the words that are long
+enough are taken as a view of it instead of a binary search and a slice.
+Nothing is matched if the token of the search has been cancelled.
+"""
+def search_single_match(search_index: dict[str, set[str]], search_source:list[str]|Vocabulary, term_to_find: str, presenter: Presenter, search_info_key: tuple[tuple[str], SearchType], substring_matcher: Callable[[str], list[str]]|None=None, token: CancellationToken|None=None) -> list[set]:
     matched_words=[]
     result_sets=[]
-    if not search_index or not term_to_find or type(term_to_find) != str or not search_source or not presenter or not search_info_key:
+    if not search_index or not term_to_find or type(term_to_find) != str or not search_source or not presenter or not search_info_key or is_cancelled(token):
         return result_sets
-    start_index=binary_search.binary_search_by_string_length(search_source, len(term_to_find))
-    if start_index > 0 :
-        search_source_slice=search_source[start_index:]
+    if substring_matcher:
+        matched_words=substring_matcher(term_to_find)
+    elif isinstance(search_source, Vocabulary):
+        matched_words=[word for word in search_source.length_range(len(term_to_find)) if term_to_find in word]
     else:
-        search_source_slice=search_source
-    matched_words=[word for word in search_source_slice if term_to_find in word] # add matching words from the index_words list if the 
-                                                                         # search term matches the full length of the word of is a substring of the word
+        start_index=binary_search.binary_search_by_string_length(search_source, len(term_to_find))
+        if start_index > 0 :
+            search_source_slice=search_source[start_index:]
+        else:
+            search_source_slice=search_source
+        matched_words=[word for word in search_source_slice if term_to_find in word] # add matching words from the index_words list if the 
+                                                                             # search term matches the full length of the word of is a substring of the word
     presenter.search_info[search_info_key].setdefault(SearchInfo.MATCHED_STRINGS, list()).extend(matched_words)
     result_sets=[search_index[match] for match in matched_words] # results in a list of sets, which are values of the keys (matched words) of the 
                                                                          # inverted_index and contain the ISBNs of the matched books
@@ -250,15 +220,18 @@ def search_single_match(search_index: dict[str, set[str]], search_source:list[st
 """
 Repeatdly run the search_single_match function to search
 for each search term, if the search term was an expression
-that consists of multiple words
+that consists of multiple words, until the token of the search is
+cancelled
 """
 
-def search_multiple_matches(search_index: dict[str, set[str]], search_source: list[str], terms_to_find: list, presenter: Presenter, search_info_key: tuple[tuple[str], SearchType]) -> list[set]:
+def search_multiple_matches(search_index: dict[str, set[str]], search_source: list[str]|Vocabulary, terms_to_find: list, presenter: Presenter, search_info_key: tuple[tuple[str], SearchType], substring_matcher: Callable[[str], list[str]]|None=None, token: CancellationToken|None=None) -> list[set]:
     results=[]
     if not search_index or not terms_to_find:
         return results
     for term in terms_to_find:
-        results.extend(search_single_match(search_index, search_source, term, presenter, search_info_key))
+        if is_cancelled(token):
+            break
+        results.extend(search_single_match(search_index, search_source, term, presenter, search_info_key, substring_matcher, token))
     return results
 
 
@@ -307,26 +280,78 @@ ranging from 2 characters shorter to 2 characters longer in length than
 the search term. 
 Matching words are added to a dictionary, where the keys are integers 
 representing the edit distance. The search stops after finding 100
-results (defined as a constant).
-"""
-def search_by_levenshtein_distance(source: list[str], presenter: Presenter, search_info_key: tuple[tuple[str], SearchType]) -> dict[int, str]:   
+results (defined as a constant). The distances of a term to all the words
+of the slice are calculated in one batch with the bit-parallel algorithm
+(see myers.MyersPattern), which prepares the term once for all the words.
+If the source is a Vocabulary, the words within the length window are taken
+as a view of it instead of being sliced out of the list.
+If a parallel search of the vocabulary is given (see
+parallel_search.ParallelLevenshtein), the distances of all the terms are
+calculated by its worker processes; the results are the same.
+The token of the search is checked before the batch of each term; once it
+is cancelled, only the words matched so far are returned.
+"""
+def search_by_levenshtein_distance(source: list[str]|Vocabulary, presenter: Presenter, search_info_key: tuple[tuple[str], SearchType], parallel_levenshtein: ParallelLevenshtein|None=None, token: CancellationToken|None=None) -> dict[int, str]:   
     results={}
     if not source or not presenter or not search_info_key:
         return results    
     search_terms=search_info_key[0]
+    source_slices=[]
     for word in search_terms:
-        source_slice=slice_list_for_levenshtein_search(source, len(word)) if len(word) > Search.LEVENSHTEIN_MAX_DISTANCE else source
+        if isinstance(source, Vocabulary):
+            source_slices.append(source.length_range(len(word) - Search.LEVENSHTEIN_MAX_DISTANCE, len(word) + Search.LEVENSHTEIN_MAX_DISTANCE))
+        else:
+            source_slices.append(slice_list_for_levenshtein_search(source, len(word)) if len(word) > Search.LEVENSHTEIN_MAX_DISTANCE else source)
+    if parallel_levenshtein is not None:
+        all_distances=parallel_levenshtein.distances(list(zip(search_terms, source_slices)), Search.LEVENSHTEIN_MAX_DISTANCE, token)
+    else:
+        all_distances=[]
+        for word, source_slice in zip(search_terms, source_slices):
+            if is_cancelled(token):
+                break
+            all_distances.append(MyersPattern(word).distances(source_slice, Search.LEVENSHTEIN_MAX_DISTANCE))
+    for source_slice, distances in zip(source_slices, all_distances):
+        if is_cancelled(token):
+            break
         count=0
-        for source_word in source_slice:
+        for source_word, dist in zip(source_slice, distances):
             if count > Search.MAX_RESULT_COUNT:
                 break
-            dist = levenshtein_distance(source_word, word)
-            if dist < 3:
+            if dist <= Search.LEVENSHTEIN_MAX_DISTANCE:
                 results.setdefault(dist, list()).append(source_word)
                 presenter.search_info[search_info_key].setdefault(SearchInfo.MATCHED_STRINGS, list()).append(source_word)
                 count += 1
     return results
 
+"""
+Return the words that match the search term(s) within the maximum
+Levenshtein distance, found with a word matcher instead of a scan
+
+A word matcher (e.g. the search method of a BK-tree of the index words)
+takes a word and a maximum distance and returns the matching words
+grouped by their distance, e.g. {0: ["reality"], 2: ["realty"]}. The
+matches of each term are taken in ascending order of distance, up to the
+same number of results per term as in search_by_levenshtein_distance, and
+are returned in the same shape, ready for ResultPages. The terms after
+the token of the search is cancelled are not matched.
+"""
+def search_with_word_matcher(word_matcher: Callable[[str, int], dict[int, list[str]]], presenter: Presenter, search_info_key: tuple[tuple[str], SearchType], token: CancellationToken|None=None) -> dict[int, list[str]]:
+    results={}
+    if not word_matcher or not presenter or not search_info_key:
+        return results
+    for word in search_info_key[0]:
+        if is_cancelled(token):
+            break
+        count=0
+        for dist, matched_words in sorted(word_matcher(word, Search.LEVENSHTEIN_MAX_DISTANCE).items()):
+            for matched_word in matched_words:
+                if count > Search.MAX_RESULT_COUNT:
+                    break
+                results.setdefault(dist, list()).append(matched_word)
+                presenter.search_info[search_info_key].setdefault(SearchInfo.MATCHED_STRINGS, list()).append(matched_word)
+                count += 1
+    return results
+
 
 
 
@@ -342,9 +367,15 @@ rank the results, return list with the info of all matching books
 
 Prepare the search term by removing all unwanted characters and words. If 
 the search term is only one word, search for a single match. If there are
-more words, search for multiple matches. 
-"""
-def search_all_with_in_operator(search_index: dict[str, set[str]], search_source: list[str], presenter: Presenter, search_info_key: tuple[tuple[str], SearchType]) -> None:
+more words, search for multiple matches. A substring matcher can be given to find the
+matching words without scanning the search source (see search_single_match).
+The results are not ranked all at once: they are stored as result pages
+(ranked like rank_results, every ISBN once) and only the first page is
+taken and prepared for presentation.
+If the token of the search is cancelled, the search stops after the term
+it is matching and the results are neither ranked nor prepared.
+"""
+def search_all_with_in_operator(search_index: dict[str, set[str]], search_source: list[str]|Vocabulary, presenter: Presenter, search_info_key: tuple[tuple[str], SearchType], substring_matcher: Callable[[str], list[str]]|None=None, token: CancellationToken|None=None) -> None:
     if not search_index:
         search_index={}
     if not search_source:
@@ -360,13 +391,14 @@ def search_all_with_in_operator(search_index: dict[str, set[str]], search_source
     search_terms=search_info_key[0]
     if search_terms[0] != " ":
         if len(search_terms) == 1:
-            results=search_single_match(search_index, search_source, search_terms[0], presenter, search_info_key)
-            results=unpack_list_of_sets(results)
-            presenter.search_info[search_info_key][SearchInfo.RESULTS].extend(results) 
+            results=search_single_match(search_index, search_source, search_terms[0], presenter, search_info_key, substring_matcher, token)
         else:
-            results=search_multiple_matches(search_index, search_source, search_terms, presenter, search_info_key)
-            ranked_results=rank_results(results)
-            presenter.search_info[search_info_key].setdefault(SearchInfo.RESULTS, list()).extend(ranked_results)           
+            results=search_multiple_matches(search_index, search_source, search_terms, presenter, search_info_key, substring_matcher, token)
+        if is_cancelled(token):
+            return
+        result_pages=ResultPages([results])
+        presenter.search_info[search_info_key][SearchInfo.PAGES]=result_pages
+        presenter.search_info[search_info_key][SearchInfo.RESULTS].extend(result_pages.page(0))
     presenter.prepare_results_for_presentation(search_info_key)
         
 """
@@ -376,9 +408,17 @@ Calls functions that perfomr the search and organise the results into order of r
 Handles the presenter instance and initialises and modifies its structures in a way that
 it will either hold the results, search terms and matched words or hold empty data structures
 in case of errors or no results.
+If a word matcher is given (see search_with_word_matcher), it is used to
+find the matching words instead of scanning the search source. Otherwise
+the scan uses the worker processes of a parallel search if one is given.
+The results are stored as result pages, one tier per edit distance (see
+result_pages.ResultPages), and only the first page is taken and prepared
+for presentation.
+If the token of the search is cancelled, the search stops after the term
+it is matching and the results are neither ranked nor prepared.
 """       
 
-def search_all_with_levenshtein_distance(search_index: dict[str, set[str]], search_source: list[str], presenter: Presenter, search_info_key: tuple[tuple[str], SearchType]) -> None:    
+def search_all_with_levenshtein_distance(search_index: dict[str, set[str]], search_source: list[str]|Vocabulary, presenter: Presenter, search_info_key: tuple[tuple[str], SearchType], word_matcher: Callable[[str, int], dict[int, list[str]]]|None=None, parallel_levenshtein: ParallelLevenshtein|None=None, token: CancellationToken|None=None) -> None:    
     if not search_index:
         search_index={}
     if not search_source:
@@ -391,9 +431,15 @@ def search_all_with_levenshtein_distance(search_index: dict[str, set[str]], sear
         presenter=Presenter({search_info_key: dict()}, dict(), use_gui=True)
     presenter.search_info[search_info_key].setdefault(SearchInfo.MATCHED_STRINGS, list())
     presenter.search_info[search_info_key].setdefault(SearchInfo.RESULTS, list())
-    results=search_by_levenshtein_distance(search_source, presenter, search_info_key)
-    ordered_results=order_results(results, search_index)
-    presenter.search_info[search_info_key][SearchInfo.RESULTS].extend(ordered_results)
+    if word_matcher:
+        results=search_with_word_matcher(word_matcher, presenter, search_info_key, token)
+    else:
+        results=search_by_levenshtein_distance(search_source, presenter, search_info_key, parallel_levenshtein, token)
+    if is_cancelled(token):
+        return
+    result_pages=ResultPages([search_index[word] for word in results[edit_distance]] for edit_distance in sorted(results) if search_index)
+    presenter.search_info[search_info_key][SearchInfo.PAGES]=result_pages
+    presenter.search_info[search_info_key][SearchInfo.RESULTS].extend(result_pages.page(0))
     presenter.prepare_results_for_presentation(search_info_key)
     
 
@@ -430,6 +476,34 @@ def year_search(year_index: dict[str, str], presenter: Presenter, search_info_ke
         
         
 
+"""
+Get the info of all books published within a range of years
+
+The search terms of the search_info_key are the first and last year of
+the range as strings (both inclusive), an empty string stands for an open
+end, e.g. ("1995", "2002") or ("", "1979"). The ISBNs are taken from the
+sorted year index in ascending order of year, and the number of books per
+year is stored with the results so it can be shown next to them. The years
+that had books are the matched strings.
+"""
+def year_range_search(sorted_year_index: SortedYearIndex, presenter: Presenter, search_info_key: tuple[tuple[str], SearchType]) -> None:
+    if not search_info_key:
+        search_info_key=tuple(" ",)
+        if presenter:
+            presenter.search_info.setdefault(search_info_key, dict())
+    if not presenter:
+        presenter=Presenter({search_info_key: dict()}, dict(), use_gui=True)
+    presenter.search_info[search_info_key].setdefault(SearchInfo.MATCHED_STRINGS, list())
+    presenter.search_info[search_info_key].setdefault(SearchInfo.RESULTS, list())
+    presenter.search_info[search_info_key].setdefault(SearchInfo.FACETS, dict())
+    if sorted_year_index is not None and search_info_key[0][0] != " " and len(search_info_key[0]) == 2:
+        start, end=[int(year) if year else None for year in search_info_key[0]]
+        facets=sorted_year_index.facet_counts(start, end)
+        presenter.search_info[search_info_key][SearchInfo.RESULTS].extend(sorted_year_index.isbns_in_range(start, end))
+        presenter.search_info[search_info_key][SearchInfo.MATCHED_STRINGS].extend(str(year) for year in facets)
+        presenter.search_info[search_info_key][SearchInfo.FACETS].update(facets)
+    presenter.prepare_results_for_presentation(search_info_key)
+
 """
 Get the info of all matching books with a given (partial) ISBN as a list of strings
 
@@ -439,26 +513,39 @@ there are a lot of ISBNS with 9 characters in the datasets), perform
 exact matching with binary search. If there is a match (or multiple matches in case
 of partial match, but it is unlikely), use the ISBN(s) to create a list of strings that contain the book
 info for the ISBN number(s).
+If the ISBN index of the catalog (Catalog.isbn_index) is given, the partial match uses its
+digit n-grams and the exact match its ISBN-13 forms, so an ISBN-10 also finds the book stored
+under its ISBN-13 and the other way around, and leading zeros and hyphens do not matter.
 """
-def isbn_search(presenter: Presenter, search_info_key: tuple[tuple[str],SearchType]) -> None:
+def isbn_search(presenter: Presenter, search_info_key: tuple[tuple[str],SearchType], isbn_index: IsbnIndex|None=None) -> None:
     if not search_info_key:
         search_info_key=tuple(" ",)
         if presenter:
             presenter.search_info.setdefault(search_info_key, dict())
     if not presenter:
         presenter=Presenter({search_info_key: dict()}, dict(), use_gui=True)
-    isbns=list(presenter.books.keys())
-    isbns.sort()
     isbn=search_info_key[0][0]
     presenter.search_info[search_info_key].setdefault(SearchInfo.MATCHED_STRINGS, list())
     presenter.search_info[search_info_key].setdefault(SearchInfo.RESULTS, list())
+    if isbn_index is not None:
+        if len(isbn) >= 4 and len(isbn) < 9:
+            isbns=isbn_index.partial_matches(isbn)
+        elif len(isbn) >= 9:
+            isbns=isbn_index.exact_matches(isbn)
+        else:
+            isbns=[]
+        presenter.search_info[search_info_key][SearchInfo.RESULTS].extend(isbns)
+        presenter.search_info[search_info_key][SearchInfo.MATCHED_STRINGS].extend(isbns)
+        presenter.prepare_results_for_presentation(search_info_key)
+        return
+    isbns=sorted(presenter.books.keys())
     if len(isbn) >= 4 and len(isbn) < 9:
         isbns=[x for x in isbns if isbn in x] 
         presenter.search_info[search_info_key][SearchInfo.RESULTS].extend(isbns)
         presenter.search_info[search_info_key][SearchInfo.MATCHED_STRINGS].extend(isbns)       
     elif len(isbn) >=9:
     #   if books.get(isbn) is not None:
-        if binary_search.binary_search(isbns, isbn)==Result.MATCH_FOUND:
+        if binary_search.find(isbns, isbn) != Result.NOT_FOUND:
             presenter.search_info[search_info_key][SearchInfo.RESULTS].append(isbn)
             presenter.search_info[search_info_key][SearchInfo.MATCHED_STRINGS].append(isbn)         
     presenter.prepare_results_for_presentation(search_info_key)
@@ -0,0 +1,150 @@
+from __future__ import annotations
+import multiprocessing
+import os
+from concurrent.futures import CancelledError, Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from cancellation import CancellationToken, is_cancelled
+from myers import MyersPattern
+from vocabulary import Vocabulary, WordView
+from constants import *
+
+"""
+Linear Levenshtein search spread over several processes
+
+A linear scan compares a search term with every word of a similar length,
+which keeps one core busy while the others are idle. The words of the
+length window of a term are split into shards (consecutive parts of the
+window), and the distances of every shard are calculated by a worker
+process. The shards of all the terms of a query are handed out together,
+so a query of several words uses the workers for both its terms and its
+shards.
+
+The workers are started when the parallel search is created and each
+receives the word list of the vocabulary once, so a search only sends the
+term and the start and end of a shard to a worker, and receives one byte
+per word (the distance, at most max_distance + 1). The distances of the
+shards are joined in the order of the shards, which gives exactly the list
+the scan in one process would calculate, so the results do not depend on
+the number of workers or on which worker finishes first.
+
+The workers hold the words of one version of the catalog; a new parallel
+search has to be created after the words change.
+
+The workers are started with the forkserver start method (spawn where
+there is no forkserver), never by forking the process that searches: that
+process runs the Tk main loop and the search threads of the windows, and
+the parallel search is created while the catalog lock is held, so a forked
+copy could start with locks that no thread will ever release. An edit or a
+reload closes the parallel search while other searches may still wait for
+its workers; the shards that were cancelled are calculated in the
+searching process instead, so those searches still finish.
+"""
+worker_words=[] # the words of the vocabulary, set in every worker process
+
+def init_worker(words: list[str]) -> None:
+    global worker_words
+    worker_words=words
+
+def worker_pid(_: int) -> int:
+    return os.getpid()
+
+def shard_distances(term: str, start: int, stop: int, max_distance: int) -> bytes:
+    return bytes(MyersPattern(term).distances(WordView(worker_words, start, stop), max_distance))
+
+"""
+Return the multiprocessing context the worker processes are started with
+"""
+def worker_context() -> multiprocessing.context.BaseContext:
+    return multiprocessing.get_context("forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn")
+
+class ParallelLevenshtein():
+    def __init__(self, vocabulary: Vocabulary, workers: int|None=None, min_shard_size: int=Parallel.MIN_SHARD_SIZE):
+        self.__vocabulary=vocabulary
+        self.__workers=workers if workers is not None else os.cpu_count() or 1
+        self.__min_shard_size=min_shard_size
+        self.__executor=ProcessPoolExecutor(self.__workers, mp_context=worker_context(), initializer=init_worker, initargs=(vocabulary.words,))
+        list(self.__executor.map(worker_pid, range(self.__workers))) # starts the workers now, not with the first search
+
+    @property
+    def vocabulary(self) -> Vocabulary:
+        return self.__vocabulary
+
+    @property
+    def workers(self) -> int:
+        return self.__workers
+
+    """
+    Return the limits (start, stop) of the shards of a part of the word
+    list: as many shards as there are workers, but none smaller than
+    min_shard_size words
+    """
+    def shards(self, start: int, stop: int) -> list[tuple[int, int]]:
+        count=max(1, min(self.__workers, (stop - start) // self.__min_shard_size))
+        limits=[start + (stop - start) * shard // count for shard in range(count + 1)]
+        return list(zip(limits, limits[1:]))
+
+    """
+    Return the Levenshtein distances of every term and the words of its
+    view of the vocabulary, in the order of the terms and of the words
+
+    Distances above max_distance are returned as max_distance + 1. Views of
+    other word lists, and views smaller than one shard, are calculated in
+    this process, and so are the shards the workers cannot calculate
+    because the parallel search was closed.
+    If the token is cancelled, the shards that have not started are
+    cancelled and only the distances of the terms before it are returned.
+    """
+    def distances(self, terms_and_views: list[tuple[str, WordView]], max_distance: int, token: CancellationToken|None=None) -> list[list[int]]:
+        shard_futures=[] # for every term its shards and their futures, or None if it is calculated here
+        for term, view in terms_and_views:
+            if isinstance(view, WordView) and view.source is self.__vocabulary.words and len(view) >= self.__min_shard_size:
+                shard_futures.append([(start, stop, self.__submit(term, start, stop, max_distance)) for start, stop in self.shards(view.start, view.stop)])
+            else:
+                shard_futures.append(None)
+        distances=[]
+        for (term, view), futures in zip(terms_and_views, shard_futures):
+            if is_cancelled(token):
+                for futures_of_term in shard_futures:
+                    for _, _, future in futures_of_term or []:
+                        if future is not None:
+                            future.cancel()
+                break
+            if futures is None:
+                distances.append(MyersPattern(term).distances(view, max_distance))
+            else:
+                distances.append(list(b"".join(self.__shard_result(term, start, stop, max_distance, future) for start, stop, future in futures)))
+        return distances
+
+    """
+    Hand a shard to the workers. Returns None if the parallel search has
+    been closed.
+    """
+    def __submit(self, term: str, start: int, stop: int, max_distance: int) -> Future|None:
+        try:
+            return self.__executor.submit(shard_distances, term, start, stop, max_distance)
+        except (RuntimeError, BrokenProcessPool): # shut down
+            return None
+
+    """
+    Return the distances of a shard from its future, or calculate them in
+    this process if the shard was not handed out or was cancelled
+    """
+    def __shard_result(self, term: str, start: int, stop: int, max_distance: int, future: Future|None) -> bytes:
+        if future is not None:
+            try:
+                return future.result()
+            except (CancelledError, BrokenProcessPool):
+                pass
+        return bytes(MyersPattern(term).distances(WordView(self.__vocabulary.words, start, stop), max_distance))
+
+    """
+    Stop the worker processes
+    """
+    def close(self) -> None:
+        self.__executor.shutdown(wait=False, cancel_futures=True)
+
+    def __enter__(self) -> ParallelLevenshtein:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -0,0 +1,54 @@
+import os
+from time import perf_counter
+from catalog import Catalog
+from levenshtein_time import create_misspelled_terms
+from new_search_util import search_by_levenshtein_distance
+from parallel_search import ParallelLevenshtein
+from presenter import Presenter
+from vocabulary import Vocabulary
+from constants import *
+
+"""
+Compare the linear Levenshtein scan in one process with the scan spread
+over 1 to os.cpu_count() worker processes
+
+Every search of the benchmark has several terms, so the workers get the
+shards of all the terms of a query at the same time. The shards are made
+small enough for every worker to get a part of every term, and the results
+of every number of workers are compared with the results of the scan in
+one process.
+"""
+def create_queries(terms: list[str], words_per_query: int) -> list[tuple[str]]:
+    return [tuple(terms[i:i+words_per_query]) for i in range(0, len(terms), words_per_query)]
+
+"""
+Run every query and return the average time per query in milliseconds
+together with the results
+"""
+def time_queries(search_source: Vocabulary, queries: list[tuple[str]], parallel_levenshtein: ParallelLevenshtein|None=None) -> tuple[float, list[dict[int, list[str]]]]:
+    results=[]
+    start=perf_counter()
+    for terms in queries:
+        search_info_key=(terms, SearchType.LEVENSHTEIN)
+        presenter=Presenter({search_info_key: dict()}, dict(), use_gui=False)
+        results.append(search_by_levenshtein_distance(search_source, presenter, search_info_key, parallel_levenshtein))
+    return (perf_counter() - start) * 1000 / len(queries), results
+
+
+if __name__=="__main__":
+    words_per_query=4
+    paths=[BookData.TEN_K] + ([BookData.HUNDRED_K] if os.path.exists(BookData.HUNDRED_K) else [])
+    for path in paths:
+        catalog=Catalog(path, path, compact=path == BookData.HUNDRED_K)
+        vocabulary=catalog.vocabulary()
+        queries=create_queries(create_misspelled_terms(vocabulary.words, 40 * words_per_query), words_per_query)
+        sequential_time, sequential_results=time_queries(vocabulary, queries)
+        print(f"{path}: {len(vocabulary)} words, {len(queries)} queries of {words_per_query} misspelled terms")
+        print(f"    one process {sequential_time:.2f} ms/query")
+        for workers in range(1, (os.cpu_count() or 1) + 1):
+            start=perf_counter()
+            with ParallelLevenshtein(vocabulary, workers, min_shard_size=500) as parallel_levenshtein:
+                start_time=perf_counter() - start
+                parallel_time, parallel_results=time_queries(vocabulary, queries, parallel_levenshtein)
+            print(f"    {workers} worker(s) {parallel_time:.2f} ms/query (speedup {sequential_time / parallel_time:.1f}x), "
+                  f"started in {start_time:.2f}s, same results: {parallel_results == sequential_results}")
@@ -1,5 +1,9 @@
-from tkinter import *
-from tkinter.font import Font
+from __future__ import annotations
+try:
+    from tkinter import *
+    from tkinter.font import Font
+except ImportError: # Python without Tk: searches still run (use_gui=False), results cannot be shown on the screen
+    pass
 from constants import *
 
 """
@@ -17,7 +21,9 @@ class Presenter():
     is referred to as "search_info_key" throughout the program. The
     search_info_key contains two elements: an inner tuple that contains
     the relevant words of the search term, and the SearchType constant. These
-    combined sufficiently identify a search. The dictionary identified by 
+    combined sufficiently identify a search. A word search that is restricted
+    to one field (e.g. author: Amy Tan) has the field as a third element, e.g.
+    (("amy", "tan"), SearchType.LEVENSHTEIN, "Author"). The dictionary identified by 
     the search_info_key holds the matched words, results (ISBNs of matched
     books) and matched book info related to the search. A simple example of
     a search_info dictionary after a word search: 
@@ -57,6 +63,13 @@ class Presenter():
             }
     }
 
+    Results are shown one page (Search.PAGE_SIZE books) at a time, so the
+    matched book info only holds the books of the pages shown so far. A word
+    search does not rank all of its results either: it stores a ResultPages
+    object under SearchInfo.PAGES, and the results list only holds the pages
+    that have been taken from it. Year and ISBN searches have all of their
+    results in the results list, which are formatted a page at a time.
+
     The use_gui property was added when the declaration of font types caused issues
     in unit testing. It is set to False when using a presenter object within a unit 
     test.
@@ -163,18 +176,60 @@ class Presenter():
 
     """
     Take the results from the search function and prepare the book info to be added to the text widgets 
+
+    Only the next page of results that have not been prepared yet is formatted.
     """
     def prepare_results_for_presentation(self, search_info_key: tuple[tuple[str], SearchType] ) -> None:
         isbns=self.__search_info.get(search_info_key).get(SearchInfo.RESULTS)
         self.__search_info[search_info_key].setdefault(SearchInfo.MATCHED_BOOK_INFO, list())
         if isbns:
-            for isbn in isbns:
+            start=len(self.__search_info[search_info_key][SearchInfo.MATCHED_BOOK_INFO])
+            for isbn in isbns[start:start + Search.PAGE_SIZE]:
                 book_to_add=[]
                 book_to_add.append("ISBN: " + isbn)
                 for k, v in self.books[isbn].items():
                     book_to_add.append(k + ": " + v)
                 
                 self.__search_info[search_info_key][SearchInfo.MATCHED_BOOK_INFO].append(book_to_add)
+
+    """
+    Return True if a search has results that have not been prepared yet
+    """
+    def has_next_page(self, search_info_key: tuple[tuple[str], SearchType]) -> bool:
+        search_info=self.__search_info.get(search_info_key, dict())
+        pages=search_info.get(SearchInfo.PAGES)
+        result_count=len(search_info.get(SearchInfo.RESULTS, []))
+        if result_count > len(search_info.get(SearchInfo.MATCHED_BOOK_INFO, [])):
+            return True
+        return pages is not None and result_count < len(pages)
+
+    """
+    Prepare the next page of results and return its book info
+
+    If all the results taken from the result pages of a word search have
+    been prepared, the next page is taken (ranked) first. The results list
+    of the presenter says how many pages it has taken, so presenters that
+    share the result pages of a cached search page through them on their
+    own.
+    """
+    def next_page(self, search_info_key: tuple[tuple[str], SearchType]) -> list[list[str]]:
+        search_info=self.__search_info[search_info_key]
+        isbns=search_info.setdefault(SearchInfo.RESULTS, list())
+        matched_book_info=search_info.setdefault(SearchInfo.MATCHED_BOOK_INFO, list())
+        shown_count=len(matched_book_info)
+        pages=search_info.get(SearchInfo.PAGES)
+        if len(isbns) <= shown_count and pages is not None:
+            isbns.extend(pages.isbns(len(isbns), len(isbns) + pages.page_size))
+        self.prepare_results_for_presentation(search_info_key)
+        return matched_book_info[shown_count:]
+
+    """
+    Create a summary line of the number of books per year, e.g.
+    "Books per year: 1995 (12), 1996 (30)"
+    """
+    def format_facets(self, facets: dict[int, int]) -> str:
+        return "Books per year: " + ", ".join(f"{year} ({count})" for year, count in facets.items())
+
     """
     Take prepared book info and call function to add it to screen
     """
@@ -185,5 +240,16 @@ class Presenter():
             self.__search_info[search_info_key][SearchInfo.MATCHED_BOOK_INFO].append(no_book) # store for future display
             self.init_result_text(frame, no_book, search_info_key)
         else:
+            facets=self.__search_info[search_info_key].get(SearchInfo.FACETS)
+            if facets:
+                self.init_result_text(frame, [self.format_facets(facets)], search_info_key)
             for book in matched_book_info:
                 self.init_result_text(frame, book, search_info_key)
+
+    """
+    Prepare the next page of results and add it to the screen below the
+    results that are already shown
+    """
+    def next_page_to_screen(self, frame: Frame, search_info_key: tuple[tuple[str], SearchType]) -> None:
+        for book in self.next_page(search_info_key):
+            self.init_result_text(frame, book, search_info_key)
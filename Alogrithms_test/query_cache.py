@@ -0,0 +1,159 @@
+from __future__ import annotations
+import sys
+import threading
+from collections import OrderedDict
+from result_pages import ResultPages
+from constants import *
+
+"""
+Process-wide cache of search results, shared by all book search windows
+
+A search is identified by the name and version of the searched catalog and
+its search_info_key, and the cache holds the search info dictionary the
+presenter filled for it (results, matched strings, matched book info, result
+pages, facets). A window that runs a search that any window has run before
+on the same version of the catalog takes the cached search info instead of
+searching again.
+
+Presenters add the pages they show to the results and matched book info of
+their search info, so the cache keeps its own copy of these two lists and
+every get returns new copies of them (see copy_search_info): the pages one
+window shows never change the search info of another window. The result
+pages are shared, they are addressed by page number and hold no position
+of their own.
+
+The cache holds at most max_entries searches and about max_bytes of search
+info. It is ordered from the least to the most recently used search, and the
+least recently used searches are dropped when either limit is exceeded. A
+search that is larger than max_bytes on its own is not cached.
+
+Edits and reloads increase the version of a catalog, so cached searches of
+an older version are never returned; the catalog drops them with
+invalidate when its version increases, to free the memory they use.
+"""
+class QueryCache():
+    def __init__(self, max_entries: int=ResultCache.MAX_ENTRIES, max_bytes: int=ResultCache.MAX_BYTES):
+        self.__max_entries=max_entries
+        self.__max_bytes=max_bytes
+        self.__entries=OrderedDict() # (catalog name, catalog version, search_info_key) -> (search info, size)
+        self.__size=0
+        self.__hits=0
+        self.__misses=0
+        self.__lock=threading.Lock()
+
+    @property
+    def max_entries(self) -> int:
+        return self.__max_entries
+
+    @property
+    def max_bytes(self) -> int:
+        return self.__max_bytes
+
+    @property
+    def hits(self) -> int:
+        return self.__hits
+
+    @property
+    def misses(self) -> int:
+        return self.__misses
+
+    """
+    Return the approximate number of bytes used by the cached searches
+    """
+    @property
+    def size(self) -> int:
+        return self.__size
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+    """
+    Return the cached search info of a search, or None if the search is not
+    in the cache
+    """
+    def get(self, catalog_name: str, catalog_version: int, search_info_key: tuple) -> dict|None:
+        key=(catalog_name, catalog_version, search_info_key)
+        with self.__lock:
+            entry=self.__entries.get(key)
+            if entry is None:
+                self.__misses += 1
+                return None
+            self.__entries.move_to_end(key)
+            self.__hits += 1
+            return copy_search_info(entry[0])
+
+    """
+    Add (a copy of) the search info of a search to the cache, or replace the
+    one that is already cached
+    """
+    def put(self, catalog_name: str, catalog_version: int, search_info_key: tuple, search_info: dict) -> None:
+        key=(catalog_name, catalog_version, search_info_key)
+        search_info=copy_search_info(search_info)
+        size=search_info_size(search_info)
+        with self.__lock:
+            self.__discard(key)
+            if size > self.__max_bytes:
+                return
+            self.__entries[key]=(search_info, size)
+            self.__size += size
+            while len(self.__entries) > self.__max_entries or self.__size > self.__max_bytes:
+                self.__discard(next(iter(self.__entries)))
+
+    """
+    Drop the cached searches of a catalog, except the ones of keep_version
+    if it is given
+    """
+    def invalidate(self, catalog_name: str, keep_version: int|None=None) -> None:
+        with self.__lock:
+            for key in [key for key in self.__entries if key[0] == catalog_name and key[1] != keep_version]:
+                self.__discard(key)
+
+    """
+    Drop all cached searches and reset the hit and miss counters
+    """
+    def clear(self) -> None:
+        with self.__lock:
+            self.__entries.clear()
+            self.__size=0
+            self.__hits=0
+            self.__misses=0
+
+    def __discard(self, key: tuple) -> None:
+        entry=self.__entries.pop(key, None)
+        if entry is not None:
+            self.__size -= entry[1]
+
+"""
+Return a copy of the search info of a search with its own results and
+matched book info lists, the lists a presenter adds pages to. The other
+values are not changed after the search and are shared.
+"""
+def copy_search_info(search_info: dict) -> dict:
+    copy=dict(search_info)
+    for name in (SearchInfo.RESULTS, SearchInfo.MATCHED_BOOK_INFO):
+        if name in copy:
+            copy[name]=list(copy[name])
+    return copy
+
+"""
+Return the approximate number of bytes used by the search info of a search,
+counting the strings in it as if they were not shared with the books
+"""
+def search_info_size(search_info: dict) -> int:
+    size=sys.getsizeof(search_info)
+    for value in search_info.values():
+        size += object_size(value)
+    return size
+
+def object_size(value: object) -> int:
+    if isinstance(value, ResultPages):
+        return value.memory_size()
+    size=sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(object_size(key) + object_size(item) for key, item in value.items())
+    elif isinstance(value, (list, tuple, set)):
+        size += sum(object_size(item) for item in value)
+    return size
+
+
+cache=QueryCache()
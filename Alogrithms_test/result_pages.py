@@ -0,0 +1,136 @@
+from __future__ import annotations
+import sys
+import threading
+from heapq import heapify, heappop, nsmallest
+from typing import Iterable
+from constants import *
+
+"""
+Ranked results of a word search, handed out one page at a time
+
+The results of a word search are tiers of ISBN sets: one tier per edit
+distance for a Levenshtein search (the sets of the words found at that
+distance), or a single tier for an "in" search. An ISBN is ranked first by
+the lowest tier it was found in, then by the number of sets of that tier it
+appears in (the more matched words, the more relevant), and ISBNs that are
+equal on both keep the order they were first seen in, like rank_results.
+An ISBN found in several tiers is only scored in the lowest of them, so
+every book is listed once.
+
+The sets are counted once, which gives every result a sort key:
+
+    (tier, -number of sets, first seen) -> (0, -2, 0), (0, -1, 1), (1, -2, 2), ...
+
+Instead of sorting all the results, the first page is picked with a heap
+that holds at most page_size keys (heapq.nsmallest), which costs
+O(n log k) for n results and pages of k. Most searches never go past the
+first page. When the second page is asked for, the keys that are left are
+made into a heap once (O(n)), and every later page pops its k keys from
+it (O(k log n)), so the later pages are only ranked if they are asked for
+and the keys are not scanned again for every page.
+
+Pages are asked for by their number, not taken one after the other, so
+one ResultPages object can be shared by several windows (see query_cache):
+each window keeps its own count of the pages it shows, and a page that
+one window has ranked is only copied for the others. Ranking is done under
+a lock, so windows searching on different threads can share it too.
+"""
+class ResultPages():
+    def __init__(self, tiers: Iterable[Iterable[Iterable[str]]], page_size: int=Search.PAGE_SIZE):
+        if page_size < 1:
+            raise ValueError("The page size must be at least 1")
+        self.__page_size=page_size
+        self.__keys=[] # (tier, -count, first seen, isbn) of every result
+        lower_tier_isbns=set() # the ISBNs of the tiers before the current one
+        for tier, result_sets in enumerate(tiers):
+            counts={}
+            for result_set in result_sets:
+                for isbn in result_set:
+                    if isbn not in lower_tier_isbns:
+                        counts[isbn]=counts.get(isbn, 0) + 1
+            first_seen=len(self.__keys)
+            self.__keys.extend((tier, -count, first_seen + order, isbn) for order, (isbn, count) in enumerate(counts.items()))
+            lower_tier_isbns.update(counts)
+        self.__ranked=[] # ISBNs of the results ranked so far, in rank order
+        self.__last_key=None # key of the last result ranked
+        self.__heap=None # the keys that have not been ranked, made into a heap when the second page is asked for
+        self.__lock=threading.Lock()
+
+    @property
+    def page_size(self) -> int:
+        return self.__page_size
+
+    """
+    Return the number of results of all pages
+    """
+    def __len__(self) -> int:
+        return len(self.__keys)
+
+    @property
+    def page_count(self) -> int:
+        return -(-len(self.__keys) // self.__page_size)
+
+    """
+    Return the ISBNs of a page of results (0 is the first page), or an
+    empty list after the last page
+    """
+    def page(self, number: int) -> list[str]:
+        return self.isbns(number * self.__page_size, (number + 1) * self.__page_size)
+
+    """
+    Return the ISBNs of the results from rank start up to (not including)
+    rank stop, or up to the last result if stop is None
+    """
+    def isbns(self, start: int=0, stop: int|None=None) -> list[str]:
+        stop=len(self.__keys) if stop is None else min(stop, len(self.__keys))
+        with self.__lock:
+            self.__rank(stop)
+            return self.__ranked[start:stop]
+
+    """
+    Rank the results up to the end of the page that holds rank stop - 1
+    """
+    def __rank(self, stop: int) -> None:
+        if stop <= len(self.__ranked):
+            return
+        if self.__last_key is None and stop <= self.__page_size:
+            keys=nsmallest(self.__page_size, self.__keys)
+        else:
+            heap=self.__rest_heap()
+            count=-(-stop // self.__page_size) * self.__page_size - len(self.__ranked)
+            if count >= len(heap):
+                keys=sorted(heap)
+                heap.clear()
+            else:
+                keys=[heappop(heap) for _ in range(count)]
+        if keys:
+            self.__last_key=keys[-1]
+            self.__ranked.extend(isbn for _, _, _, isbn in keys)
+
+    """
+    Return the heap of the keys after the last key ranked, made the first
+    time it is needed
+    """
+    def __rest_heap(self) -> list[tuple[int, int, int, str]]:
+        if self.__heap is None:
+            last_key=self.__last_key
+            self.__heap=list(self.__keys) if last_key is None else [key for key in self.__keys if key > last_key]
+            heapify(self.__heap)
+        return self.__heap
+
+    """
+    Return the approximate number of bytes used by the sort keys of the
+    results (the ISBN strings are shared with the books)
+    """
+    def memory_size(self) -> int:
+        size=sys.getsizeof(self.__keys) + sum(sys.getsizeof(key) for key in self.__keys) + sys.getsizeof(self.__ranked)
+        return size + (sys.getsizeof(self.__heap) if self.__heap is not None else 0)
+
+    """
+    Two result pages are equal if they hold the same results with the same
+    page size, however many of them have been ranked
+    """
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, ResultPages):
+            return NotImplemented
+        return (self.__keys, self.__page_size) == (other.__keys, other.__page_size)
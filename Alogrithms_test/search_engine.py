@@ -0,0 +1,278 @@
+from __future__ import annotations
+import argparse
+import math
+from time import perf_counter
+from typing import Callable
+import new_search_util
+import query_cache
+from catalog import Catalog, registry
+from cancellation import CancellationToken, is_cancelled
+from presenter import Presenter
+from year_range import parse_year_range
+from vocabulary import Vocabulary
+from constants import *
+
+"""
+Headless book search
+
+A search engine holds one catalog and runs queries on it the way the book
+search window does, without a user interface: the raw text of a query is
+split into its field scope, year range or search terms, the search type is
+selected, and the search that matches it is run on the indexes of the
+catalog. Results are shared with the windows through the query cache.
+
+The search functions put their results into a presenter; the engine uses a
+presenter without fonts (use_gui=False) and returns the results as a
+SearchResult, so no Tk window is needed to search.
+"""
+class SearchEngine():
+    def __init__(self, catalog: Catalog|None=None, levenshtein_engine: str=LevenshteinEngine.DEFAULT, substring_engine: str=SubstringEngine.DEFAULT, use_cache: bool=True):
+        self.__catalog=catalog if catalog is not None else registry.get(BookData.DEFAULT)
+        self.__levenshtein_engine=levenshtein_engine
+        self.__substring_engine=substring_engine
+        self.__use_cache=use_cache
+
+    @property
+    def catalog(self) -> Catalog:
+        return self.__catalog
+
+    @property
+    def use_cache(self) -> bool:
+        return self.__use_cache
+
+    """
+    Split a query into its search type, search terms and field
+
+    A field scope (e.g. author:) is split from the start of the query. If
+    the rest of the query is a year range, the terms are the first and last
+    year (an empty string for an open end). Otherwise the prepared words
+    are the terms and the search type is selected from them; a query with a
+    field scope can only be searched by words. Queries without qualifying
+    information get SearchType.UNDETERMINED.
+    """
+    def parse(self, query: str) -> tuple[SearchType, list[str], str|None]:
+        field, raw_string=new_search_util.parse_field_scope(query)
+        year_range=parse_year_range(raw_string) if field is None else None
+        if year_range is not None:
+            return SearchType.YEAR_RANGE, [str(year) if year is not None else "" for year in year_range], None
+        terms=new_search_util.prepare_string(raw_string)
+        if field is None:
+            return new_search_util.select_search_type(terms), terms, None
+        return (SearchType.WORD if terms else SearchType.UNDETERMINED), terms, field
+
+    """
+    Return the search_info_key of a search and the function that performs
+    it, based on search type
+
+    The function takes the presenter that holds the results and the
+    search_info_key, and calls the search function that matches the search
+    type. A word search that is restricted to a field searches the index of
+    that field, and the field is added to the search_info_key. Raises
+    ValueError for SearchType.UNDETERMINED.
+    The indexes a word search needs are built by the function, on first
+    use; the token is checked before each of them is built and is passed
+    on to the search, which stops early once it is cancelled.
+    """
+    def plan(self, search_type: SearchType, terms: list[str], field: str|None=None, method: SearchType=SearchType.LEVENSHTEIN, token: CancellationToken|None=None) -> tuple[tuple, Callable[[Presenter, tuple], None]]:
+        catalog=self.__catalog
+        match search_type:
+            case SearchType.YEAR:
+                return ((tuple(terms), SearchType.YEAR),
+                        lambda presenter, search_info_key: new_search_util.year_search(catalog.year_index, presenter, search_info_key))
+            case SearchType.YEAR_RANGE:
+                return ((tuple(terms), SearchType.YEAR_RANGE),
+                        lambda presenter, search_info_key: new_search_util.year_range_search(catalog.sorted_year_index, presenter, search_info_key))
+            case SearchType.ISBN:
+                return ((tuple(terms), SearchType.ISBN),
+                        lambda presenter, search_info_key: new_search_util.isbn_search(presenter, search_info_key, catalog.isbn_index))
+            case SearchType.WORD:
+                field_scope=(field,) if field is not None else tuple()
+                def word_indexes() -> tuple[dict[str, set[str]], Vocabulary]|None:
+                    search_index=catalog.word_index(field)
+                    if is_cancelled(token):
+                        return None
+                    search_source=catalog.vocabulary(field) # length buckets of the words, made once per catalog version
+                    return None if is_cancelled(token) else (search_index, search_source)
+                if method == SearchType.IN:
+                    def in_search(presenter: Presenter, search_info_key: tuple) -> None:
+                        indexes=word_indexes()
+                        if indexes is None:
+                            return
+                        substring_matcher=catalog.substring_matcher(field, self.__substring_engine)
+                        if not is_cancelled(token):
+                            new_search_util.search_all_with_in_operator(*indexes, presenter, search_info_key, substring_matcher, token)
+                    return (tuple(terms), SearchType.IN, *field_scope), in_search
+                def levenshtein_search(presenter: Presenter, search_info_key: tuple) -> None:
+                    indexes=word_indexes()
+                    if indexes is None:
+                        return
+                    word_matcher=catalog.levenshtein_matcher(field, self.__levenshtein_engine)
+                    if is_cancelled(token):
+                        return
+                    parallel_levenshtein=catalog.parallel_levenshtein(field) if word_matcher is None else None # only a scan is spread over processes
+                    if not is_cancelled(token):
+                        new_search_util.search_all_with_levenshtein_distance(*indexes, presenter, search_info_key, word_matcher, parallel_levenshtein, token)
+                return (tuple(terms), SearchType.LEVENSHTEIN, *field_scope), levenshtein_search
+        raise ValueError(f"No search for search type {search_type}")
+
+    """
+    Find the results of a search
+
+    Load the catalog if it has not been loaded yet and take the results from
+    the query cache if the same search has been run on the same version of
+    the catalog. Otherwise search with a presenter of this search only and
+    add its search info to the cache. Returns the catalog, its name and
+    version, the search_info_key and the search info, or None if the search
+    was cancelled with the token before it finished. The search stops early
+    once the token is cancelled, and its partial results are not cached.
+    """
+    def find(self, search_type: SearchType, terms: list[str], field: str|None=None, method: SearchType=SearchType.LEVENSHTEIN, token: CancellationToken|None=None) -> tuple[Catalog, tuple[str, int], tuple, dict]|None:
+        catalog=self.__catalog
+        catalog.ensure_loaded() # loads the catalog on first use
+        if is_cancelled(token):
+            return None
+        catalog_version=(catalog.name, catalog.version)
+        search_info_key, search=self.plan(search_type, terms, field, method, token)
+        search_info=query_cache.cache.get(*catalog_version, search_info_key) if self.__use_cache else None
+        if search_info is None:
+            if is_cancelled(token):
+                return None
+            presenter=Presenter({search_info_key: dict()}, catalog.books, use_gui=False)
+            search(presenter, search_info_key)
+            if is_cancelled(token): # the search may have stopped before it found every result
+                return None
+            search_info=presenter.search_info[search_info_key]
+            if self.__use_cache:
+                query_cache.cache.put(*catalog_version, search_info_key, search_info)
+        if is_cancelled(token):
+            return None
+        return catalog, catalog_version, search_info_key, search_info
+
+    """
+    Run a query and return its first limit results
+
+    Word searches rank their results a page at a time, so only as many
+    pages are ranked as the limit needs; the ranked pages are kept by the
+    result pages of the cached search. A query without qualifying
+    information returns a result of SearchType.UNDETERMINED without books.
+    """
+    def search(self, query: str, method: SearchType=SearchType.LEVENSHTEIN, limit: int=Search.PAGE_SIZE) -> SearchResult:
+        start=perf_counter()
+        search_type, terms, field=self.parse(query)
+        if search_type == SearchType.UNDETERMINED:
+            return SearchResult(query, search_type, None, {}, [], perf_counter() - start)
+        _, _, search_info_key, search_info=self.find(search_type, terms, field, method)
+        pages=search_info.get(SearchInfo.PAGES)
+        isbns=pages.isbns(0, limit) if pages is not None else search_info.get(SearchInfo.RESULTS, [])[:limit]
+        books=self.__catalog.books
+        found=[{BookField.ISBN: isbn, **books[isbn]} for isbn in isbns]
+        return SearchResult(query, search_type, search_info_key, search_info, found, perf_counter() - start)
+
+"""
+The result of one query of a search engine
+
+Holds the search type and search_info_key of the query, the books found
+(dictionaries of the book info with the ISBN), the total number of books
+that match (every book once, even if several of its words match), the words of the index that matched the search terms, the
+number of books per year of year range searches and the time the query
+took in seconds.
+"""
+class SearchResult():
+    def __init__(self, query: str, search_type: SearchType, search_info_key: tuple|None, search_info: dict, books: list[dict[str, str]], seconds: float):
+        self.query=query
+        self.search_type=search_type
+        self.search_info_key=search_info_key
+        self.books=books
+        pages=search_info.get(SearchInfo.PAGES)
+        self.total=len(pages) if pages is not None else len(search_info.get(SearchInfo.RESULTS, []))
+        self.matched_strings=list(dict.fromkeys(search_info.get(SearchInfo.MATCHED_STRINGS, [])))
+        self.facets=search_info.get(SearchInfo.FACETS, {})
+        self.seconds=seconds
+
+    @property
+    def isbns(self) -> list[str]:
+        return [book[BookField.ISBN] for book in self.books]
+
+    def __str__(self) -> str:
+        first=f", first: {self.books[0][BookField.TITLE]} ({self.books[0][BookField.ISBN]})" if self.books else ""
+        search=self.search_info_key[1] if self.search_info_key else self.search_type
+        return f"{self.query!r}: {search}, {self.total} books in {self.seconds * 1000:.2f} ms{first}"
+
+"""
+Statistics of a batch of queries: throughput and latency
+"""
+class BatchStats():
+    def __init__(self):
+        self.queries=0
+        self.results=0
+        self.seconds=0.0
+        self.latencies=[] # seconds per query
+        self.load_seconds=0.0
+
+    @property
+    def queries_per_second(self) -> float:
+        return self.queries / self.seconds if self.seconds > 0 else 0.0
+
+    """
+    Return the latency in milliseconds that percent of the queries did not
+    exceed (nearest rank)
+    """
+    def percentile(self, percent: float) -> float:
+        if not self.latencies:
+            return 0.0
+        latencies=sorted(self.latencies)
+        rank=max(math.ceil(percent / 100 * len(latencies)), 1)
+        return latencies[rank - 1] * 1000
+
+    def __str__(self) -> str:
+        return (f"{self.queries} queries ({self.results} books) in {self.seconds:.2f}s, {self.queries_per_second:.1f} queries/sec, "
+                f"latency p50 {self.percentile(50):.2f} ms, p90 {self.percentile(90):.2f} ms, p99 {self.percentile(99):.2f} ms, "
+                f"max {self.percentile(100):.2f} ms, catalog loaded in {self.load_seconds:.2f}s")
+
+"""
+Return the queries of a text file, one per line, without empty lines and
+lines starting with #
+"""
+def read_queries(path: str) -> list[str]:
+    with open(path, encoding="utf-8") as query_file:
+        return [line.strip() for line in query_file if line.strip() and not line.lstrip().startswith("#")]
+
+"""
+Run every query (repeat times) one after the other and return the
+statistics of the run. The catalog is loaded before the timing starts; the
+lookup indexes are built by the first query that needs them. Every result
+is passed to on_result if it is given.
+"""
+def run_queries(engine: SearchEngine, queries: list[str], method: SearchType=SearchType.LEVENSHTEIN, limit: int=Search.PAGE_SIZE, repeat: int=1, on_result: Callable[[SearchResult], None]|None=None) -> BatchStats:
+    stats=BatchStats()
+    start=perf_counter()
+    engine.catalog.ensure_loaded()
+    stats.load_seconds=perf_counter() - start
+    start=perf_counter()
+    for _ in range(repeat):
+        for query in queries:
+            result=engine.search(query, method, limit)
+            stats.latencies.append(result.seconds)
+            stats.queries += 1
+            stats.results += len(result.books)
+            if on_result is not None:
+                on_result(result)
+    stats.seconds=perf_counter() - start
+    return stats
+
+
+if __name__=="__main__":
+    parser=argparse.ArgumentParser(description="Run a file of book search queries without the user interface and report throughput and latency")
+    parser.add_argument("queries", help="text file with one query per line")
+    parser.add_argument("--catalog", default=BookData.DEFAULT, choices=registry.names(), help="catalog to search")
+    parser.add_argument("--method", default=SearchType.LEVENSHTEIN, choices=[SearchType.LEVENSHTEIN, SearchType.IN], help="how title, author and publisher words are matched")
+    parser.add_argument("--levenshtein-engine", default=LevenshteinEngine.DEFAULT, choices=[LevenshteinEngine.LINEAR, LevenshteinEngine.BK_TREE, LevenshteinEngine.SYMSPELL, LevenshteinEngine.TRIGRAM])
+    parser.add_argument("--substring-engine", default=SubstringEngine.DEFAULT, choices=[SubstringEngine.SCAN, SubstringEngine.TRIGRAM, SubstringEngine.SUFFIX_ARRAY])
+    parser.add_argument("--limit", type=int, default=Search.PAGE_SIZE, help="books returned per query")
+    parser.add_argument("--repeat", type=int, default=1, help="number of times the queries are run")
+    parser.add_argument("--no-cache", action="store_true", help="run repeated queries again instead of taking them from the query cache")
+    parser.add_argument("--verbose", action="store_true", help="print the result of every query")
+    arguments=parser.parse_args()
+    engine=SearchEngine(registry.get(arguments.catalog), arguments.levenshtein_engine, arguments.substring_engine, use_cache=not arguments.no_cache)
+    stats=run_queries(engine, read_queries(arguments.queries), arguments.method, arguments.limit, arguments.repeat, print if arguments.verbose else None)
+    print(stats)
@@ -4,6 +4,7 @@ from bubble_sort import bubble_sort
 from merge_sort import merge_sort
 from timeit import repeat
 import book_data
+from constants import BookData
 import threading
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
@@ -42,12 +43,7 @@ class SortWindow(Toplevel):
 
         # DATASETS TO SORT
         self.algorithm_names=algorithm_names
-        self.titles_10k=book_data.get_book_titles_from_csv("10kbooks.csv")
-        
-        self.titles_1000=self.titles_10k[:1000]
-        self.titles_100=self.titles_10k[:100]
-        self.titles_10=self.titles_10k[:10]
-        self.all_titles=[self.titles_10, self.titles_100, self.titles_1000, self.titles_10k]
+        self.all_titles=None # read by the test thread (see load_titles), so that the window opens without reading the csv file
 
         # CREATE TREEVIEW
         self.results_tree = ttk.Treeview(self)
@@ -132,7 +128,8 @@ class SortWindow(Toplevel):
     """
     
     def time_all(self) -> dict[str, list[float]]:
-        
+        if self.all_titles is None:
+            self.load_titles()
         res=dict()
         for algorithm_name in self.algorithm_names:
             for dataset in self.all_titles:
@@ -141,6 +138,17 @@ class SortWindow(Toplevel):
 
         return res
     
+    """
+    Read the titles of the 10k dataset and take the datasets of 10, 100,
+    1000 and 10000 titles from them
+    """
+    def load_titles(self) -> None:
+        self.titles_10k=book_data.get_book_titles_from_csv(BookData.TEN_K)
+        self.titles_1000=self.titles_10k[:1000]
+        self.titles_100=self.titles_10k[:100]
+        self.titles_10=self.titles_10k[:10]
+        self.all_titles=[self.titles_10, self.titles_100, self.titles_1000, self.titles_10k]
+
     ######################################################################
     #                   TEST AND PLOT BUTTON FUNCTIONS                   #
     ######################################################################
@@ -0,0 +1,55 @@
+import subprocess
+import sys
+from statistics import median
+
+"""
+Measure how long the application takes to start
+
+Every measurement runs in a new Python process, so nothing is imported
+beforehand. The time to import the main window module is the time before
+the main window can be created; the time to import the module of the book
+search window is paid when that window is opened for the first time. The
+modules that take longer to load (nltk, pandas) are listed if an import
+pulls them in, and the main window is created and shown if a display is
+available.
+"""
+HEAVY_MODULES=["nltk", "pandas", "numpy", "matplotlib"]
+
+def time_import(module: str, show_main_window: bool=False) -> tuple[float, list[str], float|None]:
+    script=f"""
+import sys
+from time import perf_counter
+start=perf_counter()
+import {module}
+import_time=perf_counter() - start
+window_time=None
+if {show_main_window}:
+    from tkinter import TclError
+    try:
+        start=perf_counter()
+        window={module}.MainWindow()
+        window.update()
+        window_time=perf_counter() - start
+        window.destroy()
+    except TclError: # no display
+        pass
+print(import_time, window_time, *[name for name in {HEAVY_MODULES} if name in sys.modules])
+"""
+    output=subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True).stdout.split()
+    return float(output[0]), output[2:], float(output[1]) if output[1] != "None" else None
+
+"""
+Import a module in 5 new processes and return the median time together
+with the heavy modules and the time to show the main window of the first run
+"""
+def time_startup(module: str, show_main_window: bool=False) -> tuple[float, list[str], float|None]:
+    runs=[time_import(module, show_main_window) for _ in range(5)]
+    return median(run[0] for run in runs), runs[0][1], runs[0][2]
+
+
+if __name__=="__main__":
+    import_time, heavy_modules, window_time=time_startup("main_window", show_main_window=True)
+    window=f", main window shown in {window_time:.3f}s" if window_time is not None else ", no display to show the main window"
+    print(f"main_window imported in {import_time:.3f}s{window}, heavy modules imported: {', '.join(heavy_modules) or 'none'}")
+    import_time, heavy_modules, _=time_startup("book_search_window")
+    print(f"book_search_window imported in {import_time:.3f}s (when the window is opened first), heavy modules imported: {', '.join(heavy_modules) or 'none'}")
@@ -0,0 +1,45 @@
+from time import perf_counter
+from catalog import Catalog
+from levenshtein_time import create_misspelled_terms
+from new_search_util import search_single_match
+from presenter import Presenter
+from constants import *
+
+"""
+Create substring search terms from the words of a catalog: a three or
+four character piece from the middle of every misspelled term
+"""
+def create_substring_terms(words: list[str], count: int) -> list[str]:
+    terms=create_misspelled_terms(words, count)
+    return [term[1:4 + index % 2] for index, term in enumerate(terms)]
+
+"""
+Run an "in" search for every term on its own and return the average time
+per term in milliseconds together with the matched words
+"""
+def time_substring_searches(catalog: Catalog, terms: list[str], engine: str) -> tuple[float, list[list[str]]]:
+    substring_matcher=catalog.substring_matcher(engine=engine)
+    matched_words=[]
+    start=perf_counter()
+    for term in terms:
+        search_info_key=((term,), SearchType.IN)
+        presenter=Presenter({search_info_key: dict()}, dict(), use_gui=False)
+        search_single_match(catalog.title_author_publisher_index, catalog.search_source, term, presenter, search_info_key, substring_matcher)
+        matched_words.append(presenter.search_info[search_info_key][SearchInfo.MATCHED_STRINGS])
+    return (perf_counter() - start) * 1000 / len(terms), matched_words
+
+
+if __name__=="__main__":
+    for path in (BookData.THOUSAND, BookData.TEN_K):
+        catalog=Catalog(path, path)
+        terms=create_substring_terms(catalog.search_source, 50)
+        scan_time, scan_words=time_substring_searches(catalog, terms, SubstringEngine.SCAN)
+        print(f"{path}: {len(catalog.search_source)} words, {len(terms)} substring terms")
+        print(f"    scan {scan_time:.3f} ms/term")
+        for name, engine, build in (("trigram index", SubstringEngine.TRIGRAM, catalog.trigram_index), ("suffix array", SubstringEngine.SUFFIX_ARRAY, catalog.suffix_array)):
+            start=perf_counter()
+            build().substring_matches("a") # the suffix array is built with its first search
+            build_time=perf_counter() - start
+            engine_time, engine_words=time_substring_searches(catalog, terms, engine)
+            print(f"    {name} {engine_time:.3f} ms/term ({scan_time / engine_time:.1f}x faster), "
+                  f"built in {build_time:.2f}s, same matches: {scan_words == engine_words}")
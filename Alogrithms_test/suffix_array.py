@@ -0,0 +1,122 @@
+from __future__ import annotations
+from array import array
+from bisect import bisect_left
+from typing import Iterable
+
+"""
+Suffix array of words for exact substring ("in") searches
+
+The words are joined into one text, each followed by a separator
+character that does not appear in any word:
+
+    text: "amy\0tan\0group\0"
+
+Every position of a word in the text is the start of a suffix. The suffix
+array holds these positions ordered by the suffix that starts there, up
+to the end of its word ("my", "y", "an", "n", ...). A term is a substring
+of a word if and only if it is the start of one of the word's suffixes,
+and all suffixes that start with the term are next to each other in the
+array. The first of them is found with a binary search that compares the
+term with the first m characters of a suffix, so a search costs
+O(m log n) for a term of m characters and n suffixes.
+
+The LCP array holds, for every entry of the suffix array, the length of
+the longest common prefix of its suffix and the suffix before it. The
+suffixes after the first match also start with the term exactly as long
+as their LCP is at least m, so the rest of the matches are found by
+walking forward without further string comparisons.
+
+A suffix array cannot be changed cheaply, so adding or removing a word
+only records the change; the arrays are built again with the next search.
+"""
+class SuffixArray():
+    SEPARATOR="\0"
+
+    def __init__(self, words: Iterable[str]=()):
+        self.__words=set(words)
+        self.__text=None
+        self.__sorted_words=[]
+        self.__suffixes=array("I") # start positions of the suffixes in the text, in suffix order
+        self.__suffix_words=array("I") # position of the word of each suffix in the sorted word list
+        self.__lcp=array("I")
+
+    def __len__(self) -> int:
+        return len(self.__words)
+
+    def __contains__(self, word: object) -> bool:
+        return word in self.__words
+
+    """
+    Add a word. Returns False if the word was already in the suffix array.
+    """
+    def add(self, word: str) -> bool:
+        if word in self.__words:
+            return False
+        self.__words.add(word)
+        self.__text=None
+        return True
+
+    """
+    Remove a word. Returns False if the word was not in the suffix array.
+    """
+    def remove(self, word: str) -> bool:
+        if word not in self.__words:
+            return False
+        self.__words.remove(word)
+        self.__text=None
+        return True
+
+    """
+    Build the text, the suffix array and the LCP array from the words
+    """
+    def __build(self) -> None:
+        self.__sorted_words=sorted(self.__words, key=lambda word: (len(word), word))
+        suffixes=[]
+        start=0
+        for word_position, word in enumerate(self.__sorted_words):
+            for offset in range(len(word)):
+                suffixes.append((word[offset:], start + offset, word_position))
+            start += len(word) + 1
+        suffixes.sort()
+        self.__suffixes=array("I", [suffix_start for _, suffix_start, _ in suffixes])
+        self.__suffix_words=array("I", [word_position for _, _, word_position in suffixes])
+        self.__lcp=array("I", [0] * len(suffixes))
+        for i in range(1, len(suffixes)):
+            previous, current=suffixes[i-1][0], suffixes[i][0]
+            length=0
+            while length < len(previous) and length < len(current) and previous[length] == current[length]:
+                length += 1
+            self.__lcp[i]=length
+        self.__text="".join(word + self.SEPARATOR for word in self.__sorted_words)
+
+    """
+    Return the range (start, end) of the entries of the suffix array whose
+    suffixes start with the term
+    """
+    def suffix_range(self, term: str) -> tuple[int, int]:
+        if self.__text is None:
+            self.__build()
+        text, suffixes, length=self.__text, self.__suffixes, len(term)
+        start=bisect_left(suffixes, term, key=lambda suffix_start: text[suffix_start:suffix_start + length])
+        if start == len(suffixes) or text[suffixes[start]:suffixes[start] + length] != term:
+            return start, start
+        end=start + 1
+        while end < len(suffixes) and self.__lcp[end] >= length:
+            end += 1
+        return start, end
+
+    """
+    Return the words that contain a term, ordered by length and then
+    alphabetically, like the search source of a catalog
+    """
+    def substring_matches(self, term: str) -> list[str]:
+        if not term:
+            return sorted(self.__words, key=lambda word: (len(word), word))
+        start, end=self.suffix_range(term)
+        return [self.__sorted_words[word_position] for word_position in sorted(set(self.__suffix_words[start:end]))]
+
+    @property
+    def lcp(self) -> array:
+        if self.__text is None:
+            self.__build()
+        return self.__lcp
@@ -0,0 +1,163 @@
+from __future__ import annotations
+import sys
+from typing import Iterable
+from levenshtein_distance import levenshtein_distance
+from constants import *
+
+"""
+Deletion index of words for fast Levenshtein distance lookups (the
+symmetric delete method of SymSpell)
+
+For every word, all the strings that can be made from it by deleting up to
+max_distance characters are stored in a dictionary, each one pointing to
+the words it was made from:
+
+    "mummy" -> "ummy", "mmmy", "mumy", "mumm", "mmy", "umy", "umm", ...
+
+If two words are within max_distance of each other, both of them can be
+turned into the same string with at most max_distance deletions each (a
+replacement is a deletion in both words, an insertion in one word is a
+deletion in the other). A lookup therefore creates the deletions of the
+search word and looks each one up in the dictionary; the words found are
+the candidates, and only they are checked with the (bounded) Levenshtein
+distance. A lookup costs a few dozen dictionary lookups instead of a
+distance calculation per word of the vocabulary.
+
+The number of deletions grows quickly with the length of a word, so the
+deletions can be made from the first prefix_length characters of the
+words only. This keeps the index small and still finds every match:
+deleting the characters that are not shared by the prefixes of two words
+within max_distance takes at most max_distance deletions on each side
+too. Only more candidates have to be checked.
+
+To keep the memory use bounded, the index holds at most max_entries
+deletions. Adding a word that would go above that raises MemoryError.
+"""
+class DeletionIndex():
+    def __init__(self, words: Iterable[str]=(), max_distance: int=Search.LEVENSHTEIN_MAX_DISTANCE,
+                 prefix_length: int|None=SymSpell.PREFIX_LENGTH, max_entries: int|None=SymSpell.MAX_ENTRIES):
+        self.__max_distance=max_distance
+        self.__prefix_length=prefix_length
+        self.__max_entries=max_entries
+        self.__words=set()
+        self.__deletions={} # deletion -> the word it was made from, or a list of words if there are several
+        for word in words:
+            self.add(word)
+
+    @property
+    def max_distance(self) -> int:
+        return self.__max_distance
+
+    @property
+    def prefix_length(self) -> int|None:
+        return self.__prefix_length
+
+    def __len__(self) -> int:
+        return len(self.__words)
+
+    def __contains__(self, word: object) -> bool:
+        return word in self.__words
+
+    """
+    Return the number of deletions stored in the index
+    """
+    def entry_count(self) -> int:
+        return len(self.__deletions)
+
+    """
+    Return the strings that can be made from (the prefix of) a word by
+    deleting up to max_distance characters, including the prefix itself
+    """
+    def deletions(self, word: str) -> set[str]:
+        if self.__prefix_length is not None:
+            word=word[:self.__prefix_length]
+        deletions={word}
+        current_deletions={word}
+        for _ in range(self.__max_distance):
+            current_deletions={deletion[:i] + deletion[i+1:] for deletion in current_deletions for i in range(len(deletion))}
+            deletions |= current_deletions
+        return deletions
+
+    """
+    Add a word to the index. Returns False if the word was already in the
+    index. Raises MemoryError if the index would hold more than max_entries
+    deletions.
+    """
+    def add(self, word: str) -> bool:
+        if word in self.__words:
+            return False
+        deletions=self.deletions(word)
+        if self.__max_entries is not None and len(self.__deletions) + len(deletions) > self.__max_entries:
+            new_entries=sum(1 for deletion in deletions if deletion not in self.__deletions)
+            if len(self.__deletions) + new_entries > self.__max_entries:
+                raise MemoryError(f"The deletion index is limited to {self.__max_entries} entries")
+        self.__words.add(word)
+        for deletion in deletions:
+            words=self.__deletions.get(deletion)
+            if words is None:
+                self.__deletions[deletion]=word
+            elif type(words) == str:
+                self.__deletions[deletion]=[words, word]
+            else:
+                words.append(word)
+        return True
+
+    """
+    Remove a word from the index. Returns False if the word was not in the
+    index.
+    """
+    def remove(self, word: str) -> bool:
+        if word not in self.__words:
+            return False
+        self.__words.remove(word)
+        for deletion in self.deletions(word):
+            words=self.__deletions[deletion]
+            if type(words) == str:
+                del self.__deletions[deletion]
+            else:
+                words.remove(word)
+                if len(words) == 1:
+                    self.__deletions[deletion]=words[0]
+        return True
+
+    """
+    Return all words within max_distance of a word, grouped by their
+    distance in ascending order, e.g. {0: ["reality"], 2: ["realty"]}
+
+    The words of each distance are ordered by length and then
+    alphabetically, like the search source of a catalog. Raises ValueError
+    if max_distance is larger than the distance the index was built for.
+    """
+    def search(self, word: str, max_distance: int) -> dict[int, list[str]]:
+        if max_distance > self.__max_distance:
+            raise ValueError(f"The deletion index only supports distances up to {self.__max_distance}")
+        candidates=set()
+        for deletion in self.deletions(word):
+            words=self.__deletions.get(deletion)
+            if words is None:
+                continue
+            if type(words) == str:
+                candidates.add(words)
+            else:
+                candidates.update(words)
+        results={}
+        for candidate in candidates:
+            distance=levenshtein_distance(word, candidate, max_distance)
+            if distance <= max_distance:
+                results.setdefault(distance, list()).append(candidate)
+        for words in results.values():
+            words.sort(key=lambda result_word: (len(result_word), result_word))
+        return dict(sorted(results.items()))
+
+    """
+    Return the approximate number of bytes used by the index, counting the
+    deletion strings and word lists but not the words themselves (which are
+    shared with the word index)
+    """
+    def memory_size(self) -> int:
+        size=sys.getsizeof(self.__deletions) + sys.getsizeof(self.__words)
+        for deletion, words in self.__deletions.items():
+            size += sys.getsizeof(deletion)
+            if type(words) != str:
+                size += sys.getsizeof(words)
+        return size
@@ -0,0 +1,134 @@
+from __future__ import annotations
+from typing import Iterable
+from myers import MyersPattern
+
+"""
+Character trigram index of words for substring and fuzzy word searches
+
+Every word is split into its trigrams (the strings of three consecutive
+characters), after padding it with two markers on both sides so that the
+start and the end of the word also form trigrams:
+
+    "amy" -> "$$a", "$am", "amy", "my$", "y$$"
+
+The index maps every trigram to the set of words it appears in.
+
+A substring search ("in" search) for a term of at least three characters
+only needs to look at the words that contain all the trigrams of the
+term, so the word sets of those trigrams are intersected (smallest
+first), and only the words left are checked for the term. Shorter terms
+have no trigrams of their own and are looked for in all the words.
+
+A fuzzy search uses the number of trigrams a word shares with the term:
+one edit changes at most three trigrams of a word, so a word within
+max_distance of the term shares at least (number of trigrams of the term
+- 3 * max_distance) of them. Only the words that share enough trigrams
+(and whose length is close enough) are compared with the term. For short
+terms this number is zero or less, and all the words of a similar length
+are compared.
+"""
+class TrigramIndex():
+    PADDING="$$"
+
+    def __init__(self, words: Iterable[str]=()):
+        self.__words=set()
+        self.__trigram_words={} # trigram -> set of the words it appears in
+        for word in words:
+            self.add(word)
+
+    def __len__(self) -> int:
+        return len(self.__words)
+
+    def __contains__(self, word: object) -> bool:
+        return word in self.__words
+
+    """
+    Return the set of trigrams of a word, padded on both sides unless
+    padded is False
+    """
+    def trigrams(self, word: str, padded: bool=True) -> set[str]:
+        if padded:
+            word=self.PADDING + word + self.PADDING
+        return {word[i:i+3] for i in range(len(word) - 2)}
+
+    """
+    Return the set of words a trigram appears in
+    """
+    def words_with_trigram(self, trigram: str) -> set[str]:
+        return self.__trigram_words.get(trigram, set())
+
+    """
+    Add a word to the index. Returns False if the word was already in the
+    index.
+    """
+    def add(self, word: str) -> bool:
+        if word in self.__words:
+            return False
+        self.__words.add(word)
+        for trigram in self.trigrams(word):
+            self.__trigram_words.setdefault(trigram, set()).add(word)
+        return True
+
+    """
+    Remove a word from the index. Returns False if the word was not in the
+    index.
+    """
+    def remove(self, word: str) -> bool:
+        if word not in self.__words:
+            return False
+        self.__words.remove(word)
+        for trigram in self.trigrams(word):
+            words=self.__trigram_words[trigram]
+            words.discard(word)
+            if not words:
+                del self.__trigram_words[trigram]
+        return True
+
+    """
+    Return the words that contain a term, ordered by length and then
+    alphabetically, like the search source of a catalog
+    """
+    def substring_matches(self, term: str) -> list[str]:
+        term_trigrams=self.trigrams(term, padded=False)
+        if term_trigrams:
+            word_sets=sorted((self.words_with_trigram(trigram) for trigram in term_trigrams), key=len)
+            candidates=set(word_sets[0])
+            for words in word_sets[1:]:
+                if not candidates:
+                    break
+                candidates &= words
+        else:
+            candidates=self.__words
+        return sorted((word for word in candidates if term in word), key=lambda word: (len(word), word))
+
+    """
+    Return the words that may be within max_distance of a term: the words
+    of a similar length that share enough trigrams with it
+    """
+    def fuzzy_candidates(self, term: str, max_distance: int) -> list[str]:
+        term_trigrams=self.trigrams(term)
+        min_shared=len(term_trigrams) - 3 * max_distance
+        if min_shared <= 0:
+            candidates=self.__words
+        else:
+            shared_counts={}
+            for trigram in term_trigrams:
+                for word in self.words_with_trigram(trigram):
+                    shared_counts[word]=shared_counts.get(word, 0) + 1
+            candidates=[word for word, shared_count in shared_counts.items() if shared_count >= min_shared]
+        return sorted((word for word in candidates if abs(len(word) - len(term)) <= max_distance), key=lambda word: (len(word), word))
+
+    """
+    Return all words within max_distance of a word, grouped by their
+    distance in ascending order, e.g. {0: ["reality"], 2: ["realty"]}
+
+    The words of each distance are ordered by length and then
+    alphabetically, like the search source of a catalog.
+    """
+    def search(self, word: str, max_distance: int) -> dict[int, list[str]]:
+        candidates=self.fuzzy_candidates(word, max_distance)
+        results={}
+        for candidate, distance in zip(candidates, MyersPattern(word).distances(candidates, max_distance)):
+            if distance <= max_distance:
+                results.setdefault(distance, list()).append(candidate)
+        return dict(sorted(results.items()))
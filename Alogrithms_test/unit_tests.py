@@ -1,12 +1,53 @@
 import unittest
+import os
+import shutil
+import tempfile
+import pickle
+import threading
+from unittest import mock
 from graph_matrix import init_matrix, populate_matrix
-from book_data import get_book_titles_from_csv, create_books_from_csv
+from book_data import get_book_titles_from_csv, iter_book_titles_from_csv, create_books_from_csv, create_indexes, create_field_index, create_deletion_index, create_compact_index, load_books_and_indexes, add_book
+import book_ingest
+import book_snapshot
+from catalog import Catalog, CatalogRegistry
+from bk_tree import BKTree
+from symspell import DeletionIndex
+from myers import MyersPattern
+from trigram_index import TrigramIndex
+from suffix_array import SuffixArray
+from result_pages import ResultPages
+from query_cache import QueryCache, search_info_size, copy_search_info
+from cancellation import CancellationToken, is_cancelled
+from startup_time import time_import
+from search_engine import SearchEngine, BatchStats, run_queries, read_queries
+import query_cache
+from vocabulary import Vocabulary, WordView
+from parallel_search import ParallelLevenshtein, worker_context
+from isbn_index import IsbnIndex, normalize_isbn, isbn_spellings, isbn13_check_digit
+from year_range import SortedYearIndex, parse_year_range
+from compact_index import CompactIndex, intersect, intersect_all, union, union_all
 from new_search_util import *
 from binary_search import *
 from levenshtein_distance import levenshtein_distance
 from presenter import *
 
 
+"""
+Base class of the tests that check a faster way of searching against the
+way it replaces
+"""
+class SearchTestCase(unittest.TestCase):
+    """
+    Run a search once with search and once with expected_search, each with
+    a presenter of its own, and check that both return the same and leave
+    the same search info in their presenters
+    """
+    def assertSameSearch(self, search_info_key, search, expected_search, books=None):
+        presenter=Presenter({search_info_key: dict()}, books if books is not None else dict(), use_gui=False)
+        expected_presenter=Presenter({search_info_key: dict()}, books if books is not None else dict(), use_gui=False)
+        self.assertEqual(search(presenter, search_info_key), expected_search(expected_presenter, search_info_key))
+        self.assertEqual(presenter.search_info, expected_presenter.search_info)
+
 class TestGraphMatrix(unittest.TestCase):
     def test_init_matrix(self):
         test_dict = {"A": 1, "B": 2, "C": 3, "D": 4}
@@ -62,6 +103,7 @@ class TestSortTest(unittest.TestCase):
                         ]
         result_list = get_book_titles_from_csv(test_path)
         self.assertEqual(result_list, expected_list)
+        self.assertEqual(list(iter_book_titles_from_csv(test_path, chunk_size=3)), expected_list)
 
 class TestBookData(unittest.TestCase):
     unittest.TestCase.maxDiff = None
@@ -80,6 +122,379 @@ class TestBookData(unittest.TestCase):
         result_books=create_books_from_csv(test_path)    
         self.assertEqual(result_books, expected_books  )
 
+    def test_create_books_from_csv_malformed_year(self):
+        result_books=create_books_from_csv("10kbooks.csv")
+        self.assertNotIn("735201994", result_books) # row with an author name in the year column
+        self.assertTrue(all(book["Year"].isdigit() for book in result_books.values()))
+
+class TestAddBook(unittest.TestCase):
+    def test_add_book(self):
+        book={"Title": "The Kitchen God's Wife", "Author": "Amy Tan", "Publisher": "Putnam Pub Group", "Year": "0"}
+        search_index, year_index={}, {}
+        add_book(search_index, "399135782", book, "Title")
+        add_book(year_index, "399135782", book, "Year")
+        self.assertEqual(search_index, {"kitchen": {"399135782"}, "gods": {"399135782"}, "wife": {"399135782"}})
+        self.assertEqual(year_index, {"0": {"399135782"}}) # the year is added as a whole, not split into words
+
+    def test_create_field_index(self):
+        books=create_books_from_csv("10books.csv")
+        author_index=create_field_index(books, "Author")
+        self.assertEqual(author_index["tan"], {"399135782"})
+        self.assertNotIn("group", author_index)
+        self.assertEqual(create_field_index(books, "Publisher")["group"], {"399135782", "425176428"})
+
+class TestBookSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir=tempfile.mkdtemp()
+        self.csv_path=os.path.join(self.temp_dir, "10books.csv")
+        shutil.copy("10books.csv", self.csv_path)
+        self.books=create_books_from_csv(self.csv_path)
+        self.title_author_publisher_index, self.year_index=create_indexes(self.books)
+        self.isbn_index=IsbnIndex(self.books.keys())
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_load_snapshot(self):
+        self.assertIsNone(book_snapshot.load_snapshot(self.csv_path))
+        book_snapshot.write_snapshot(self.csv_path, self.books, self.title_author_publisher_index, self.year_index, self.isbn_index)
+        snapshot=book_snapshot.load_snapshot(self.csv_path)
+        self.assertEqual(snapshot[:3], (self.books, self.title_author_publisher_index, self.year_index))
+        self.assertEqual(len(snapshot[3]), len(self.books))
+        self.assertEqual(snapshot[3].exact_matches("0393045218"), ["393045218"])
+        os.utime(self.csv_path, ns=(0, 0)) # modification time changes, contents do not
+        self.assertIsNotNone(book_snapshot.load_snapshot(self.csv_path))
+
+    def test_touched_csv_is_hashed_once(self):
+        path=book_snapshot.write_snapshot(self.csv_path, self.books, self.title_author_publisher_index, self.year_index, self.isbn_index)
+        os.utime(self.csv_path, ns=(0, 0))
+        self.assertIsNotNone(book_snapshot.load_snapshot(self.csv_path))
+        with open(path, "rb") as file:
+            self.assertEqual(book_snapshot.struct.unpack_from(book_snapshot.HEADER_FORMAT, file.read(book_snapshot.HEADER_SIZE))[3], 0)
+        original_file_hash=book_snapshot.file_hash
+        book_snapshot.file_hash=lambda path: self.fail("the csv file was hashed again")
+        try:
+            self.assertEqual(book_snapshot.load_snapshot(self.csv_path)[:3], (self.books, self.title_author_publisher_index, self.year_index))
+        finally:
+            book_snapshot.file_hash=original_file_hash
+
+    def test_write_snapshot_leaves_no_temporary_files(self):
+        book_snapshot.write_snapshot(self.csv_path, self.books, self.title_author_publisher_index, self.year_index, self.isbn_index)
+        book_snapshot.write_snapshot(self.csv_path, self.books, self.title_author_publisher_index, self.year_index, self.isbn_index)
+        self.assertEqual(sorted(os.listdir(self.temp_dir)), ["10books.csv", "10books.csv" + book_snapshot.SNAPSHOT_SUFFIX])
+
+    def test_load_stale_snapshot(self):
+        book_snapshot.write_snapshot(self.csv_path, self.books, self.title_author_publisher_index, self.year_index, self.isbn_index)
+        with open(self.csv_path, "a") as file:
+            file.write("1234567890,New Book,New Author,2020,New Publisher\n")
+        self.assertIsNone(book_snapshot.load_snapshot(self.csv_path))
+
+    def test_load_snapshot_other_version(self):
+        path=book_snapshot.write_snapshot(self.csv_path, self.books, self.title_author_publisher_index, self.year_index, self.isbn_index)
+        with open(path, "r+b") as file:
+            file.seek(len(book_snapshot.SNAPSHOT_MAGIC))
+            file.write((book_snapshot.SNAPSHOT_VERSION + 1).to_bytes(2, "little"))
+        self.assertIsNone(book_snapshot.load_snapshot(self.csv_path))
+
+class TestCatalogRegistry(unittest.TestCase):
+    def test_catalog_loads_on_first_use(self):
+        catalog=Catalog("ten", "10books.csv")
+        self.assertFalse(catalog.is_loaded)
+        self.assertEqual(catalog.version, 0)
+        self.assertIn("60973129", catalog.books)
+        self.assertTrue(catalog.is_loaded)
+        self.assertEqual(catalog.version, 1)
+        self.assertEqual(catalog.year_index["1991"], {"60973129", "399135782"})
+
+    def test_registry(self):
+        registry=CatalogRegistry()
+        ten=registry.register("ten", "10books.csv")
+        hundred=registry.register("hundred", "100books.csv")
+        registry.register("missing", "no_such_file.csv")
+        self.assertIs(registry.register("ten", "100books.csv"), ten)
+        self.assertEqual(registry.names(), ["ten", "hundred", "missing"])
+        self.assertEqual(registry.available_names(), ["ten", "hundred"])
+        self.assertEqual(registry.loaded_names(), [])
+        self.assertEqual(len(ten.books), 10)
+        self.assertEqual(len(hundred.books), 95)
+        self.assertEqual(registry.loaded_names(), ["ten", "hundred"])
+        registry.unload("hundred")
+        self.assertEqual(registry.loaded_names(), ["ten"])
+        self.assertRaises(KeyError, registry.get, "thousand")
+
+    def test_registry_swap(self):
+        registry=CatalogRegistry()
+        catalog=registry.register("books", "10books.csv")
+        self.assertEqual(len(catalog.books), 10)
+        version=catalog.version
+        self.assertIs(registry.swap("books", "100books.csv"), catalog)
+        self.assertEqual(len(catalog.books), 95)
+        self.assertEqual(catalog.path, "100books.csv")
+        self.assertGreater(catalog.version, version)
+
+class TestCatalogEdits(unittest.TestCase):
+    def setUp(self):
+        self.catalog=Catalog("ten", "10books.csv")
+
+    def assertConsistent(self):
+        title_author_publisher_index, year_index=create_indexes(self.catalog.books)
+        self.assertEqual(self.catalog.title_author_publisher_index, title_author_publisher_index)
+        self.assertEqual(self.catalog.year_index, year_index)
+        self.assertEqual(self.catalog.search_source, sorted(title_author_publisher_index.keys(), key=lambda word: (len(word), word)))
+        self.assertEqual(self.catalog.isbns, sorted(self.catalog.books.keys()))
+
+    def test_insert_book(self):
+        self.catalog.search_source, self.catalog.isbns # build the derived structures before editing
+        version=self.catalog.version
+        self.catalog.insert_book("1234567890", {"Title": "The Mummies Return", "Author": "Amy Tan", "Publisher": "Random House", "Year": "2001"})
+        self.assertGreater(self.catalog.version, version)
+        self.assertEqual(self.catalog.title_author_publisher_index["mummies"], {"393045218", "1234567890"})
+        self.assertEqual(self.catalog.title_author_publisher_index["return"], {"1234567890"})
+        self.assertEqual(self.catalog.year_index["2001"], {"2005018", "1234567890"})
+        self.assertConsistent()
+        self.assertRaises(ValueError, self.catalog.insert_book, "1234567890", self.catalog.books["1234567890"])
+
+    def test_update_book(self):
+        self.catalog.search_source, self.catalog.isbns
+        self.catalog.update_book("393045218", {"Title": "The Mummies of Xinjiang", "Year": "2000"})
+        self.assertNotIn("urumchi", self.catalog.title_author_publisher_index)
+        self.assertNotIn("urumchi", self.catalog.search_source)
+        self.assertEqual(self.catalog.title_author_publisher_index["xinjiang"], {"393045218"})
+        self.assertEqual(self.catalog.year_index["1999"], {"374157065"})
+        self.assertEqual(self.catalog.books["393045218"]["Author"], "E. J. W. Barber")
+        self.assertConsistent()
+        self.assertRaises(KeyError, self.catalog.update_book, "1234567890", {"Year": "2000"})
+
+    def test_delete_book(self):
+        self.catalog.search_source, self.catalog.isbns
+        self.catalog.delete_book("399135782")
+        self.assertNotIn("399135782", self.catalog.books)
+        self.assertEqual(self.catalog.title_author_publisher_index["group"], {"425176428"})
+        self.assertNotIn("kitchen", self.catalog.title_author_publisher_index)
+        self.assertConsistent()
+        for isbn in list(self.catalog.books.keys()):
+            self.catalog.delete_book(isbn)
+        self.assertEqual(self.catalog.title_author_publisher_index, {})
+        self.assertEqual(self.catalog.year_index, {})
+        self.assertEqual(self.catalog.search_source, [])
+        self.assertEqual(self.catalog.isbns, [])
+        self.assertRaises(KeyError, self.catalog.delete_book, "399135782")
+
+    def test_edits_do_not_change_what_a_search_holds(self):
+        catalog=self.catalog
+        held=(catalog.books, catalog.title_author_publisher_index, catalog.year_index, catalog.search_source, catalog.isbns, catalog.field_index("Title"), catalog.field_search_source("Title"))
+        copies=[pickle.loads(pickle.dumps(objects)) for objects in held]
+        catalog.insert_book("1234567890", {"Title": "The Mummies Return", "Author": "Amy Tan", "Publisher": "Random House", "Year": "2001"})
+        catalog.update_book("393045218", {"Title": "The Mummies of Xinjiang", "Year": "2000"})
+        catalog.delete_book("399135782")
+        self.assertEqual(list(held), copies)
+        self.assertConsistent()
+
+    def test_lookup_index_searches_hold_the_lookup_lock(self):
+        searching=threading.Event()
+        edited=threading.Event()
+        bk_tree=self.catalog.bk_tree()
+        search=bk_tree.search
+        def slow_search(word, max_distance):
+            searching.set()
+            edited.wait(0.2) # an edit cannot change the BK-tree before the search is done
+            return search(word, max_distance)
+        bk_tree.search=slow_search
+        matcher=self.catalog.levenshtein_matcher(engine=LevenshteinEngine.BK_TREE)
+        del bk_tree.search
+        results=[]
+        search_thread=threading.Thread(target=lambda: results.append(matcher("mumies", 1)))
+        search_thread.start()
+        searching.wait()
+        self.catalog.update_book("393045218", {"Title": "The Mummys of Xinjiang"})
+        edited.set()
+        search_thread.join()
+        self.assertEqual(results, [{1: ["mummies"]}])
+        self.assertEqual(self.catalog.bk_tree().search("mummy", 1), {1: ["mummys"]})
+
+class TestBookIngest(unittest.TestCase):
+    def test_ingest_csv(self):
+        expected=load_books_and_indexes("1000books.csv", use_snapshot=False)[:3]
+        books, title_author_publisher_index, year_index, stats=book_ingest.ingest_csv("1000books.csv", chunk_size=128)
+        self.assertEqual((books, title_author_publisher_index, year_index), expected)
+        self.assertEqual(stats.rows, 1000)
+        self.assertEqual(stats.books, len(expected[0]))
+        self.assertEqual(stats.chunks, 8)
+
+    def test_digit_isbns_keep_leading_zeros(self):
+        temp_dir=tempfile.mkdtemp()
+        try:
+            path=os.path.join(temp_dir, "digits.csv")
+            with open(path, "w") as file:
+                file.write("ISBN,Title,Author,Year,Publisher\n0002005018,Clara Callan,Richard Bruce Wright,2001,HarperFlamingo Canada\n0060973129,Decision in Normandy,Carlo D'Este,1991,HarperPerennial\n")
+            books=create_books_from_csv(path)
+            self.assertEqual(list(books), ["0002005018", "0060973129"])
+            for chunk_size in (1, 2):
+                self.assertEqual(book_ingest.ingest_csv(path, chunk_size)[0], books)
+        finally:
+            shutil.rmtree(temp_dir)
+
+    def test_ingest_csv_memory_limit(self):
+        if book_ingest.current_rss_mb() is None:
+            self.skipTest("memory use cannot be measured on this system")
+        self.assertRaises(MemoryError, book_ingest.ingest_csv, "100books.csv", 10, 1)
+
+    def test_next_chunk_size(self):
+        self.assertEqual(book_ingest.next_chunk_size(1000, None, 500, 100), 1000)
+        self.assertEqual(book_ingest.next_chunk_size(1000, 600, 500, 0), 1000)
+        self.assertEqual(book_ingest.next_chunk_size(1000, 501, 500, 1024), 512)
+        self.assertEqual(book_ingest.next_chunk_size(1000, 501, 500, 1 << 20), Ingest.MIN_CHUNK_SIZE)
+        self.assertRaises(MemoryError, book_ingest.next_chunk_size, 1000, 500, 500, 100)
+
+class TestCompactIndex(unittest.TestCase):
+    def setUp(self):
+        self.search_index={"group": {"425176428", "399135782"}, "amy": {"399135782"}, "tan": {"399135782"}, 
+                           "publishing": {"425176428"}, "house": {"679425608"}}
+        self.compact_index=CompactIndex(self.search_index)
+
+    def test_lookup(self):
+        self.assertEqual(len(self.compact_index), 5)
+        self.assertEqual(list(self.compact_index), ["amy", "group", "house", "publishing", "tan"])
+        self.assertEqual(self.compact_index["group"], {"425176428", "399135782"})
+        self.assertIn("house", self.compact_index)
+        self.assertNotIn("mummies", self.compact_index)
+        self.assertRaises(KeyError, lambda: self.compact_index["mummies"])
+        self.assertEqual(self.compact_index.to_dict(), self.search_index)
+
+    def test_docids(self):
+        self.assertEqual(self.compact_index.docid("399135782"), 0)
+        self.assertEqual(self.compact_index.isbn(2), "679425608")
+        self.assertRaises(KeyError, self.compact_index.docid, "1")
+        self.assertEqual(list(self.compact_index.postings("group")), [0, 1])
+        self.assertEqual(list(self.compact_index.postings("mummies")), [])
+        self.assertEqual(self.compact_index.isbns(self.compact_index.postings("group")), ["399135782", "425176428"])
+
+    def test_cached_sets(self):
+        self.assertIs(self.compact_index["group"], self.compact_index["group"])
+        self.assertIsNot(self.compact_index.to_dict()["group"], self.compact_index["group"])
+        restored=pickle.loads(pickle.dumps(self.compact_index))
+        self.assertEqual(restored.to_dict(), self.search_index)
+        self.assertEqual(restored["amy"], {"399135782"})
+
+    def test_create_from_books(self):
+        books=create_books_from_csv("1000books.csv")
+        title_author_publisher_index, _=create_indexes(books)
+        compact_index=create_compact_index(books)
+        self.assertEqual(list(compact_index), sorted(title_author_publisher_index))
+        self.assertEqual(compact_index.to_dict(), title_author_publisher_index)
+        books, ingested_index, year_index, _=book_ingest.ingest_csv("1000books.csv", chunk_size=128, compact=True)
+        self.assertIsInstance(ingested_index, CompactIndex)
+        self.assertEqual(ingested_index.to_dict(), title_author_publisher_index)
+        self.assertEqual(year_index, create_indexes(books)[1])
+
+    def test_compact_snapshot(self):
+        temp_dir=tempfile.mkdtemp()
+        try:
+            csv_path=os.path.join(temp_dir, "10books.csv")
+            shutil.copy("10books.csv", csv_path)
+            books, title_author_publisher_index, _, _=load_books_and_indexes(csv_path, compact=True)
+            self.assertIsInstance(title_author_publisher_index, CompactIndex)
+            self.assertIsInstance(book_snapshot.load_snapshot(csv_path)[1], CompactIndex)
+            _, snapshot_index, _, _=load_books_and_indexes(csv_path, compact=True)
+            self.assertEqual(snapshot_index.to_dict(), title_author_publisher_index.to_dict())
+            _, dict_index, _, _=load_books_and_indexes(csv_path)
+            self.assertEqual(dict_index, create_indexes(books)[0])
+        finally:
+            shutil.rmtree(temp_dir)
+
+    def test_merge(self):
+        self.assertEqual(intersect([1, 3, 5, 7], [2, 3, 7, 9]), [3, 7])
+        self.assertEqual(intersect([], [1]), [])
+        self.assertEqual(intersect_all([[1, 3, 5, 7], [3, 4, 5, 7], [5, 7]]), [5, 7])
+        self.assertEqual(intersect_all([]), [])
+        self.assertEqual(union([1, 3, 5], [2, 3, 6]), [1, 2, 3, 5, 6])
+        self.assertEqual(union_all([[1, 4], [2, 4], [3]]), [1, 2, 3, 4])
+
+    def test_search_with_compact_index(self):
+        catalog=Catalog("ten", "10books.csv")
+        compact_catalog=Catalog("compact ten", "10books.csv", compact=True)
+        self.assertIsInstance(compact_catalog.title_author_publisher_index, CompactIndex)
+        for terms in (("group",), ("kitchen", "group")):
+            search_info_key=(terms, SearchType.IN)
+            presenter=Presenter({search_info_key: dict()}, catalog.books, use_gui=False)
+            search_all_with_in_operator(catalog.title_author_publisher_index, catalog.search_source, presenter, search_info_key)
+            compact_presenter=Presenter({search_info_key: dict()}, catalog.books, use_gui=False)
+            search_all_with_in_operator(compact_catalog.title_author_publisher_index, compact_catalog.search_source, compact_presenter, search_info_key)
+            self.assertCountEqual(compact_presenter.search_info[search_info_key][SearchInfo.RESULTS], presenter.search_info[search_info_key][SearchInfo.RESULTS])
+        compact_catalog.delete_book("399135782")
+        self.assertEqual(compact_catalog.title_author_publisher_index["group"], {"425176428"})
+
+class TestCatalogFieldIndexes(unittest.TestCase):
+    def test_field_index(self):
+        catalog=Catalog("ten", "10books.csv")
+        self.assertEqual(catalog.field_index("Title")["flag"], {"679425608"})
+        self.assertNotIn("flag", catalog.field_index("Author"))
+        self.assertIs(catalog.word_index(), catalog.title_author_publisher_index)
+        self.assertIs(catalog.word_index("Author"), catalog.field_index("Author"))
+        self.assertEqual(catalog.word_search_source("Author")[:3], ["amy", "ann", "tan"])
+        self.assertRaises(ValueError, catalog.field_index, "Year")
+
+    def test_field_index_edits(self):
+        catalog=Catalog("ten", "10books.csv")
+        catalog.field_search_source("Author"), catalog.field_search_source("Publisher")
+        catalog.update_book("399135782", {"Author": "Amy Tan Jr", "Publisher": "Putnam"})
+        catalog.insert_book("1234567890", {"Title": "Tan Lines", "Author": "Jo Tan", "Publisher": "Random House", "Year": "2001"})
+        for field in ("Author", "Publisher"):
+            self.assertEqual(catalog.field_index(field), create_field_index(catalog.books, field))
+            self.assertEqual(catalog.field_search_source(field), sorted(catalog.field_index(field), key=lambda word: (len(word), word)))
+        self.assertEqual(catalog.field_index("Author")["tan"], {"399135782", "1234567890"})
+        self.assertEqual(catalog.field_index("Publisher")["group"], {"425176428"})
+        self.assertEqual(catalog.field_index("Title")["tan"], {"1234567890"}) # built after the edits
+
+class TestStartup(unittest.TestCase):
+    def test_main_window_import(self):
+        import_time, heavy_modules, _=time_import("main_window")
+        self.assertEqual(heavy_modules, [])
+        self.assertLess(import_time, 1.0)
+
+    def test_search_modules_do_not_import_nltk(self):
+        _, heavy_modules, _=time_import("book_search_window")
+        self.assertNotIn("nltk", heavy_modules)
+
+    def test_stop_words(self):
+        self.assertTrue({"the", "and", "der", "les", "los"} <= get_stop_words())
+        self.assertEqual(prepare_string("The House of the Spirits"), ["house", "spirits"])
+
+class TestPrepareStrings(unittest.TestCase):
+    def test_same_words_as_prepare_string(self):
+        books=create_books_from_csv("1000books.csv")
+        for field in BookField.WORD_FIELDS:
+            texts=[book[field] for book in books.values()]
+            self.assertEqual(prepare_strings(texts), [prepare_string(text) for text in texts])
+
+    def test_special_texts(self):
+        texts=["  The Joy Luck Club ", "", "Harry Potter\nand the Sorcerer's Stone", "caf\u00e9 \t au-lait", "I", "A Supercalifragilisticexpialidocious Tale"]
+        self.assertEqual(prepare_strings(texts), [prepare_string(text) for text in texts]) # the newline in a text makes every text prepared on its own
+        self.assertEqual(prepare_strings(texts[3:]), [prepare_string(text) for text in texts[3:]])
+        self.assertEqual(prepare_strings([]), [])
+
+    def test_indexes_same_as_book_by_book(self):
+        books=create_books_from_csv("100books.csv")
+        title_author_publisher_index={}
+        year_index={}
+        for isbn, book in books.items():
+            for field in BookField.WORD_FIELDS:
+                add_book(title_author_publisher_index, isbn, book, field)
+            add_book(year_index, isbn, book, BookField.YEAR)
+        self.assertEqual(create_indexes(books), (title_author_publisher_index, year_index))
+        author_index={}
+        for isbn, book in books.items():
+            add_book(author_index, isbn, book, BookField.AUTHOR)
+        self.assertEqual(create_field_index(books, BookField.AUTHOR), author_index)
+
+class TestParseFieldScope(unittest.TestCase):
+    def test_parse_field_scope(self):
+        self.assertEqual(parse_field_scope("author: Amy Tan"), ("Author", " Amy Tan"))
+        self.assertEqual(parse_field_scope("  PUBLISHER:random house"), ("Publisher", "random house"))
+        self.assertEqual(parse_field_scope("title:"), ("Title", ""))
+        self.assertEqual(parse_field_scope("Amy Tan"), (None, "Amy Tan"))
+        self.assertEqual(parse_field_scope("year: 1999"), (None, "year: 1999"))
+
 class TestBinarySearch(unittest.TestCase):
     def test_binary_search(self):
         test_words=["apple", "banana", "cherry", "kiwi", "lime"]
@@ -105,6 +520,41 @@ class TestBinarySearchByStringLength(unittest.TestCase):
         self.assertEqual(binary_search_by_string_length(test_words, 3.55), -1) 
         self.assertEqual(binary_search_by_string_length(test_words, "something"), -1) 
 
+class TestBinarySearchBounds(unittest.TestCase):
+    def test_bounds(self):
+        test_ints=[1, 3, 3, 3, 5, 8]
+        self.assertEqual([lower_bound(test_ints, target) for target in (0, 1, 3, 4, 8, 9)], [0, 0, 1, 4, 5, 6])
+        self.assertEqual([upper_bound(test_ints, target) for target in (0, 1, 3, 4, 8, 9)], [0, 1, 4, 4, 6, 6])
+        self.assertEqual(lower_bound(test_ints, 3, start=2), 2)
+        self.assertEqual(upper_bound(test_ints, 3, end=3), 3)
+        self.assertEqual(lower_bound([], 3), 0)
+        test_words=["amy", "tan", "wife", "group", "kitchen"]
+        self.assertEqual(lower_bound(test_words, 5, key=len), 3)
+        self.assertEqual(upper_bound(test_words, 5, key=len), 4)
+
+    def test_find(self):
+        test_ints=[1, 3, 3, 3, 5, 8]
+        self.assertEqual(find(test_ints, 3), 1)
+        self.assertEqual(find(test_ints, 4), Result.NOT_FOUND)
+        self.assertEqual(find(test_ints, 9), Result.NOT_FOUND)
+        self.assertEqual(find(test_ints, 8, start=5), 5)
+        self.assertEqual(find(test_ints, 1, start=1), Result.NOT_FOUND)
+        self.assertEqual(find(["amy", "tan", "wife"], 4, key=len), 2)
+        self.assertEqual(find(["apple", 1], "kiwi"), Result.NOT_FOUND)
+
+    def test_batch(self):
+        test_words=["amy", "ann", "gods", "group", "tan", "wife"]
+        targets=["wife", "zebra", "amy", "group", "fox", "tan", ""]
+        self.assertEqual(batch_lower_bound(test_words, targets), [lower_bound(test_words, target) for target in targets])
+        self.assertEqual(batch_find(test_words, targets), [5, Result.NOT_FOUND, 0, 3, Result.NOT_FOUND, 4, Result.NOT_FOUND])
+        many_targets=[str(number) for number in range(1000)]
+        sorted_targets=sorted(many_targets[::3])
+        self.assertEqual(batch_find(sorted_targets, many_targets), [find(sorted_targets, target) for target in many_targets])
+        self.assertEqual(batch_find(sorted_targets, ["600", "3", "601"]), [find(sorted_targets, target) for target in ("600", "3", "601")]) # a binary search per target
+        self.assertEqual(batch_lower_bound(["amy", "tan", "wife", "group", "kitchen"], [2, 5, 4, 8], key=len), [0, 3, 2, 5])
+        self.assertEqual(batch_find([], ["amy"]), [Result.NOT_FOUND])
+        self.assertEqual(batch_find(test_words, []), [])
+
 class TestLevenshteinDistance(unittest.TestCase):
     def test_levenshtein_distance(self):
         self.assertEqual(levenshtein_distance("kitten", "sitting"), 3)
@@ -113,6 +563,14 @@ class TestLevenshteinDistance(unittest.TestCase):
         self.assertEqual(levenshtein_distance("author", "5"), 6)
         self.assertEqual(levenshtein_distance("author", 5), -1)
         self.assertEqual(levenshtein_distance("author", 5), Result.NOT_FOUND)
+
+    def test_bounded_levenshtein_distance(self):
+        for a_word, b_word in (("kitten", "sitting"), ("reality", "realty"), ("mythology", "methodology"), ("", "abc"), ("flaw", "lawn"), ("abc", "abc")):
+            distance=levenshtein_distance(a_word, b_word)
+            for max_distance in (0, 1, 2, 3):
+                self.assertEqual(levenshtein_distance(a_word, b_word, max_distance), min(distance, max_distance + 1))
+                self.assertEqual(levenshtein_distance(b_word, a_word, max_distance), min(distance, max_distance + 1))
+        self.assertEqual(levenshtein_distance("author", 5, 2), Result.NOT_FOUND)
         
 class TestRemoveSpecialCharacters(unittest.TestCase):
     def test_remove_special_characters(self):
@@ -174,12 +632,99 @@ class TestSearchSingleMatch(unittest.TestCase):
         presenter.search_info.setdefault(search_info_key, dict())
         self.assertEqual(search_single_match({}, test_search_source, "life", presenter, search_info_key), [])
 
-class TestUnpackListOfSets(unittest.TestCase):
-    def test_unpack_list_of_sets(self):
-        self.assertCountEqual(unpack_list_of_sets([{123456, 34567}, {998866}, {1}]), [34567, 123456, 998866, 1])
-        self.assertCountEqual(unpack_list_of_sets([{1, 2}, {}, {3}]), [1, 2, 3])
-        self.assertCountEqual(unpack_list_of_sets([{"1", "2"}, {}, {"3"}]), ["1", "2", "3"])
-        self.assertEqual(unpack_list_of_sets([]), [])
+class TestTrigramIndex(SearchTestCase):
+    def setUp(self):
+        self.words=sorted(create_indexes(create_books_from_csv("100books.csv"))[0].keys(), key=lambda word: (len(word), word))
+        self.trigram_index=TrigramIndex(self.words)
+
+    def test_trigrams(self):
+        self.assertEqual(self.trigram_index.trigrams("amy"), {"$$a", "$am", "amy", "my$", "y$$"})
+        self.assertEqual(self.trigram_index.trigrams("amy", padded=False), {"amy"})
+        self.assertEqual(self.trigram_index.trigrams("am", padded=False), set())
+
+    def test_substring_matches(self):
+        for term in ("lar", "ing", "tion", "the", "mummies", "ab", "a", "zzz", "harperperennial"):
+            self.assertEqual(self.trigram_index.substring_matches(term), [word for word in self.words if term in word])
+
+    def test_search(self):
+        for word in ("reality", "militry", "accordingly", "tan", "a", "xxxxxxxx", "harperperenial", "mythologies"):
+            for max_distance in (0, 1, 2):
+                expected={}
+                for source_word in self.words:
+                    dist=levenshtein_distance(source_word, word)
+                    if dist <= max_distance:
+                        expected.setdefault(dist, list()).append(source_word)
+                self.assertEqual(self.trigram_index.search(word, max_distance), expected)
+
+    def test_add_and_remove(self):
+        self.assertFalse(self.trigram_index.add("mummies"))
+        self.assertTrue(self.trigram_index.remove("mummies"))
+        self.assertFalse(self.trigram_index.remove("mummies"))
+        self.assertEqual(self.trigram_index.substring_matches("mummies"), [])
+        self.assertTrue(self.trigram_index.add("mummy"))
+        self.assertEqual(self.trigram_index.substring_matches("mumm"), ["mummy"])
+        self.assertEqual(self.trigram_index.search("mumy", 1), {1: ["mummy"]})
+        self.assertEqual(len(self.trigram_index), len(self.words))
+
+    def test_search_single_match_with_substring_matcher(self):
+        search_index=create_indexes(create_books_from_csv("100books.csv"))[0]
+        for term in ("lar", "ing", "ab", "zzz"):
+            self.assertSameSearch(((term,), SearchType.IN),
+                                  lambda presenter, search_info_key: search_single_match(search_index, self.words, term, presenter, search_info_key, self.trigram_index.substring_matches),
+                                  lambda presenter, search_info_key: search_single_match(search_index, self.words, term, presenter, search_info_key))
+
+    def test_catalog_trigram_index_edits(self):
+        catalog=Catalog("ten", "10books.csv")
+        self.assertEqual(catalog.substring_matcher(engine=SubstringEngine.TRIGRAM)("mumm"), ["mummies"])
+        self.assertEqual(catalog.levenshtein_matcher(engine=LevenshteinEngine.TRIGRAM)("mumies", 1), {1: ["mummies"]})
+        catalog.trigram_index("Title")
+        catalog.update_book("393045218", {"Title": "The Mummys of Xinjiang"})
+        self.assertEqual(catalog.substring_matcher(engine=SubstringEngine.TRIGRAM)("mumm"), ["mummys"])
+        self.assertEqual(catalog.substring_matcher("Title", SubstringEngine.TRIGRAM)("jiang"), ["xinjiang"])
+        self.assertEqual(catalog.substring_matcher("Title", SubstringEngine.TRIGRAM)("urumchi"), [])
+
+class TestSuffixArray(SearchTestCase):
+    def setUp(self):
+        self.words=sorted(create_indexes(create_books_from_csv("100books.csv"))[0].keys(), key=lambda word: (len(word), word))
+        self.suffix_array=SuffixArray(self.words)
+
+    def test_substring_matches(self):
+        for term in ("lar", "ing", "tion", "the", "mummies", "ab", "a", "zzz", "harperperennial", "harperperennials", ""):
+            self.assertEqual(self.suffix_array.substring_matches(term), [word for word in self.words if term in word])
+        self.assertEqual(SuffixArray().substring_matches("a"), [])
+
+    def test_suffix_range_and_lcp(self):
+        suffix_array=SuffixArray(["banana", "band"]) # suffixes: a, ana, anana, and, band, banana, d, na, nana, nd
+        self.assertEqual(list(suffix_array.lcp), [0, 1, 3, 2, 0, 3, 0, 0, 2, 1])
+        self.assertEqual(suffix_array.suffix_range("an"), (1, 4))
+        self.assertEqual(suffix_array.suffix_range("ban"), (4, 6))
+        self.assertEqual(suffix_array.suffix_range("x"), (10, 10))
+
+    def test_add_and_remove(self):
+        self.assertFalse(self.suffix_array.add("mummies"))
+        self.assertTrue(self.suffix_array.remove("mummies"))
+        self.assertFalse(self.suffix_array.remove("mummies"))
+        self.assertEqual(self.suffix_array.substring_matches("mumm"), [])
+        self.assertTrue(self.suffix_array.add("mummy"))
+        self.assertEqual(self.suffix_array.substring_matches("mumm"), ["mummy"])
+        self.assertEqual(len(self.suffix_array), len(self.words))
+
+    def test_search_all_with_in_operator(self):
+        books=create_books_from_csv("100books.csv")
+        search_index=create_indexes(books)[0]
+        for terms in (("lar",), ("mumm", "lar"), ("zzz",)):
+            self.assertSameSearch((terms, SearchType.IN),
+                                  lambda presenter, search_info_key: search_all_with_in_operator(search_index, self.words, presenter, search_info_key, self.suffix_array.substring_matches),
+                                  lambda presenter, search_info_key: search_all_with_in_operator(search_index, self.words, presenter, search_info_key),
+                                  books)
+
+    def test_catalog_suffix_array_edits(self):
+        catalog=Catalog("ten", "10books.csv")
+        self.assertIsNone(catalog.substring_matcher(engine=SubstringEngine.SCAN))
+        self.assertEqual(catalog.substring_matcher()("mumm"), ["mummies"])
+        catalog.update_book("393045218", {"Title": "The Mummys of Xinjiang"})
+        self.assertEqual(catalog.substring_matcher()("mumm"), ["mummys"])
+        self.assertEqual(catalog.suffix_array("Title").substring_matches("jiang"), ["xinjiang"])
 
 class TestSearchMultipleMatches(unittest.TestCase):
     def test_search_multiple_matches(self):
@@ -224,35 +769,6 @@ class TestSearchMultipleMatches(unittest.TestCase):
         presenter.search_info.setdefault(search_info_key, dict())
         self.assertEqual(search_multiple_matches(test_search_index, test_search_source, ["noisy", "historians"], presenter, search_info_key), [{"425176428"}])
 
-class TestElementsInIntersections(unittest.TestCase):
-    def test_elements_in_intersections(self):
-        test_sets=[{1,2,7,8,11,12}, {3,4,7,8,9,10,11,12}, {5,6,9,10,11,12}]
-        test_disjoint_sets=[{1,2,3}, {4,5,6}, {7,8,9}]
-        self.assertEqual(elements_in_intersections(test_sets, 2, {11, 12}), [{7,8},{9,10}])
-        self.assertEqual(elements_in_intersections(test_disjoint_sets, 2, set()), [])
-        self.assertEqual(elements_in_intersections([], 2, set()), [])
-        self.assertEqual(elements_in_intersections(test_sets, -1, {11,12}), [])
-
-class TestFindAllElementsInIntersections(unittest.TestCase):
-    def test_find_all_elements_in_intersections(self):
-        test_sets=[{1,2,7,8,11,12}, {3,4,7,8,9,10,11,12}, {5,6,9,10,11,12}]
-        test_disjoint_sets=[{1,2,3}, {4,5,6}, {7,8,9}]
-        test_string_sets=[{"apple", "banana"}, {"apple", "kiwi", "cherry"}, {"apple"}, {"apple", "cherry"} ]
-        self.assertEqual(find_all_elements_in_intersections(test_sets),[{11,12}, {7,8}, {9,10}])
-        self.assertEqual(find_all_elements_in_intersections(test_string_sets), [{"apple"}, {"cherry"}])
-        self.assertEqual(find_all_elements_in_intersections(test_disjoint_sets), [])
-        self.assertEqual(find_all_elements_in_intersections([]), [])
-
-class TestFindAllSetDifferences(unittest.TestCase):
-    def test_find_all_set_differences(self):
-        test_sets=[{1,2,7,8,11,12}, {3,4,7,8,9,10,11,12}, {5,6,9,10,11,12}]
-        test_disjoint_sets=[{1,2,3}, {4,5,6}, {7,8,9}]
-        test_string_sets=[{"apple", "banana"}, {"apple", "kiwi"}, {"apple"}, {"apple", "cherry"} ]
-        self.assertCountEqual(find_all_set_differences(test_sets, [11,12,10,9,8,7]), [1,2,3,4,5,6])
-        self.assertCountEqual(find_all_set_differences(test_disjoint_sets, []), [1,2,3,4,5,6,7,8,9])
-        self.assertCountEqual(find_all_set_differences(test_string_sets, ["apple"]), ["banana", "cherry", "kiwi"])
-        self.assertEqual(find_all_set_differences([], [1,2,3]), [])
-
 class TestRankResults(unittest.TestCase):
     def test_rank_results(self):
         test_results=[{"1","2","7","8","11","12"}, {"3","4","7","8","9","10","11","12"}, {"5","6","9","10","11","12"}]
@@ -261,6 +777,21 @@ class TestRankResults(unittest.TestCase):
         self.assertCountEqual(rank_results(test_results_disjoint), ["123", "133", "234", "345", "567"])
         self.assertEqual(rank_results([]), [])
 
+    def test_rank_results_order(self):
+        self.assertEqual(rank_results([{"a", "b"}, {"b", "c"}, {"b", "c", "d"}]), ["b", "c", "a", "d"])
+        self.assertEqual(rank_results([{"a"}, {"a"}]), ["a"])
+        ranked=rank_results([{"1", "2", "7", "8", "11", "12"}, {"3", "4", "7", "8", "9", "10", "11", "12"}, {"5", "6", "9", "10", "11", "12"}])
+        self.assertCountEqual(ranked[:2], ["11", "12"])
+        self.assertCountEqual(ranked[2:6], ["7", "8", "9", "10"])
+        self.assertCountEqual(ranked[6:], ["1", "2", "3", "4", "5", "6"])
+
+    def test_rank_results_many_sets(self):
+        results=[set(str(isbn) for isbn in range(start, start + 50)) for start in range(40)] # far too many for all combinations
+        ranked=rank_results(results)
+        self.assertEqual(len(ranked), 89)
+        self.assertCountEqual(ranked[:11], [str(isbn) for isbn in range(39, 50)])
+        self.assertCountEqual(ranked[-2:], ["0", "88"])
+
 class TestSliceListForLevenshteinSearch(unittest.TestCase):
     def test_slice_list_for_levenshtein_search(self):
         test_words=["flu", "amp", "amy", "tan", "pub", "ann", "mark", "1918", "gina", "bari", "gods", "wife", 
@@ -284,6 +815,114 @@ class TestSliceListForLevenshteinSearch(unittest.TestCase):
         self.assertEqual(slice_list_for_levenshtein_search([], 4), [])
         self.assertEqual(slice_list_for_levenshtein_search(test_words, "hello"), test_words)
 
+class TestVocabulary(SearchTestCase):
+    def setUp(self):
+        self.words=["amy", "tan", "wife", "group", "kitchen"]
+        self.vocabulary=Vocabulary(self.words)
+
+    def test_length_buckets(self):
+        self.assertEqual(self.vocabulary.offsets, [0, 0, 0, 0, 2, 3, 4, 4, 5])
+        self.assertEqual(self.vocabulary.max_length, 7)
+        self.assertEqual(self.vocabulary.words_of_length(3), ["amy", "tan"])
+        self.assertEqual(self.vocabulary.words_of_length(6), [])
+        self.assertEqual(self.vocabulary.length_range(4), ["wife", "group", "kitchen"])
+        self.assertEqual(self.vocabulary.length_range(-1, 4), ["amy", "tan", "wife"])
+        self.assertEqual(self.vocabulary.length_range(8, 20), [])
+        self.assertEqual(self.vocabulary.length_range(5, 3), [])
+        self.assertEqual(Vocabulary([]).length_range(1, 3), [])
+        self.assertEqual(list(self.vocabulary), self.words)
+
+    def test_word_view(self):
+        view=self.vocabulary.length_range(3, 5)
+        self.assertIsInstance(view, WordView)
+        self.assertEqual(len(view), 4)
+        self.assertEqual((view[0], view[-1]), ("amy", "group"))
+        self.assertEqual(view[1:3], ["tan", "wife"])
+        self.assertIsInstance(view[1:3], WordView)
+        self.assertEqual(view[::2], ["amy", "wife"])
+        self.assertRaises(IndexError, view.__getitem__, 4)
+        self.assertIn("wife", view)
+        self.assertNotIn("kitchen", view)
+
+    def test_search_with_vocabulary(self):
+        books=create_books_from_csv("100books.csv")
+        search_index=create_indexes(books)[0]
+        search_source=sorted(search_index, key=lambda word: (len(word), word))
+        vocabulary=Vocabulary(search_source)
+        for terms in (("mumies",), ("reality", "pirats"), ("lar", "an")):
+            for search_type in (SearchType.LEVENSHTEIN, SearchType.IN):
+                search=search_all_with_levenshtein_distance if search_type == SearchType.LEVENSHTEIN else search_all_with_in_operator
+                self.assertSameSearch((terms, search_type),
+                                      lambda presenter, search_info_key: search(search_index, vocabulary, presenter, search_info_key),
+                                      lambda presenter, search_info_key: search(search_index, search_source, presenter, search_info_key),
+                                      books)
+
+    def test_catalog_vocabulary(self):
+        catalog=Catalog("ten", "10books.csv")
+        vocabulary=catalog.vocabulary()
+        self.assertIs(catalog.vocabulary(), vocabulary)
+        self.assertEqual(list(vocabulary), catalog.search_source)
+        catalog.insert_book("0000000001", {"Title": "Unbelievably", "Author": "A. Writer", "Publisher": "Press", "Year": "2001"})
+        self.assertIsNot(catalog.vocabulary(), vocabulary)
+        self.assertEqual(catalog.vocabulary().words_of_length(12), ["unbelievably"])
+        self.assertEqual(catalog.vocabulary(BookField.AUTHOR).words_of_length(3), ["amy", "ann", "tan"])
+
+class TestParallelLevenshtein(SearchTestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.books=create_books_from_csv("100books.csv")
+        cls.search_index=create_indexes(cls.books)[0]
+        cls.vocabulary=Vocabulary(sorted(cls.search_index, key=lambda word: (len(word), word)))
+        cls.parallel_levenshtein=ParallelLevenshtein(cls.vocabulary, workers=2, min_shard_size=10)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.parallel_levenshtein.close()
+
+    def test_shards(self):
+        self.assertEqual(self.parallel_levenshtein.shards(0, 100), [(0, 50), (50, 100)])
+        self.assertEqual(self.parallel_levenshtein.shards(5, 20), [(5, 20)])
+        self.assertEqual(self.parallel_levenshtein.shards(3, 3), [(3, 3)])
+
+    def test_distances(self):
+        terms_and_views=[("mumies", self.vocabulary.length_range(4, 8)), ("an", self.vocabulary.length_range(0, 4)), ("pirats", ["pirate", "rats", "parrots"])]
+        expected=[MyersPattern(term).distances(view, 2) for term, view in terms_and_views]
+        self.assertEqual(self.parallel_levenshtein.distances(terms_and_views, 2), expected)
+        self.assertEqual(self.parallel_levenshtein.distances([], 2), [])
+
+    def test_same_results_as_one_process(self):
+        for terms in (("mumies",), ("reality", "pirats"), ("lar", "an", "cristmas")):
+            self.assertSameSearch((terms, SearchType.LEVENSHTEIN),
+                                  lambda presenter, search_info_key: search_all_with_levenshtein_distance(self.search_index, self.vocabulary, presenter, search_info_key, parallel_levenshtein=self.parallel_levenshtein),
+                                  lambda presenter, search_info_key: search_all_with_levenshtein_distance(self.search_index, self.vocabulary, presenter, search_info_key),
+                                  self.books)
+
+    def test_workers_are_not_forked(self):
+        self.assertIn(worker_context().get_start_method(), ("forkserver", "spawn"))
+
+    def test_distances_after_close(self):
+        terms_and_views=[("mumies", self.vocabulary.length_range(4, 8)), ("pirats", self.vocabulary.length_range(4, 8))]
+        expected=[MyersPattern(term).distances(view, 2) for term, view in terms_and_views]
+        parallel_levenshtein=ParallelLevenshtein(self.vocabulary, workers=2, min_shard_size=1)
+        results=[]
+        search_thread=threading.Thread(target=lambda: results.extend(parallel_levenshtein.distances(terms_and_views * 20, 2) for _ in range(3)))
+        search_thread.start()
+        parallel_levenshtein.close() # e.g. an edit while the search waits for the workers
+        search_thread.join()
+        self.assertEqual(results, [expected * 20] * 3)
+        self.assertEqual(parallel_levenshtein.distances(terms_and_views, 2), expected)
+
+    def test_cancelled_distances(self):
+        terms_and_views=[("mumies", self.vocabulary.length_range(4, 8)), ("pirats", self.vocabulary.length_range(4, 8))]
+        token=CancellationToken()
+        token.cancel()
+        self.assertEqual(self.parallel_levenshtein.distances(terms_and_views, 2, token), [])
+        self.assertEqual(self.parallel_levenshtein.distances(terms_and_views, 2), [MyersPattern(term).distances(view, 2) for term, view in terms_and_views])
+
+    def test_catalog_without_parallel_search(self):
+        catalog=Catalog("ten", "10books.csv")
+        self.assertIsNone(catalog.parallel_levenshtein()) # far fewer words than Parallel.MIN_VOCABULARY_SIZE
+
 class TestSearchByLevenshteinDistance(unittest.TestCase):
     def test_search_by_levenshtein_distance(self):
          test_search_index={"classical": {"195153448"}, "mythology": {"195153448"}, "mark": {"195153448"}, 
@@ -326,40 +965,343 @@ class TestSearchByLevenshteinDistance(unittest.TestCase):
          self.assertEqual(search_by_levenshtein_distance(test_words_to_search, None, search_info_key), {})
          self.assertEqual(search_by_levenshtein_distance(test_words_to_search, presenter, tuple()), {})
 
-class TestOrderResults(unittest.TestCase):
-    def test_order_results(self):
-        test_search_index={"classical": {"195153448"}, "mythology": {"195153448"}, "mark": {"195153448"}, 
-                          "morford": {"195153448"}, "oxford": {"195153448"}, "university": {"195153448"}, 
-                          "press": {"195153448"}, "clara": {"2005018"}, "callan": {"2005018"}, 
-                          "richard": {"2005018"}, "bruce": {"2005018"}, "wright": {"2005018"}, 
-                          "harperflamingo": {"2005018"}, "canada": {"2005018"}, "decision": {"60973129"}, 
-                          "normandy": {"60973129"}, "carlo": {"60973129"}, "deste": {"60973129"}, 
-                          "harperperennial": {"60973129"}, "flu": {"374157065"}, "story": {"374157065"}, 
-                          "great": {"374157065"}, "influenza": {"374157065"}, "pandemic": {"374157065"}, 
-                          "1918": {"374157065"}, "search": {"374157065"}, "virus": {"374157065"}, 
-                          "caused": {"374157065"}, "gina": {"374157065"}, "bari": {"374157065"}, 
-                          "kolata": {"374157065"}, "farrar": {"374157065"}, "straus": {"374157065"}, 
-                          "giroux": {"374157065"}, "mummies": {"393045218"}, "urumchi": {"393045218"}, 
-                          "barber": {"393045218"}, "norton": {"393045218"}, "amp": {"393045218"}, 
-                          "company": {"393045218"}, "kitchen": {"399135782"}, "gods": {"399135782"}, 
-                          "wife": {"399135782"}, "amy": {"399135782"}, "tan": {"399135782"}, 
-                          "putnam": {"399135782"}, "pub": {"399135782"}, "group": {"425176428", "399135782"}, 
-                          "worlds": {"425176428"}, "foremost": {"425176428"}, "military": {"425176428"}, 
-                          "historians": {"425176428"}, "imagine": {"425176428"}, "might": {"425176428"}, 
-                          "robert": {"425176428"}, "cowley": {"425176428"}, "berkley": {"425176428"}, 
-                          "publishing": {"425176428"}, "pleading": {"671870432"}, "guilty": {"671870432"}, 
-                          "scott": {"671870432"}, "turow": {"671870432"}, "audioworks": {"671870432"}, 
-                          "black": {"679425608"}, "flag": {"679425608"}, "romance": {"679425608"}, 
-                          "reality": {"679425608"}, "life": {"679425608"}, "among": {"679425608"}, 
-                          "pirates": {"679425608"}, "david": {"679425608"}, "cordingly": {"679425608"}, 
-                          "random": {"679425608"}, "house": {"679425608"}, "youll": {"074322678X"}, 
-                          "find": {"074322678X"}, "stories": {"074322678X"}, "ann": {"074322678X"}, 
-                          "beattie": {"074322678X"}, "scribner": {"074322678X"}}
-        test_search_results={0: ["reality", "wife"], 1:["military", "romance"], 2:["cordingly", "guilty"]}
-        expected_output=["399135782", "679425608", "425176428", "679425608", "671870432", "679425608"]
-        self.assertCountEqual(order_results(test_search_results, test_search_index), expected_output)
-        self.assertEqual(order_results({}, test_search_index), [])
-        self.assertEqual(order_results(test_search_results, {}), [])
+class TestBKTree(unittest.TestCase):
+    def setUp(self):
+        self.words=sorted(create_indexes(create_books_from_csv("10books.csv"))[0].keys(), key=lambda word: (len(word), word))
+        self.bk_tree=BKTree(self.words)
+
+    def scan(self, word, max_distance):
+        results={}
+        for source_word in self.words:
+            dist=levenshtein_distance(source_word, word)
+            if dist <= max_distance:
+                results.setdefault(dist, list()).append(source_word)
+        return results
+
+    def test_search(self):
+        self.assertEqual(len(self.bk_tree), len(self.words))
+        for word in ("reality", "militry", "accordingly", "tan", "a", "xxxxxxxx", "harperperenial"):
+            for max_distance in (0, 1, 2, 3):
+                self.assertEqual(self.bk_tree.search(word, max_distance), self.scan(word, max_distance))
+        self.assertEqual(BKTree().search("reality", 2), {})
+
+    def test_add_and_remove(self):
+        self.assertFalse(self.bk_tree.add("reality"))
+        self.assertTrue(self.bk_tree.remove("reality"))
+        self.assertFalse(self.bk_tree.remove("reality"))
+        self.assertFalse(self.bk_tree.remove("unknown"))
+        self.assertEqual(self.bk_tree.search("realit", 1), {})
+        self.assertTrue(self.bk_tree.add("reality"))
+        self.assertTrue(self.bk_tree.add("realty"))
+        self.assertEqual(self.bk_tree.search("realit", 2), {1: ["reality"], 2: ["realty"]})
+        self.assertEqual(len(self.bk_tree), len(self.words) + 1)
+
+    def test_search_with_word_matcher(self):
+        for terms in (("reality", "militry", "accordingly"), ("realit", "militry", "crdingly"), ("tan", "amy")):
+            search_info_key=(terms, SearchType.LEVENSHTEIN)
+            presenter=Presenter({search_info_key: dict()}, dict(), use_gui=False)
+            scan_presenter=Presenter({search_info_key: dict()}, dict(), use_gui=False)
+            results=search_with_word_matcher(self.bk_tree.search, presenter, search_info_key)
+            scan_results=search_by_levenshtein_distance(self.words, scan_presenter, search_info_key)
+            self.assertEqual({dist: sorted(words) for dist, words in results.items()}, {dist: sorted(words) for dist, words in scan_results.items()})
+        self.assertEqual(search_with_word_matcher(None, presenter, search_info_key), {})
+
+    def test_catalog_bk_tree_edits(self):
+        catalog=Catalog("ten", "10books.csv")
+        self.assertIsNone(catalog.levenshtein_matcher(engine=LevenshteinEngine.LINEAR))
+        self.assertEqual(catalog.levenshtein_matcher(engine=LevenshteinEngine.BK_TREE)("mumies", 1), {1: ["mummies"]})
+        catalog.bk_tree("Author")
+        catalog.update_book("393045218", {"Title": "The Mummys of Xinjiang", "Author": "Jo Tan"})
+        self.assertEqual(catalog.bk_tree().search("mummy", 1), {1: ["mummys"]})
+        self.assertEqual(catalog.bk_tree("Author").search("tan", 0), {0: ["tan"]})
+        self.assertEqual(catalog.bk_tree("Author").search("barber", 0), {})
+        self.assertEqual(len(catalog.bk_tree()), len(catalog.search_source))
+
+class TestDeletionIndex(unittest.TestCase):
+    def setUp(self):
+        self.search_index=create_indexes(create_books_from_csv("100books.csv"))[0]
+        self.words=sorted(self.search_index.keys(), key=lambda word: (len(word), word))
+
+    def scan(self, word, max_distance):
+        results={}
+        for source_word in self.words:
+            dist=levenshtein_distance(source_word, word)
+            if dist <= max_distance:
+                results.setdefault(dist, list()).append(source_word)
+        return results
+
+    def test_search(self):
+        for prefix_length in (None, 7, 3):
+            deletion_index=DeletionIndex(self.words, prefix_length=prefix_length)
+            self.assertEqual(len(deletion_index), len(self.words))
+            for word in ("reality", "militry", "accordingly", "tan", "a", "xxxxxxxx", "harperperenial", "mythologies"):
+                for max_distance in (0, 1, 2):
+                    self.assertEqual(deletion_index.search(word, max_distance), self.scan(word, max_distance))
+        self.assertRaises(ValueError, deletion_index.search, "reality", 3)
+        self.assertEqual(DeletionIndex().search("reality", 2), {})
+        self.assertEqual(create_deletion_index(self.search_index).search("militry", 2), self.scan("militry", 2))
+
+    def test_deletions(self):
+        self.assertEqual(DeletionIndex(max_distance=1).deletions("amy"), {"amy", "my", "ay", "am"})
+        self.assertEqual(DeletionIndex(max_distance=1, prefix_length=2).deletions("amy"), {"am", "m", "a"})
+
+    def test_add_and_remove(self):
+        deletion_index=DeletionIndex(["reality", "realty", "mummies"])
+        entry_count=deletion_index.entry_count()
+        self.assertFalse(deletion_index.add("reality"))
+        self.assertTrue(deletion_index.add("mummy"))
+        self.assertEqual(deletion_index.search("mumy", 1), {1: ["mummy"]})
+        self.assertTrue(deletion_index.remove("mummy"))
+        self.assertFalse(deletion_index.remove("mummy"))
+        self.assertNotIn("mummy", deletion_index)
+        self.assertEqual(deletion_index.entry_count(), entry_count)
+        self.assertTrue(deletion_index.remove("reality"))
+        self.assertEqual(deletion_index.search("realit", 2), {2: ["realty"]})
+
+    def test_max_entries(self):
+        deletion_index=DeletionIndex(["amy"], max_distance=1, max_entries=6)
+        self.assertEqual(deletion_index.entry_count(), 4)
+        self.assertTrue(deletion_index.add("am")) # "am", "a" and "m", of which "a" and "m" are new
+        self.assertEqual(deletion_index.entry_count(), 6)
+        self.assertRaises(MemoryError, deletion_index.add, "tan")
+        self.assertNotIn("tan", deletion_index)
+        self.assertRaises(MemoryError, DeletionIndex, self.words, max_entries=100)
+
+    def test_catalog_deletion_index_edits(self):
+        catalog=Catalog("ten", "10books.csv")
+        self.assertEqual(catalog.levenshtein_matcher(engine=LevenshteinEngine.SYMSPELL)("mumies", 1), {1: ["mummies"]})
+        catalog.deletion_index("Author"), catalog.bk_tree()
+        catalog.update_book("393045218", {"Title": "The Mummys of Xinjiang", "Author": "Jo Tan"})
+        for search in (catalog.deletion_index().search, catalog.bk_tree().search):
+            self.assertEqual(search("mummy", 1), {1: ["mummys"]})
+        self.assertEqual(catalog.deletion_index("Author").search("tan", 0), {0: ["tan"]})
+        self.assertEqual(catalog.deletion_index("Author").search("barber", 0), {})
+
+    def test_catalog_deletion_index_over_limit(self):
+        catalog=Catalog("ten", "10books.csv")
+        too_large=lambda search_index: create_deletion_index(search_index, max_entries=10)
+        with mock.patch("book_data.create_deletion_index", side_effect=too_large) as build:
+            for _ in range(3):
+                self.assertIsNone(catalog.levenshtein_matcher(engine=LevenshteinEngine.SYMSPELL))
+            self.assertEqual(build.call_count, 1) # the failure is kept for the version of the catalog
+            self.assertRaises(MemoryError, catalog.deletion_index)
+            catalog.update_book("393045218", {"Year": "2004"})
+            self.assertIsNone(catalog.levenshtein_matcher(engine=LevenshteinEngine.SYMSPELL))
+            self.assertEqual(build.call_count, 2)
+        catalog.load()
+        self.assertEqual(catalog.levenshtein_matcher(engine=LevenshteinEngine.SYMSPELL)("mumies", 1), {1: ["mummies"]})
+
+class TestMyersPattern(unittest.TestCase):
+    def test_distance(self):
+        words=sorted(create_indexes(create_books_from_csv("100books.csv"))[0].keys())
+        for pattern in ("reality", "militry", "accordingly", "tan", "a", "", "harperperennial", "x" * 70):
+            myers_pattern=MyersPattern(pattern)
+            expected=[levenshtein_distance(word, pattern) for word in words]
+            self.assertEqual([myers_pattern.distance(word) for word in words], expected)
+            self.assertEqual(myers_pattern.distances(words), expected)
+            self.assertEqual(myers_pattern.distances(words, use_numpy=False), expected)
+            self.assertEqual(myers_pattern.distances(words, 2), [min(distance, 3) for distance in expected])
+
+    def test_match_masks(self):
+        self.assertEqual(MyersPattern("tan").match_masks, {"t": 0b001, "a": 0b010, "n": 0b100})
+        self.assertEqual(MyersPattern("anna").match_masks, {"a": 0b1001, "n": 0b0110})
+        self.assertEqual(MyersPattern("kitten").distances([]), [])
+        self.assertEqual(MyersPattern("kitten").distances(["sitting", "", "kitten"]), [3, 6, 0])
+
+class TestResultPages(unittest.TestCase):
+    def setUp(self):
+        self.search_index={"amy": {"399135782"}, "tan": {"399135782"}, "group": {"425176428", "399135782"},
+                           "guilty": {"671870432"}, "reality": {"679425608"}, "romance": {"679425608"}}
+
+    def test_pages_match_rank_results(self):
+        for results in ({0: ["reality", "tan"], 1: ["romance", "guilty"], 2: ["group"]}, {2: ["tan"], 1: ["amy", "tan", "group"]}, {}):
+            for page_size in (1, 2, 5):
+                result_pages=ResultPages([[self.search_index[word] for word in results[distance]] for distance in sorted(results)], page_size)
+                pages=[]
+                for number in range(result_pages.page_count):
+                    page=result_pages.page(number)
+                    self.assertLessEqual(len(page), page_size)
+                    pages.extend(page)
+                expected=[]
+                for distance in sorted(results): # every ISBN once, ranked in its lowest tier
+                    expected.extend(isbn for isbn in rank_results([self.search_index[word] for word in results[distance]]) if isbn not in expected)
+                self.assertEqual(pages, expected)
+                self.assertEqual(result_pages.page(result_pages.page_count), [])
+                self.assertEqual(len(pages), len(result_pages))
+
+    def test_isbn_in_several_tiers(self):
+        result_pages=ResultPages([[{"1"}], [{"2"}, {"1"}, {"2"}], [{"1"}, {"3"}]], page_size=1)
+        self.assertEqual(len(result_pages), 3)
+        self.assertEqual([result_pages.page(number) for number in range(3)], [["1"], ["2"], ["3"]])
+        self.assertEqual(result_pages.page_count, 3)
+
+    def test_pages_after_the_first(self):
+        result_sets=[{str(isbn) for isbn in range(start, 500, step)} for start, step in ((0, 1), (0, 2), (0, 3), (1, 7))]
+        expected=rank_results(result_sets)
+        for page_size in (7, 20, 500):
+            result_pages=ResultPages([result_sets], page_size)
+            self.assertEqual(result_pages.page(2), expected[2 * page_size:3 * page_size]) # pages can be asked for in any order
+            pages=result_pages.page(0) + result_pages.page(1) + result_pages.page(2)
+            self.assertEqual(pages + result_pages.isbns(3 * page_size), expected)
+            self.assertEqual(result_pages.page(1), expected[page_size:2 * page_size]) # and again
+
+    def test_single_tier_matches_rank_results(self):
+        result_sets=[{"1", "2"}, {"2", "3"}, {"3", "2", "4"}, {"5"}]
+        result_pages=ResultPages([result_sets], page_size=2)
+        self.assertEqual(len(result_pages), 5)
+        self.assertEqual(result_pages.page(0), rank_results(result_sets)[:2])
+        self.assertEqual(result_pages.isbns(2), rank_results(result_sets)[2:])
+        self.assertEqual(result_pages.isbns(), rank_results(result_sets))
+        self.assertRaises(ValueError, ResultPages, [result_sets], 0)
+        self.assertEqual(ResultPages([result_sets]), ResultPages([result_sets]))
+        self.assertNotEqual(ResultPages([result_sets]), result_pages)
+
+    def test_presenter_pages(self):
+        books=create_books_from_csv("100books.csv")
+        search_index=create_indexes(books)[0]
+        search_info_key=(("e",), SearchType.IN)
+        presenter=Presenter({search_info_key: dict()}, books, use_gui=False)
+        search_all_with_in_operator(search_index, sorted(search_index, key=len), presenter, search_info_key)
+        search_info=presenter.search_info[search_info_key]
+        result_pages=search_info[SearchInfo.PAGES]
+        self.assertGreater(len(result_pages), Search.PAGE_SIZE)
+        self.assertEqual(len(search_info[SearchInfo.RESULTS]), Search.PAGE_SIZE)
+        self.assertEqual(len(search_info[SearchInfo.MATCHED_BOOK_INFO]), Search.PAGE_SIZE)
+        shown_count=Search.PAGE_SIZE
+        while presenter.has_next_page(search_info_key):
+            page=presenter.next_page(search_info_key)
+            self.assertEqual(page, search_info[SearchInfo.MATCHED_BOOK_INFO][shown_count:])
+            shown_count += len(page)
+        self.assertEqual(shown_count, len(result_pages))
+        self.assertEqual(len(set(search_info[SearchInfo.RESULTS])), len(result_pages))
+        self.assertEqual(presenter.next_page(search_info_key), [])
+
+class TestQueryCache(unittest.TestCase):
+    def setUp(self):
+        self.search_info={SearchInfo.RESULTS: ["399135782"], SearchInfo.MATCHED_STRINGS: ["tan"]}
+        self.key=(("tan",), SearchType.IN)
+
+    def test_get_and_put(self):
+        cache=QueryCache()
+        self.assertIsNone(cache.get("ten", 1, self.key))
+        cache.put("ten", 1, self.key, self.search_info)
+        self.assertEqual(cache.get("ten", 1, self.key), self.search_info)
+        self.assertIsNone(cache.get("ten", 2, self.key))
+        self.assertIsNone(cache.get("hundred", 1, self.key))
+        self.assertEqual((cache.hits, cache.misses), (1, 3))
+        self.assertEqual(cache.size, search_info_size(copy_search_info(self.search_info)))
+        self.search_info[SearchInfo.RESULTS].append("425176428")
+        self.assertEqual(cache.get("ten", 1, self.key)[SearchInfo.RESULTS], ["399135782"]) # the cache has its own copy
+        cache.put("ten", 1, self.key, self.search_info)
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(cache.size, search_info_size(copy_search_info(self.search_info)))
+        cache.clear()
+        self.assertEqual((len(cache), cache.size, cache.hits, cache.misses), (0, 0, 0, 0))
+
+    def test_least_recently_used_are_dropped(self):
+        cache=QueryCache(max_entries=2)
+        for terms in ("amy", "tan", "group"):
+            if terms == "group":
+                cache.get("ten", 1, (("amy",), SearchType.IN)) # amy is now used more recently than tan
+            cache.put("ten", 1, ((terms,), SearchType.IN), {SearchInfo.RESULTS: []})
+        self.assertIsNone(cache.get("ten", 1, (("tan",), SearchType.IN)))
+        self.assertIsNotNone(cache.get("ten", 1, (("amy",), SearchType.IN)))
+        self.assertIsNotNone(cache.get("ten", 1, (("group",), SearchType.IN)))
+        size=search_info_size(copy_search_info(self.search_info))
+        cache=QueryCache(max_bytes=2 * size)
+        for version in range(3):
+            cache.put("ten", version, self.key, dict(self.search_info))
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get("ten", 0, self.key))
+        cache=QueryCache(max_bytes=size - 1)
+        cache.put("ten", 1, self.key, self.search_info)
+        self.assertEqual(len(cache), 0)
+
+    def test_invalidate(self):
+        cache=QueryCache()
+        for name, version in (("ten", 1), ("ten", 2), ("hundred", 1)):
+            cache.put(name, version, self.key, dict(self.search_info))
+        cache.invalidate("ten", keep_version=2)
+        self.assertIsNone(cache.get("ten", 1, self.key))
+        self.assertIsNotNone(cache.get("ten", 2, self.key))
+        self.assertIsNotNone(cache.get("hundred", 1, self.key))
+        cache.invalidate("hundred")
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(cache.size, search_info_size(copy_search_info(self.search_info)))
+
+    def test_catalog_changes_invalidate(self):
+        catalog=Catalog("ten (invalidate)", "10books.csv")
+        engine=SearchEngine(catalog)
+        for change in (lambda: catalog.update_book("393045218", {"Year": "2004"}), catalog.load, catalog.unload):
+            search_info_key=engine.search("mummies").search_info_key
+            version=catalog.version
+            self.assertIsNotNone(query_cache.cache.get(catalog.name, version, search_info_key))
+            change()
+            self.assertIsNone(query_cache.cache.get(catalog.name, version, search_info_key))
+
+    def test_windows_page_on_their_own(self):
+        books=create_books_from_csv("100books.csv")
+        search_index=create_indexes(books)[0]
+        search_info_key=(("e",), SearchType.IN)
+        cache=QueryCache()
+        presenter=Presenter({search_info_key: dict()}, books, use_gui=False)
+        search_all_with_in_operator(search_index, sorted(search_index, key=len), presenter, search_info_key)
+        cache.put("hundred", 1, search_info_key, presenter.search_info[search_info_key])
+        window_a=Presenter({search_info_key: cache.get("hundred", 1, search_info_key)}, books, use_gui=False)
+        window_b=Presenter({search_info_key: cache.get("hundred", 1, search_info_key)}, books, use_gui=False)
+        pages=window_a.search_info[search_info_key][SearchInfo.PAGES]
+        self.assertIs(window_b.search_info[search_info_key][SearchInfo.PAGES], pages)
+        self.assertGreater(len(pages), 2 * Search.PAGE_SIZE)
+        page_a=window_a.next_page(search_info_key) # window a shows books 20-40
+        page_b=window_b.next_page(search_info_key) # window b shows the same books, not 40-60
+        self.assertEqual(page_b, page_a)
+        self.assertEqual(window_b.search_info[search_info_key][SearchInfo.RESULTS], pages.isbns(0, 2 * Search.PAGE_SIZE))
+        self.assertEqual(len(window_a.search_info[search_info_key][SearchInfo.MATCHED_BOOK_INFO]), 2 * Search.PAGE_SIZE)
+        cached=cache.get("hundred", 1, search_info_key)
+        self.assertEqual(len(cached[SearchInfo.RESULTS]), Search.PAGE_SIZE)
+        self.assertEqual(len(cached[SearchInfo.MATCHED_BOOK_INFO]), Search.PAGE_SIZE)
+        self.assertEqual(len(presenter.search_info[search_info_key][SearchInfo.RESULTS]), Search.PAGE_SIZE)
+
+    def test_result_pages_size(self):
+        result_pages=ResultPages([[{"1", "2"}, {"2", "3"}]])
+        self.assertGreater(search_info_size({SearchInfo.PAGES: result_pages}), search_info_size({SearchInfo.PAGES: ResultPages([])}))
+
+class TestCancellationToken(unittest.TestCase):
+    def test_cancel(self):
+        token=CancellationToken()
+        self.assertFalse(token.cancelled)
+        token.cancel()
+        self.assertTrue(token.cancelled)
+        token.cancel()
+        self.assertTrue(token.cancelled)
+        self.assertTrue(is_cancelled(token))
+        self.assertFalse(is_cancelled(None))
+
+    def test_cancelled_searches_return_early(self):
+        books=create_books_from_csv("100books.csv")
+        search_index=create_indexes(books)[0]
+        search_source=Vocabulary(sorted(search_index, key=lambda word: (len(word), word)))
+        token=CancellationToken()
+        token.cancel()
+        for search in (search_all_with_levenshtein_distance, search_all_with_in_operator):
+            search_info_key=(("mummies", "pirates"), SearchType.LEVENSHTEIN)
+            presenter=Presenter({search_info_key: dict()}, books, use_gui=False)
+            search(search_index, search_source, presenter, search_info_key, token=token)
+            self.assertNotIn(SearchInfo.PAGES, presenter.search_info[search_info_key])
+            self.assertEqual(presenter.search_info[search_info_key][SearchInfo.MATCHED_STRINGS], [])
+        self.assertEqual(search_by_levenshtein_distance(search_source, presenter, search_info_key, token=token), {})
+
+    def test_cancelled_between_terms(self):
+        token=CancellationToken()
+        matched_terms=[]
+        def word_matcher(word, max_distance):
+            matched_terms.append(word)
+            token.cancel() # e.g. a newer search is started while the first term is matched
+            return {0: [word]}
+        search_info_key=(("mummies", "pirates"), SearchType.LEVENSHTEIN)
+        presenter=Presenter({search_info_key: dict()}, dict(), use_gui=False)
+        self.assertEqual(search_with_word_matcher(word_matcher, presenter, search_info_key, token), {0: ["mummies"]})
+        self.assertEqual(matched_terms, ["mummies"])
 
 class TestYearSearch(unittest.TestCase):
     def test_year_search(self):
@@ -399,6 +1341,59 @@ class TestYearSearch(unittest.TestCase):
         search_info_key=tuple(" ",)
         self.assertEqual(presenter.search_info[search_info_key][SearchInfo.RESULTS], [])
         
+class TestSortedYearIndex(unittest.TestCase):
+    def setUp(self):
+        self.sorted_year_index=SortedYearIndex({"2002": {"074322678X", "195153448"}, "2001": {"2005018"}, "1991": {"60973129", "399135782"}, 
+                                                "1999": {"374157065", "393045218"}, "2000": {"425176428"}, "1993": {"671870432"}, "1996": {"679425608"}})
+
+    def test_isbns_in_range(self):
+        self.assertEqual(self.sorted_year_index.years, [1991, 1993, 1996, 1999, 2000, 2001, 2002])
+        self.assertEqual(self.sorted_year_index.isbns_in_range(1995, 1999), ["679425608", "374157065", "393045218"])
+        self.assertEqual(self.sorted_year_index.isbns_in_range(None, 1992), ["399135782", "60973129"])
+        self.assertEqual(self.sorted_year_index.isbns_in_range(2002, None), ["074322678X", "195153448"])
+        self.assertEqual(self.sorted_year_index.isbns_in_range(1980, 1990), [])
+        self.assertEqual(self.sorted_year_index.isbns_in_range(2000, 1990), [])
+
+    def test_counts(self):
+        self.assertEqual(self.sorted_year_index.count_in_range(1995, 2001), 5)
+        self.assertEqual(self.sorted_year_index.count_in_range(None, None), 10)
+        self.assertEqual(self.sorted_year_index.count_in_range(2003, None), 0)
+        self.assertEqual(self.sorted_year_index.facet_counts(1999, 2001), {1999: 2, 2000: 1, 2001: 1})
+        self.assertEqual(list(self.sorted_year_index.facet_counts()), [1991, 1993, 1996, 1999, 2000, 2001, 2002])
+
+class TestParseYearRange(unittest.TestCase):
+    def test_parse_year_range(self):
+        self.assertEqual(parse_year_range("1995-2002"), (1995, 2002))
+        self.assertEqual(parse_year_range(" 1995 to 2002 "), (1995, 2002))
+        self.assertEqual(parse_year_range("1995..2002"), (1995, 2002))
+        self.assertEqual(parse_year_range("before 1980"), (None, 1979))
+        self.assertEqual(parse_year_range("<=1980"), (None, 1980))
+        self.assertEqual(parse_year_range("After 1990"), (1991, None))
+        self.assertEqual(parse_year_range(">= 1990"), (1990, None))
+        self.assertIsNone(parse_year_range("2002-1995"))
+        self.assertIsNone(parse_year_range("1999"))
+        self.assertIsNone(parse_year_range("harry potter"))
+        self.assertIsNone(parse_year_range(1999))
+
+class TestYearRangeSearch(unittest.TestCase):
+    def test_year_range_search(self):
+        sorted_year_index=SortedYearIndex({"2002": {"074322678X", "195153448"}, "2001": {"2005018"}, "1991": {"60973129", "399135782"}})
+        test_books={"195153448": {"Title": "Classical Mythology", "Author": "Mark P. O. Morford", "Publisher": "Oxford University Press", "Year": "2002"},
+                    "2005018": {"Title": "Clara Callan", "Author": "Richard Bruce Wright", "Publisher": "HarperFlamingo Canada", "Year": "2001"},
+                    "074322678X": {"Title": "Where You'll Find Me: And Other Stories", "Author": "Ann Beattie", "Publisher": "Scribner", "Year": "2002"}}
+        search_info_key=(("2001", ""), SearchType.YEAR_RANGE)
+        presenter=Presenter({search_info_key: dict()}, test_books, use_gui=False)
+        self.assertIsNone(year_range_search(sorted_year_index, presenter, search_info_key))
+        self.assertEqual(presenter.search_info[search_info_key][SearchInfo.RESULTS], ["2005018", "074322678X", "195153448"])
+        self.assertEqual(presenter.search_info[search_info_key][SearchInfo.MATCHED_STRINGS], ["2001", "2002"])
+        self.assertEqual(presenter.search_info[search_info_key][SearchInfo.FACETS], {2001: 1, 2002: 2})
+        self.assertEqual(len(presenter.search_info[search_info_key][SearchInfo.MATCHED_BOOK_INFO]), 3)
+        self.assertEqual(presenter.format_facets({2001: 1, 2002: 2}), "Books per year: 2001 (1), 2002 (2)")
+        search_info_key=(("1980", "1985"), SearchType.YEAR_RANGE)
+        presenter.search_info.setdefault(search_info_key, dict())
+        year_range_search(sorted_year_index, presenter, search_info_key)
+        self.assertEqual(presenter.search_info[search_info_key][SearchInfo.RESULTS], [])
+
 class TestIsbnSearch(unittest.TestCase):
     def test_isbn_search(self):
         test_books={
@@ -427,6 +1422,169 @@ class TestIsbnSearch(unittest.TestCase):
         isbn_search(presenter, search_info_key)
         self.assertEqual(presenter.search_info[search_info_key][SearchInfo.RESULTS], ["074322678X"])
         
+class TestIsbnIndex(SearchTestCase):
+    def setUp(self):
+        self.isbns=["195153448", "2005018", "60973129", "374157065", "393045218", "399135782", "425176428", "671870432", "679425608", "074322678X", "9780060929794"]
+        self.isbn_index=IsbnIndex(self.isbns)
+
+    def test_normalize_isbn(self):
+        self.assertEqual(normalize_isbn("ISBN 0-393-04521-8"), "0393045218")
+        self.assertEqual(normalize_isbn("074322678x"), "074322678X")
+        self.assertEqual(isbn13_check_digit("978039304521"), "5")
+        self.assertIn("9780393045215", isbn_spellings("393045218"))
+        self.assertIn("393045218", isbn_spellings("978-0-393-04521-5"))
+        self.assertIn("0002005018", isbn_spellings("2005018"))
+        self.assertEqual(isbn_spellings("979-1-2345-6789-6"), {"9791234567896"})
+        self.assertEqual(isbn_spellings(""), set())
+
+    def test_exact_matches(self):
+        self.assertEqual(self.isbn_index.exact_matches("393045218"), ["393045218"])
+        self.assertEqual(self.isbn_index.exact_matches("0393045218"), ["393045218"])
+        self.assertEqual(self.isbn_index.exact_matches("9780393045215"), ["393045218"])
+        self.assertEqual(self.isbn_index.exact_matches("9780743226783"), ["074322678X"])
+        self.assertEqual(self.isbn_index.exact_matches("0002005018"), ["2005018"])
+        self.assertEqual(self.isbn_index.exact_matches("0060929790"), ["9780060929794"])
+        self.assertEqual(self.isbn_index.exact_matches("123456789"), [])
+
+    def test_other_check_characters(self):
+        isbn_index=IsbnIndex(["393045218", "393045210"]) # same first nine digits, only 393045218 has a valid check digit
+        self.assertEqual(isbn_index.exact_matches("393045218"), ["393045218"])
+        self.assertEqual(isbn_index.exact_matches("9780393045215"), ["393045218"])
+        self.assertEqual(isbn_index.exact_matches("393045210"), ["393045210", "393045218"]) # mistyped check digit
+        self.assertEqual(isbn_spellings("0393045218"), {"0393045218", "393045218", "9780393045215"})
+        self.assertEqual(len(isbn_spellings("0393045217")), 23)
+
+    def test_partial_matches(self):
+        for term in ("19515", "2678X", "2678x", "6792", "0929", "99"):
+            self.assertEqual(self.isbn_index.partial_matches(term), sorted(isbn for isbn in self.isbns if normalize_isbn(term) in isbn))
+        self.assertEqual(self.isbn_index.partial_matches("5555"), [])
+        self.assertEqual(self.isbn_index.partial_matches(""), [])
+
+    def test_add_and_remove(self):
+        self.assertFalse(self.isbn_index.add("393045218"))
+        self.assertTrue(self.isbn_index.remove("393045218"))
+        self.assertFalse(self.isbn_index.remove("393045218"))
+        self.assertEqual(self.isbn_index.exact_matches("393045218"), [])
+        self.assertEqual(self.isbn_index.partial_matches("0452"), [])
+        self.assertTrue(self.isbn_index.add("393045218"))
+        self.assertEqual(self.isbn_index.partial_matches("0452"), ["393045218"])
+        self.assertEqual(len(self.isbn_index), len(self.isbns))
+
+    def test_isbn_search_with_index(self):
+        books=create_books_from_csv("100books.csv")
+        isbn_index=IsbnIndex(books.keys())
+        for term in ("60973129", "19515", "0452", "4521", "123"):
+            self.assertSameSearch(((term,), SearchType.ISBN),
+                                  lambda presenter, search_info_key: isbn_search(presenter, search_info_key, isbn_index),
+                                  lambda presenter, search_info_key: isbn_search(presenter, search_info_key),
+                                  books)
+        search_info_key=(("0393045218",), SearchType.ISBN) # only the index knows the lost leading zero
+        presenter=Presenter({search_info_key: dict()}, books, use_gui=False)
+        isbn_search(presenter, search_info_key, isbn_index)
+        self.assertEqual(presenter.search_info[search_info_key][SearchInfo.RESULTS], ["393045218"])
+        scan_presenter=Presenter({search_info_key: dict()}, books, use_gui=False)
+        isbn_search(scan_presenter, search_info_key)
+        self.assertEqual(scan_presenter.search_info[search_info_key][SearchInfo.RESULTS], [])
+
+    def test_catalog_isbn_index(self):
+        catalog=Catalog("ten", "10books.csv")
+        self.assertIs(catalog.isbn_index, catalog.isbn_index)
+        catalog.insert_book("9780316769488", {"Title": "The Catcher in the Rye", "Author": "J. D. Salinger", "Publisher": "Little Brown", "Year": "1951"})
+        self.assertEqual(catalog.isbn_index.exact_matches("0316769487"), ["9780316769488"])
+        catalog.delete_book("393045218")
+        self.assertEqual(catalog.isbn_index.exact_matches("393045218"), [])
+
+class TestSearchEngine(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.catalog=Catalog("thousand", "1000books.csv")
+        cls.engine=SearchEngine(cls.catalog, use_cache=False)
+
+    def test_parse(self):
+        self.assertEqual(self.engine.parse("The Mummies of Urumchi"), (SearchType.WORD, ["mummies", "urumchi"], None))
+        self.assertEqual(self.engine.parse("author: Amy Tan"), (SearchType.WORD, ["amy", "tan"], BookField.AUTHOR))
+        self.assertEqual(self.engine.parse("1995-2002"), (SearchType.YEAR_RANGE, ["1995", "2002"], None))
+        self.assertEqual(self.engine.parse("after 1990"), (SearchType.YEAR_RANGE, ["1991", ""], None))
+        self.assertEqual(self.engine.parse("2002"), (SearchType.YEAR, ["2002"], None))
+        self.assertEqual(self.engine.parse("0195153448"), (SearchType.ISBN, ["0195153448"], None))
+        self.assertEqual(self.engine.parse("the"), (SearchType.UNDETERMINED, [], None))
+        self.assertEqual(self.engine.parse("author: the"), (SearchType.UNDETERMINED, [], BookField.AUTHOR))
+
+    def test_same_results_as_search_functions(self):
+        for terms, method, search in ((("mumies", "pirats"), SearchType.LEVENSHTEIN, search_all_with_levenshtein_distance), (("mummies", "pirates"), SearchType.IN, search_all_with_in_operator)):
+            search_info_key=(terms, method)
+            presenter=Presenter({search_info_key: dict()}, self.catalog.books, use_gui=False)
+            search(self.catalog.word_index(), self.catalog.search_source, presenter, search_info_key)
+            result=self.engine.search(" ".join(terms), method)
+            self.assertEqual(result.search_info_key, search_info_key)
+            self.assertEqual(result.isbns, presenter.search_info[search_info_key][SearchInfo.RESULTS])
+            self.assertEqual(result.books[0], {BookField.ISBN: result.isbns[0], **self.catalog.books[result.isbns[0]]})
+        self.assertEqual(self.engine.search("0195153448").isbns, ["195153448"])
+
+    def test_limit(self):
+        result=self.engine.search("tion", SearchType.IN, limit=45)
+        self.assertEqual(len(result.books), 45)
+        self.assertGreater(result.total, 45)
+        self.assertEqual(self.engine.search("tion", SearchType.IN, limit=100).isbns[:45], result.isbns)
+        self.assertEqual(len(self.engine.search("1990-2000", limit=5).books), 5)
+
+    def test_total_counts_every_book_once(self):
+        result=self.engine.search("dog dogs", limit=1000) # books with both words are in the tiers of distance 0 and 1
+        matched_isbns=[isbn for word in result.matched_strings for isbn in self.catalog.word_index()[word]]
+        self.assertGreater(len(matched_isbns), len(set(matched_isbns)))
+        self.assertEqual(result.total, len(set(matched_isbns)))
+        self.assertEqual(result.total, len(set(result.isbns)))
+        self.assertEqual(result.total, len(result.isbns))
+
+    def test_undetermined(self):
+        result=self.engine.search("a an the")
+        self.assertEqual(result.search_type, SearchType.UNDETERMINED)
+        self.assertEqual((result.books, result.total), ([], 0))
+
+    def test_query_cache(self):
+        engine=SearchEngine(self.catalog)
+        engine.search("reality")
+        hits=query_cache.cache.hits
+        self.assertEqual(engine.search("reality").isbns, self.engine.search("reality").isbns)
+        self.assertEqual(query_cache.cache.hits, hits + 1)
+
+    def test_cancelled_find(self):
+        engine=SearchEngine(self.catalog)
+        token=CancellationToken()
+        search_info_key, search=engine.plan(SearchType.WORD, ["cristmas", "pirats"], token=token)
+        presenter=Presenter({search_info_key: dict()}, self.catalog.books, use_gui=False)
+        token.cancel()
+        search(presenter, search_info_key)
+        self.assertNotIn(SearchInfo.PAGES, presenter.search_info[search_info_key])
+        self.assertIsNone(engine.find(SearchType.WORD, ["cristmas", "pirats"], token=token))
+        self.assertIsNone(query_cache.cache.get(self.catalog.name, self.catalog.version, search_info_key))
+
+    def test_run_queries(self):
+        directory=tempfile.mkdtemp()
+        try:
+            path=os.path.join(directory, "queries.txt")
+            with open(path, "w", encoding="utf-8") as query_file:
+                query_file.write("# queries\nmumies\n\n2002\nthe\n")
+            queries=read_queries(path)
+        finally:
+            shutil.rmtree(directory)
+        self.assertEqual(queries, ["mumies", "2002", "the"])
+        results=[]
+        stats=run_queries(self.engine, queries, repeat=2, on_result=results.append)
+        self.assertEqual(stats.queries, 6)
+        self.assertEqual(len(stats.latencies), 6)
+        self.assertEqual(stats.results, sum(len(result.books) for result in results))
+        self.assertGreater(stats.queries_per_second, 0)
+
+    def test_percentiles(self):
+        stats=BatchStats()
+        self.assertEqual(stats.percentile(50), 0.0)
+        stats.latencies=[i / 1000 for i in range(10, 0, -1)]
+        self.assertAlmostEqual(stats.percentile(50), 5)
+        self.assertAlmostEqual(stats.percentile(90), 9)
+        self.assertAlmostEqual(stats.percentile(99), 10)
+        self.assertAlmostEqual(stats.percentile(0), 1)
+
 class TestPrepareResultsForPresentation(unittest.TestCase):
     def test_prepare_results_for_presentation(self):
         test_isbns=["393045218", "671870432"]
@@ -0,0 +1,124 @@
+from __future__ import annotations
+from bisect import bisect_left
+from collections.abc import Sequence, Iterator
+
+"""
+Read-only view of a part of a list, without copying it
+
+A slice of a list copies the references to all of its elements, which
+costs as much as the slice is long. A WordView only holds the list and the
+start and end of the part it shows, so making one costs nothing; indexing
+and iterating go to the list itself.
+"""
+class WordView(Sequence):
+    def __init__(self, words: list[str], start: int=0, stop: int|None=None):
+        self.__words=words
+        self.__start=start
+        self.__stop=len(words) if stop is None else stop
+
+    """
+    The list the view shows a part of
+    """
+    @property
+    def source(self) -> list[str]:
+        return self.__words
+
+    @property
+    def start(self) -> int:
+        return self.__start
+
+    @property
+    def stop(self) -> int:
+        return self.__stop
+
+    def __len__(self) -> int:
+        return max(self.__stop - self.__start, 0)
+
+    def __getitem__(self, index: int|slice) -> str|WordView:
+        if isinstance(index, slice):
+            start, stop, step=index.indices(len(self))
+            if step != 1:
+                return [self[i] for i in range(start, stop, step)]
+            return WordView(self.__words, self.__start + start, self.__start + max(stop, start))
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("WordView index out of range")
+        return self.__words[self.__start + index]
+
+    def __iter__(self) -> Iterator[str]:
+        return map(self.__words.__getitem__, range(self.__start, self.__stop))
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, (WordView, list)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"WordView({list(self)!r})"
+
+"""
+Length buckets of the words of a word index
+
+The words are kept in one list sorted by length and then alphabetically
+(the search source of a catalog), and the position of the first word of
+every length is stored in a list of offsets:
+
+    words:   ["amy", "tan", "wife", "group", "kitchen"]
+    offsets: [0, 0, 0, 0, 2, 3, 4, 4, 5] -> the words of length 4 are words[2:3]
+
+The offsets are found with one binary search per length, so a vocabulary
+is made once per version of a catalog in O(k log n) for words of up to k
+characters, and the words within a range of lengths are returned as a
+WordView of the list, without copying or sorting.
+
+The vocabulary does not follow changes of the list; a new one is made
+after the words change.
+"""
+class Vocabulary(Sequence):
+    def __init__(self, words: list[str]):
+        self.__words=words
+        max_length=len(words[-1]) if words else 0
+        self.__offsets=[bisect_left(words, length, key=len) for length in range(max_length + 1)] + [len(words)]
+
+    @property
+    def words(self) -> list[str]:
+        return self.__words
+
+    @property
+    def offsets(self) -> list[int]:
+        return self.__offsets
+
+    @property
+    def max_length(self) -> int:
+        return len(self.__offsets) - 2
+
+    def __len__(self) -> int:
+        return len(self.__words)
+
+    def __getitem__(self, index: int|slice) -> str|list[str]:
+        return self.__words[index]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.__words)
+
+    """
+    Return the position of the first word that is at least length
+    characters long
+    """
+    def offset(self, length: int) -> int:
+        return self.__offsets[min(max(length, 0), len(self.__offsets) - 1)]
+
+    """
+    Return the words from min_length up to max_length characters long (both
+    inclusive, None means unbounded) as a view of the word list
+    """
+    def length_range(self, min_length: int=0, max_length: int|None=None) -> WordView:
+        stop=len(self.__words) if max_length is None else self.offset(max_length + 1)
+        return WordView(self.__words, self.offset(min_length), stop)
+
+    """
+    Return the words of the given length as a view of the word list
+    """
+    def words_of_length(self, length: int) -> WordView:
+        return self.length_range(length, length)
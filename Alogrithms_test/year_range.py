@@ -0,0 +1,104 @@
+from __future__ import annotations
+import re
+from bisect import bisect_left, bisect_right
+from itertools import accumulate, chain
+
+"""
+Numeric, sorted year index for year range searches
+
+The year index built by book_data maps year strings to sets of ISBNs,
+which only answers exact year lookups. The sorted year index keeps the
+years as integers in ascending order, with the ISBNs of each year and the
+number of books per year in parallel lists, and a running total of the
+counts. A range of years is found with two binary searches, so a range
+query costs O(log n + k) for n distinct years and k matching books, and
+counting the books in a range costs O(log n).
+
+    years:      [1991, 1993, 1996, 1999]
+    isbns:      [[...], [...], [...], [...]]
+    counts:     [2,    1,    1,    2]
+    cumulative: [0, 2, 3, 4, 6]
+"""
+class SortedYearIndex():
+    def __init__(self, year_index: dict[str, set[str]]):
+        years=sorted((int(year), isbns) for year, isbns in year_index.items() if year.isdigit())
+        self.__years=[year for year, _ in years]
+        self.__isbns=[sorted(isbns) for _, isbns in years]
+        self.__counts=[len(isbns) for isbns in self.__isbns]
+        self.__cumulative=[0] + list(accumulate(self.__counts))
+
+    @property
+    def years(self) -> list[int]:
+        return self.__years
+
+    """
+    Return the positions of the first and one past the last year within
+    start and end (both inclusive, None means unbounded)
+    """
+    def __bounds(self, start: int|None, end: int|None) -> tuple[int, int]:
+        low=0 if start is None else bisect_left(self.__years, start)
+        high=len(self.__years) if end is None else bisect_right(self.__years, end)
+        return low, max(low, high)
+
+    """
+    Return the ISBNs of the books published between start and end (both
+    inclusive), in ascending order of year
+    """
+    def isbns_in_range(self, start: int|None, end: int|None) -> list[str]:
+        low, high=self.__bounds(start, end)
+        return list(chain.from_iterable(self.__isbns[low:high]))
+
+    """
+    Return the number of books published between start and end (both
+    inclusive)
+    """
+    def count_in_range(self, start: int|None, end: int|None) -> int:
+        low, high=self.__bounds(start, end)
+        return self.__cumulative[high] - self.__cumulative[low]
+
+    """
+    Return the number of books per year between start and end (both
+    inclusive) as a dictionary in ascending order of year
+    """
+    def facet_counts(self, start: int|None=None, end: int|None=None) -> dict[int, int]:
+        low, high=self.__bounds(start, end)
+        return dict(zip(self.__years[low:high], self.__counts[low:high]))
+
+
+"""
+Patterns of the accepted year range expressions. A range has two four
+digit years separated by a dash (1995-2002), two dots (1995..2002) or the
+word 'to' (1995 to 2002). An open range has a comparison or one of the
+words before, after, since and until, followed by a four digit year.
+"""
+range_pattern=re.compile(r"^\s*(\d{4})\s*(?:-|\.\.|to)\s*(\d{4})\s*$", re.IGNORECASE)
+open_range_pattern=re.compile(r"^\s*(<=|>=|<|>|before|after|since|until)\s*(\d{4})\s*$", re.IGNORECASE)
+
+"""
+Parse a year range expression into its (start, end) years
+
+Both years are inclusive and None stands for an open end, e.g.
+"1995-2002" -> (1995, 2002), "before 1980" -> (None, 1979) and
+">= 1990" -> (1990, None). Returns None if the text is not a year range
+expression or the start is after the end.
+"""
+def parse_year_range(text: str) -> tuple[int|None, int|None]|None:
+    if type(text) != str:
+        return None
+    match=range_pattern.match(text)
+    if match:
+        start, end=int(match.group(1)), int(match.group(2))
+        return (start, end) if start <= end else None
+    match=open_range_pattern.match(text)
+    if match:
+        operator, year=match.group(1).lower(), int(match.group(2))
+        match operator:
+            case "<" | "before":
+                return None, year - 1
+            case "<=" | "until":
+                return None, year
+            case ">" | "after":
+                return year + 1, None
+            case ">=" | "since":
+                return year, None
+    return None